@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+并行的命令行批量规划。
+
+从CSV或JSONL读取用户资料（id、start_date、health_goal、taste_preferences、exclude_terms、seed、days），
+分块交给进程池，每个用户以自己的种子调用与 generate_weekly_meal_plan 相同的核心生成规划，
+按输入顺序以JSONL写到标准输出或文件：
+
+    python batch_cli.py profiles.csv -o plans.jsonl --workers 8
+    cat profiles.jsonl | python batch_cli.py - --format jsonl > plans.jsonl
+
+输入逐块读取，进程池中同时处理的块数有上限，结果写出后即释放，内存占用与批次大小无关。
+各块互不依赖，每个工作进程只在启动时加载一次菜谱库，速度随核数近似线性增长。
+没有seed的用户会随机生成一个并写入结果，之后可用它复现同一份规划。
+无法解析的行、seed或days不是整数、口味偏好未知的资料输出 {"error", "line"}，不会中断整个批次。
+"""
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import csv
+import itertools
+import json
+import os
+import re
+import sys
+
+from planner import resolve_seed
+from recipe_index import check_taste_preferences
+
+# 每块的用户数：太小时进程间通信占比高，太大时首批结果出现得晚
+DEFAULT_CHUNK_SIZE = 256
+# 每个工作进程最多排队的块数
+CHUNKS_PER_WORKER = 2
+
+# CSV中多个口味偏好之间的分隔符
+_PREFERENCE_SEPARATORS = re.compile(r"[;,，、；\s]+")
+
+
+def _detect_format(path, format):
+    if format:
+        return format
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_profiles(path, format=None):
+    """逐行读取用户资料
+
+    Args:
+        path: 文件路径，"-" 表示标准输入
+        format: "csv" 或 "jsonl"，默认按扩展名判断
+
+    Yields:
+        (行号, 原始资料)：CSV为字典，JSONL为未解析的行文本（空行跳过）
+    """
+    format = _detect_format(path, format)
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8-sig", newline="")
+    try:
+        if format == "csv":
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(stream, 1):
+                line = line.strip()
+                if line:
+                    yield line_num, line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def parse_taste_preferences(text):
+    """把CSV中的口味偏好拆成列表，如 "不吃辣;素食"
+
+    Args:
+        text: 用分号、逗号、顿号或空白分隔的偏好
+
+    Returns:
+        去重后的偏好列表（保持输入顺序）
+    """
+    return list(dict.fromkeys(pref for pref in _PREFERENCE_SEPARATORS.split(text) if pref))
+
+
+def normalize_profile(raw, number, days=7):
+    """整理一条用户资料：补上id和seed，口味偏好转换为列表
+
+    Args:
+        raw: 原始字典（CSV的值都是字符串）
+        number: 在输入中的序号，用作缺省的id
+        days: 缺省的规划天数
+
+    Raises:
+        ValueError: seed或days不是整数，或口味偏好未知
+    """
+    seed = resolve_seed(raw.get("seed"))
+    prefs = raw.get("taste_preferences") or []
+    if isinstance(prefs, str):
+        prefs = parse_taste_preferences(prefs)
+    elif not isinstance(prefs, list):
+        raise ValueError("taste_preferences 必须是列表或字符串")
+    check_taste_preferences(prefs)
+    return {
+        "id": raw.get("id") or number,
+        "seed": seed,
+        "start_date": raw.get("start_date") or "",
+        "health_goal": raw.get("health_goal") or "无目标",
+        "taste_preferences": prefs,
+        "exclude_terms": raw.get("exclude_terms") or "",
+        "days": int(raw.get("days") or days)
+    }
+
+
+def load_profiles(path, format=None, days=7):
+    """读取并整理用户资料，某一行无效时输出错误记录，不中断整个批次
+
+    Args:
+        path: 文件路径，"-" 表示标准输入
+        format: "csv" 或 "jsonl"，默认按扩展名判断
+        days: 缺省的规划天数
+
+    Yields:
+        normalize_profile 的结果；无效的行为 {"error", "line"}
+    """
+    for number, (line_num, raw) in enumerate(read_profiles(path, format), 1):
+        try:
+            if isinstance(raw, str):
+                raw = json.loads(raw)
+            if not isinstance(raw, dict):
+                raise ValueError("用户资料必须是JSON对象")
+            yield normalize_profile(raw, number, days)
+        except (TypeError, ValueError) as e:
+            yield {"error": f"{type(e).__name__}: {e}", "line": line_num}
+
+
+def _init_worker():
+    # 工作进程的打印（如加载菜谱库的提示）不能混进标准输出的JSONL
+    sys.stdout = sys.stderr
+    import meal_service  # noqa: F401  启动时加载菜谱库和索引，之后每块都复用
+
+
+def plan_profile(profile):
+    """为一个用户生成规划
+
+    Returns:
+        结果字典：用户资料加上 plan（与 generate_weekly_meal_plan 的返回值相同）
+    """
+    import meal_service
+    plan = meal_service.generate_weekly_meal_plan(
+        profile["start_date"], profile["health_goal"], profile["taste_preferences"], profile["exclude_terms"],
+        profile["days"], seed=profile["seed"]
+    )
+    return dict(profile, plan=plan)
+
+
+def plan_chunk(profiles):
+    """为一块用户生成规划，在工作进程中直接序列化成JSON行
+
+    Returns:
+        JSON行列表，出错的用户输出 {"id", "seed", "error"}，无效的输入行输出 {"error", "line"}
+    """
+    lines = []
+    for profile in profiles:
+        if "error" in profile:
+            # 读取时已无效的行，原样输出错误记录
+            lines.append(json.dumps(profile, ensure_ascii=False))
+            continue
+        try:
+            record = plan_profile(profile)
+        except Exception as e:
+            record = {"id": profile.get("id"), "seed": profile.get("seed"), "error": f"{type(e).__name__}: {e}"}
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return lines
+
+
+def _chunks(profiles, chunk_size):
+    iterator = iter(profiles)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_plan_lines(profiles, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """并行生成规划，按输入顺序逐行返回
+
+    Args:
+        profiles: load_profiles 的结果（可以是生成器）
+        workers: 工作进程数，默认为CPU核数，1表示在当前进程中执行
+        chunk_size: 每块的用户数
+
+    Yields:
+        JSON行
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in _chunks(profiles, chunk_size):
+            yield from plan_chunk(chunk)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = collections.deque()
+        for chunk in _chunks(profiles, chunk_size):
+            pending.append(pool.submit(plan_chunk, chunk))
+            # 排队的块数有上限，输入不会被一次读完
+            while len(pending) >= workers * CHUNKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="并行批量生成餐饮规划，输出JSONL")
+    parser.add_argument("input", help="用户资料文件（CSV或JSONL），- 表示标准输入")
+    parser.add_argument("-o", "--output", default="-", help="输出的JSONL文件，默认为标准输出")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="输入格式，默认按扩展名判断")
+    parser.add_argument("--days", type=int, default=7, help="资料中没有days时的规划天数")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认为CPU核数")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每块的用户数")
+    args = parser.parse_args(argv)
+
+    to_stdout = args.output == "-"
+    out = sys.stdout if to_stdout else open(args.output, "w", encoding="utf-8")
+    count = 0
+    # 标准输出只用于JSONL，运行期间其他提示信息（如加载菜谱库）都转到 stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            profiles = load_profiles(args.input, args.format, args.days)
+            for line in iter_plan_lines(profiles, args.workers, args.chunk_size):
+                out.write(line + "\n")
+                count += 1
+        finally:
+            if to_stdout:
+                out.flush()
+            else:
+                out.close()
+        print(f"✅ 已生成 {count} 份规划")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+批量生成多用户的餐饮规划。
+
+把请求按约束签名（健康目标、口味偏好、自定义忌口）分组，每组只取一次候选列表，
+再用NumPy按天、按餐次一次性为批次中的全部用户（不论属于哪一组）抽取菜品下标，
+Python层面的循环次数只与天数、餐次数和不重复窗口有关，与用户数和分组数无关。
+
+每个餐次在 no_repeat_days 天内不重复：第d天从候选池中去掉该用户最近 no_repeat_days-1 天
+选过的菜品后均匀抽取（候选池太小时只去掉最近 池大小-1 天的菜品，即轮换最久未用的菜品）。
+抽取用的均匀随机数由 (seed, 天, 餐次) 经过 splitmix64 混合得到，同一个seed的结果与批次中
+其他请求无关，可以复现。未安装NumPy时使用同一算法的纯Python实现，结果完全一致。
+
+与 generate_weekly_meal_plan（NoRepeatPlanner）的区别：这里只保证同一餐次内不重复，
+不做跨餐次去重、主料次数上限和类别轮换，同一个seed得到的规划也不相同。
+需要与单个规划逐字节一致时使用 batch_cli.py。
+"""
+from keyword_matcher import parse_exclusion_terms
+from plan_engine import NO_REPEAT_DAYS
+from planner import meal_types_for, parse_start_date, plan_day, resolve_seed
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX1 = 0xBF58476D1CE4E5B9
+_MIX2 = 0x94D049BB133111EB
+
+_default_index = None
+
+
+def _get_default_index():
+    global _default_index
+    if _default_index is None:
+        from recipe_catalog import create_indexes, load_recipes_database
+        _default_index, _ = create_indexes(load_recipes_database())
+    return _default_index
+
+
+def _exclusion_window(no_repeat_days, size):
+    """每次抽取时需要去掉的最近选择数"""
+    return max(0, min(no_repeat_days - 1, size - 1))
+
+
+def _draw_numpy(seeds, group_ids, group_sizes, days, no_repeat_days):
+    """为全部用户抽取菜品下标
+
+    Args:
+        seeds: 每个用户的种子
+        group_ids: 每个用户所属的分组
+        group_sizes: 每个分组各餐次的候选数，如 [[30, 20, 25, 10], [30, 20, 25], ...]
+        days: 天数
+        no_repeat_days: 同一餐次不重复的窗口（天）
+
+    Returns:
+        形状为 (用户数, 天数, 最多餐次数) 的数组，没有候选或没有该餐次时为-1
+    """
+    users = len(seeds)
+    meals = max((len(row) for row in group_sizes), default=0)
+    padded = np.zeros((len(group_sizes), meals), dtype=np.int64)
+    for g, row in enumerate(group_sizes):
+        padded[g, :len(row)] = row
+    group_ids = np.asarray(group_ids, dtype=np.int64)
+    # 以下数组都按 (用户, 餐次) 展平成一维
+    size = padded[group_ids].ravel()
+    counts = np.array([len(row) for row in group_sizes], dtype=np.uint64)[group_ids]
+    step = np.repeat(counts, meals)
+    base = (np.asarray(seeds, dtype=np.uint64)[:, None] * np.uint64(_GOLDEN)
+            + np.arange(1, meals + 1, dtype=np.uint64)).ravel()
+    result = np.full((users, days, meals), -1, dtype=np.int64)
+
+    window = np.clip(np.minimum(no_repeat_days - 1, size - 1), 0, None)
+    max_window = int(window.max()) if size.size else 0
+    # 每行是一个环形缓冲位置；未填满的位置为最大值，不会被计入
+    recent = np.full((max_window, size.size), np.iinfo(np.int64).max, dtype=np.int64)
+    writers = np.nonzero(window > 0)[0]
+    writer_window = window[writers]
+    has_candidates = size > 0
+    for day in range(days):
+        # (seed, 天, 餐次) 经 splitmix64 混合得到 [0, 1) 均匀随机数
+        z = base + np.uint64(day) * step
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(_MIX1)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(_MIX2)
+        z = z ^ (z >> np.uint64(31))
+        uniform = (z >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+        # 在剩下的 size-excluded 道菜中的名次
+        rank = (uniform * (size - np.minimum(day, window))).astype(np.int64)
+        indices = rank
+        filled = min(day, max_window)
+        # 换算成候选下标：x = rank + 不超过x的已排除下标数 的最小不动点，
+        # 从x=rank开始迭代单调收敛，至多 filled+1 轮
+        while filled:
+            skipped = rank.copy()
+            for j in range(filled):
+                skipped += recent[j] <= indices
+            if np.array_equal(skipped, indices):
+                break
+            indices = skipped
+        if max_window:
+            recent[day % writer_window, writers] = indices[writers]
+        result[:, day, :] = np.where(has_candidates, indices, -1).reshape(users, meals)
+    return result
+
+
+def _uniform_python(seed, slot):
+    z = (seed * _GOLDEN + slot + 1) & _MASK64
+    z = ((z ^ (z >> 30)) * _MIX1) & _MASK64
+    z = ((z ^ (z >> 27)) * _MIX2) & _MASK64
+    z ^= z >> 31
+    return (z >> 11) * (1.0 / (1 << 53))
+
+
+def _draw_python(seeds, group_ids, group_sizes, days, no_repeat_days):
+    """_draw_numpy 的纯Python实现，返回嵌套列表"""
+    meals = max((len(row) for row in group_sizes), default=0)
+    result = []
+    for seed, group_id in zip(seeds, group_ids):
+        row = group_sizes[group_id]
+        user = [[-1] * meals for _ in range(days)]
+        for m, size in enumerate(row):
+            if not size:
+                continue
+            window = _exclusion_window(no_repeat_days, size)
+            recent = []
+            for day in range(days):
+                index = int(_uniform_python(seed, day * len(row) + m) * float(size - len(recent)))
+                for excluded in sorted(recent):
+                    if index >= excluded:
+                        index += 1
+                if window:
+                    if len(recent) == window:
+                        recent.pop(0)
+                    recent.append(index)
+                user[day][m] = index
+        result.append(user)
+    return result
+
+
+class _PlanGroup:
+    """约束签名相同的一组请求共用的餐次和候选列表"""
+
+    def __init__(self, meal_types, candidates):
+        self.meal_types = meal_types
+        self.candidates = candidates
+
+
+class BatchPlans:
+    """批量规划结果
+
+    菜品以下标数组的形式保存，按需转换为与
+    generate_weekly_meal_plan 相同格式的规划字典。
+    """
+
+    def __init__(self, start_dates, days, seeds, groups, group_ids, choices):
+        self.start_dates = start_dates
+        self.days = days
+        self.seeds = seeds
+        self.groups = groups
+        self._group_ids = group_ids
+        self._choices = choices
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def seed(self, i):
+        """第i个请求使用的种子，请求中没有指定时为随机生成的种子"""
+        return self.seeds[i]
+
+    def choices(self, i):
+        """第i个请求的菜品下标，形状为 (天数, 餐次数)，以及餐次和候选列表"""
+        group = self.groups[self._group_ids[i]]
+        return self._choices[i], group.meal_types, group.candidates
+
+    def __getitem__(self, i):
+        choices, meal_types, candidates = self.choices(i)
+        start_date = self.start_dates[i]
+        return dict(
+            plan_day(start_date, day, {
+                meal_type: None if choices[day][m] < 0 else candidates[m][int(choices[day][m])]
+                for m, meal_type in enumerate(meal_types)
+            })
+            for day in range(self.days)
+        )
+
+
+def generate_meal_plans_batch(plan_requests, index=None, days=7, no_repeat_days=NO_REPEAT_DAYS):
+    """批量生成餐饮规划
+
+    Args:
+        plan_requests: 请求列表，每项为字典，可包含 start_date、health_goal、
+            taste_preferences、exclude_terms、seed（缺省时随机生成）
+        index: CandidateIndex，默认使用 recipes_database 构建的索引
+        days: 规划天数
+        no_repeat_days: 同一餐次不重复的窗口（天），0或1表示不限制
+
+    Returns:
+        BatchPlans，按请求顺序访问每个用户的规划
+    """
+    if index is None:
+        index = _get_default_index()
+    groups = []
+    # 原始输入 -> 分组编号，批次中大量重复的约束组合不必每次都规范化
+    group_by_input = {}
+    group_by_key = {}
+    group_ids = []
+    seeds = []
+    start_dates = []
+    # 同一批次里的开始日期大多相同，解析结果按原始值复用
+    parsed_dates = {}
+    for request in plan_requests:
+        get = request.get
+        prefs = get("taste_preferences") or ()
+        raw = (get("health_goal"), tuple(prefs), get("exclude_terms"))
+        try:
+            group_id = group_by_input.get(raw)
+        except TypeError:
+            # 忌口以列表给出时不能直接做键
+            raw = (raw[0], raw[1], tuple(raw[2]))
+            group_id = group_by_input.get(raw)
+        if group_id is None:
+            health_goal = raw[0] or "无目标"
+            prefs = frozenset(prefs)
+            exclude_terms = tuple(sorted(set(parse_exclusion_terms(raw[2]))))
+            key = (health_goal, prefs, exclude_terms)
+            group_id = group_by_key.get(key)
+            if group_id is None:
+                meal_types = [m for m in meal_types_for(health_goal) if m in index.pools]
+                candidates = [index.candidates(m, health_goal, prefs, exclude_terms) for m in meal_types]
+                group_id = group_by_key[key] = len(groups)
+                groups.append(_PlanGroup(meal_types, candidates))
+            group_by_input[raw] = group_id
+        group_ids.append(group_id)
+        seeds.append(resolve_seed(get("seed")))
+        start_date = get("start_date")
+        parsed = parsed_dates.get(start_date)
+        if parsed is None:
+            parsed = parsed_dates[start_date] = parse_start_date(start_date)
+        start_dates.append(parsed)
+
+    draw = _draw_numpy if np is not None else _draw_python
+    group_sizes = [[len(c) for c in group.candidates] for group in groups]
+    choices = draw(seeds, group_ids, group_sizes, days, no_repeat_days)
+    return BatchPlans(start_dates, days, seeds, groups, group_ids, choices)
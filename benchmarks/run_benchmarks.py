@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+热点路径基准测试。
+
+用合成菜谱数据库（1k/10k/100k道菜）测量餐饮规划、搜索、格式化和节庆菜单的
+延迟分位数、吞吐量和峰值内存，结果保存为JSON，可以与之前保存的基线比较。
+
+用法:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --fail-threshold 0.2
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from batch_planner import generate_meal_plans_batch  # noqa: E402
+from benchmarks.synthetic_catalog import generate_catalog, generate_recipe_markdown  # noqa: E402
+
+BATCH_USERS = 1000
+TASTE_PREFERENCES = ["不要香菜", "不吃乳制品", "不吃葱", "不吃辣", "素食"]
+HEALTH_GOALS = ["无目标", "增肌", "减脂"]
+
+
+def install_catalog(app, database):
+    """把合成数据库装入app，并重建派生索引"""
+    from recipe_catalog import CatalogSnapshot, create_indexes
+    app.CATALOG.swap(CatalogSnapshot(database, *create_indexes(database)))
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn, args_list, min_time=0.5, max_iterations=20000):
+    """重复调用fn，统计延迟分位数、吞吐量和峰值内存
+
+    Args:
+        fn: 被测函数
+        args_list: 参数元组列表，循环使用
+        min_time: 至少运行的秒数
+        max_iterations: 最多调用次数
+
+    Returns:
+        结果字典（延迟单位为微秒）
+    """
+    # 预热：每组参数先调用一次，测量的是缓存命中后的稳态延迟
+    for args in args_list[:50]:
+        fn(*args)
+
+    latencies = []
+    gc.collect()
+    start = time.perf_counter()
+    i = 0
+    while i < max_iterations and (i < 5 or time.perf_counter() - start < min_time):
+        args = args_list[i % len(args_list)]
+        t0 = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - t0)
+        i += 1
+    elapsed = time.perf_counter() - start
+
+    # 峰值内存单独测量，避免tracemalloc影响延迟
+    tracemalloc.start()
+    for args in args_list[:min(len(args_list), 20)]:
+        fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "n": len(latencies),
+        "mean_us": sum(latencies) / len(latencies) * 1e6,
+        "p50_us": _percentile(latencies, 0.50) * 1e6,
+        "p90_us": _percentile(latencies, 0.90) * 1e6,
+        "p99_us": _percentile(latencies, 0.99) * 1e6,
+        "ops_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "peak_kib": peak / 1024
+    }
+
+
+def _measure_once(fn):
+    """只运行一次的操作（如构建索引）"""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "n": 1,
+        "mean_us": elapsed * 1e6,
+        "p50_us": elapsed * 1e6,
+        "p90_us": elapsed * 1e6,
+        "p99_us": elapsed * 1e6,
+        "ops_per_sec": 1 / elapsed if elapsed else 0.0,
+        "peak_kib": peak / 1024
+    }
+
+
+def _search_queries(database, rng, count=200):
+    names = [r["name"] for recipes in database.values() for r in recipes]
+    queries = []
+    for _ in range(count):
+        base = rng.choice(names).split(" + ")[0]
+        start = rng.randrange(len(base))
+        queries.append((base[start:start + rng.randint(1, 4)],))
+    return queries
+
+
+def _exact_queries(database, rng, count=200):
+    names = [r["name"] for recipes in database.values() for r in recipes]
+    return [(rng.choice(names).split(" + ")[0],) for _ in range(count)]
+
+
+def run_size(app, size, min_time, seed=0):
+    """在指定规模的合成数据库上运行全部基准"""
+    rng = random.Random(seed)
+    database = generate_catalog(size, seed=seed)
+    results = {"build_indexes": _measure_once(lambda: install_catalog(app, database))}
+
+    plan_args = [
+        (
+            "2024-01-15",
+            rng.choice(HEALTH_GOALS),
+            rng.sample(TASTE_PREFERENCES, rng.randint(0, 2))
+        )
+        for _ in range(50)
+    ]
+    results["generate_weekly_meal_plan"] = measure(app.generate_weekly_meal_plan, plan_args, min_time)
+
+    # 批量规划：同样的约束组合、每个用户一个种子，与逐个调用 generate_weekly_meal_plan 比较
+    requests = [
+        {"start_date": start, "health_goal": goal, "taste_preferences": prefs, "seed": i}
+        for i, (start, goal, prefs) in ((i, plan_args[i % len(plan_args)]) for i in range(BATCH_USERS))
+    ]
+    results["generate_weekly_meal_plan_seeded"] = measure(
+        lambda start, goal, prefs, seed: app.generate_weekly_meal_plan(start, goal, prefs, seed=seed),
+        [(r["start_date"], r["health_goal"], r["taste_preferences"], r["seed"]) for r in requests],
+        min_time
+    )
+    index = app.CATALOG.current.candidate_index
+    results[f"generate_meal_plans_batch_{BATCH_USERS}"] = measure(
+        generate_meal_plans_batch, [(requests, index)], min_time
+    )
+
+    plans = [(app.generate_weekly_meal_plan(*args),) for args in plan_args]
+    results["format_meal_plan"] = measure(app.format_meal_plan, plans, min_time)
+
+    results["search_recipe"] = measure(app.search_recipe, _search_queries(database, rng), min_time)
+    results["exact_search_recipe"] = measure(app.exact_search_recipe, _exact_queries(database, rng), min_time)
+
+    documents = [(generate_recipe_markdown(f"菜品{i}", steps=40, seed=i), f"菜品{i}") for i in range(20)]
+    results["format_recipe_content"] = measure(app.format_recipe_content, documents, min_time)
+    return results
+
+
+def run_festival(app, min_time):
+    """节庆菜单与数据库规模无关，只运行一次"""
+    people = [(n,) for n in (2, 4, 8, 12, 20)]
+    lantern = [(n, region) for n in (2, 4, 8, 12, 20) for region in ("直接推荐", "推荐南方美食", "推荐北方美食")]
+    # 宴席和食堂规模，菜品池用完后按权重重复
+    banquet = [(festival, n) for festival in ("spring", "lantern") for n in (100, 300, 1000)]
+    return {
+        "generate_spring_festival_menu": measure(app.generate_spring_festival_menu, people, min_time),
+        "generate_lantern_festival_menu": measure(app.generate_lantern_festival_menu, lantern, min_time),
+        "generate_festival_menu_banquet": measure(app.generate_festival_menu, banquet, min_time)
+    }
+
+
+def batch_speedup(benches):
+    """批量规划相对逐个生成的吞吐量倍数"""
+    single = benches.get("generate_weekly_meal_plan_seeded")
+    batch = benches.get(f"generate_meal_plans_batch_{BATCH_USERS}")
+    if not single or not batch or not batch["mean_us"]:
+        return None
+    return single["mean_us"] * BATCH_USERS / batch["mean_us"]
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results, baseline, threshold):
+    """与基线比较p50延迟，返回超过阈值的回退项"""
+    regressions = []
+    print(f"\n{'规模':>8} {'基准':<32} {'基线p50(us)':>12} {'当前p50(us)':>12} {'变化':>8}")
+    for size, benches in results["results"].items():
+        base_benches = baseline.get("results", {}).get(size, {})
+        for name, stats in benches.items():
+            base = base_benches.get(name)
+            if not base or not base["p50_us"]:
+                continue
+            change = stats["p50_us"] / base["p50_us"] - 1
+            flag = " ⚠️" if change > threshold else ""
+            print(f"{size:>8} {name:<32} {base['p50_us']:>12.1f} {stats['p50_us']:>12.1f} {change:>+7.0%}{flag}")
+            if change > threshold:
+                regressions.append((size, name, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="七日餐饮规划助手基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="合成数据库规模")
+    parser.add_argument("--min-time", type=float, default=0.5, help="每个基准至少运行的秒数")
+    parser.add_argument("--seed", type=int, default=0, help="合成数据和查询的随机种子")
+    parser.add_argument("--output", help="结果JSON的保存路径")
+    parser.add_argument("--baseline", help="用于比较的基线JSON")
+    parser.add_argument("--fail-threshold", type=float, default=None, help="p50回退超过该比例时返回非零退出码，如0.2")
+    args = parser.parse_args(argv)
+
+    # 只测核心逻辑，不需要构建gradio界面
+    import meal_service as app
+    # 基准测试不访问网络
+    sample_markdown = generate_recipe_markdown("示例菜品")
+    app.get_recipe_content = lambda url: sample_markdown
+
+    random.seed(args.seed)
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": _git_commit()
+        },
+        "results": {}
+    }
+    for size in args.sizes:
+        print(f"▶ 规模 {size} ...")
+        results["results"][str(size)] = run_size(app, size, args.min_time, args.seed)
+    results["results"]["festival"] = run_festival(app, args.min_time)
+
+    print(f"\n{'规模':>8} {'基准':<32} {'p50(us)':>10} {'p90(us)':>10} {'p99(us)':>10} {'ops/s':>10} {'峰值KiB':>10}")
+    for size, benches in results["results"].items():
+        for name, stats in benches.items():
+            print(f"{size:>8} {name:<32} {stats['p50_us']:>10.1f} {stats['p90_us']:>10.1f} "
+                  f"{stats['p99_us']:>10.1f} {stats['ops_per_sec']:>10.0f} {stats['peak_kib']:>10.1f}")
+    for size, benches in results["results"].items():
+        speedup = batch_speedup(benches)
+        if speedup is not None:
+            print(f"⚡ 规模 {size}：批量规划 {BATCH_USERS} 个用户的吞吐量是逐个生成的 {speedup:.0f} 倍")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n已保存到 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.fail_threshold if args.fail_threshold is not None else 0.2)
+        if regressions and args.fail_threshold is not None:
+            print(f"\n❌ {len(regressions)} 项基准回退超过 {args.fail_threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
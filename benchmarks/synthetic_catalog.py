@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+合成菜谱数据库生成器。
+
+按 process_recipes.py 生成的格式（餐次 -> [{"name", "url"}]）构造任意规模的菜谱数据库，
+菜名由地方风味、烹饪方法、主料、配料组合而成，关键词分布（荤素、辣、乳制品、葱、香菜、油炸等）
+接近 HowToCook 的真实数据，用于基准测试。
+"""
+import random
+import urllib.parse
+
+GITHUB_BASE = "https://github.com/Anduin2017/HowToCook/blob/master/dishes"
+
+STYLES = ["", "家常", "川味", "湘式", "粤式", "东北", "江南", "农家", "老北京", "台式", "秘制", "私房"]
+METHODS = [
+    ("红烧", 6), ("清蒸", 4), ("爆炒", 4), ("凉拌", 4), ("糖醋", 3), ("宫保", 2), ("鱼香", 2),
+    ("干煸", 2), ("蒜蓉", 4), ("麻辣", 3), ("香煎", 3), ("酱爆", 2), ("水煮", 3), ("油炸", 2),
+    ("小炒", 5), ("葱油", 2), ("剁椒", 2), ("黄焖", 2), ("蚝油", 3), ("椒盐", 2), ("白灼", 2),
+    ("香辣", 2), ("清炒", 5), ("芝士焗", 1), ("奶油", 1), ("香菜拌", 1)
+]
+MAINS = [
+    ("鸡丁", 4), ("鸡翅", 3), ("鸭", 2), ("鱼片", 3), ("排骨", 4), ("牛肉", 4), ("猪肉", 4),
+    ("虾仁", 3), ("羊肉", 2), ("五花肉", 3), ("鸡蛋", 4), ("豆腐", 5), ("茄子", 4), ("土豆", 4),
+    ("西兰花", 3), ("花菜", 3), ("豆角", 3), ("娃娃菜", 3), ("菠菜", 2), ("金针菇", 2), ("木耳", 2),
+    ("莲藕", 2), ("冬瓜", 2), ("南瓜", 2), ("杏鲍菇", 2), ("腐竹", 2), ("蟹", 1), ("兔肉", 1)
+]
+SIDES = ["", "", "", "青椒", "洋葱", "胡萝卜", "香菇", "芹菜", "蒜苗", "葱", "粉丝", "番茄", "黄瓜", "年糕"]
+BREAKFAST_ITEMS = [
+    "煎蛋", "蒸蛋", "吐司", "三明治", "手抓饼", "煎饼", "包子", "烧卖", "馄饨", "燕麦粥", "小米粥",
+    "鸡蛋饼", "葱油饼", "玉米", "红薯", "华夫饼", "松饼", "芝士蛋卷", "牛奶麦片"
+]
+DESSERTS = ["蛋糕", "布丁", "双皮奶", "冰淇淋", "奶冻", "糖水", "甜汤", "绿豆沙", "芋圆", "酥饼", "蛋挞"]
+FRUITS = ["苹果", "香蕉", "橙子", "葡萄", "草莓", "蓝莓", "猕猴桃", "柚子", "梨", "桃子"]
+
+# 各餐次在数据库中的占比
+MEAL_SHARE = {"早餐": 0.15, "午餐": 0.35, "晚餐": 0.35, "加餐": 0.15}
+
+
+def _weighted(rng, items):
+    names = [name for name, _ in items]
+    weights = [weight for _, weight in items]
+    return rng.choices(names, weights=weights)[0]
+
+
+def _unique_names(rng, count, make_name):
+    names = []
+    seen = set()
+    attempts = 0
+    while len(names) < count:
+        name = make_name()
+        attempts += 1
+        if name in seen:
+            # 组合空间用尽时加上做法编号
+            if attempts > count * 20:
+                name = f"{name}（做法{attempts}）"
+            else:
+                continue
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _dish_name(rng):
+    side = rng.choice(SIDES)
+    main = _weighted(rng, MAINS)
+    return f"{rng.choice(STYLES)}{_weighted(rng, METHODS)}{side}{main}"
+
+
+def _url(category_dir, name):
+    return f"{GITHUB_BASE}/{category_dir}/{urllib.parse.quote(name)}/{urllib.parse.quote(name)}.md"
+
+
+def generate_catalog(size, seed=0):
+    """生成指定规模的合成菜谱数据库
+
+    Args:
+        size: 菜品总数
+        seed: 随机种子，相同的种子生成相同的数据库
+
+    Returns:
+        与 RECIPES_DATABASE 格式相同的字典
+    """
+    rng = random.Random(seed)
+    counts = {meal_type: max(1, int(size * share)) for meal_type, share in MEAL_SHARE.items()}
+
+    breakfast = _unique_names(rng, counts["早餐"], lambda: f"{rng.choice(STYLES)}{rng.choice(BREAKFAST_ITEMS)}")
+    lunch = _unique_names(rng, counts["午餐"], lambda: _dish_name(rng))
+    dinner = _unique_names(rng, counts["晚餐"], lambda: _dish_name(rng))
+    snacks = _unique_names(rng, max(1, counts["加餐"] - len(FRUITS)), lambda: f"{rng.choice(STYLES)}{rng.choice(DESSERTS)}")
+
+    return {
+        "早餐": [{"name": f"{name} + 牛奶/豆浆/粥", "url": _url("breakfast", name)} for name in breakfast],
+        "午餐": [
+            {"name": f"{name} + 青菜 + 米饭" if i % 2 == 0 else f"{name} + 米饭", "url": _url("meat_dish", name)}
+            for i, name in enumerate(lunch)
+        ],
+        "晚餐": [{"name": f"{name} + 米饭", "url": _url("vegetable_dish", name)} for name in dinner],
+        "加餐": [{"name": name, "url": _url("dessert", name)} for name in snacks] + [{"name": fruit, "url": ""} for fruit in FRUITS]
+    }
+
+
+def generate_recipe_markdown(name, steps=40, seed=0):
+    """生成一篇HowToCook风格的菜谱Markdown，用于格式化基准测试"""
+    rng = random.Random(seed)
+    lines = [f"# {name}的做法", "", f"{name}是一道**经典**的家常菜，*简单易学*。", "", "## 必备原料和工具", ""]
+    for ingredient in rng.sample([m for m, _ in MAINS] + SIDES[3:], 8):
+        lines.append(f"- {ingredient}")
+    lines += ["", "## 计算", ""]
+    for ingredient in rng.sample([m for m, _ in MAINS], 5):
+        lines.append(f"- {ingredient} {rng.randint(50, 500)} g")
+    lines += ["", "## 操作", ""]
+    for i in range(steps):
+        lines.append(f"- 第{i + 1}步：将`食材`放入锅中，参考[火候说明](../../tips/火候.md)，**中火**翻炒{rng.randint(1, 10)}分钟")
+    lines += ["", "## 附加内容", "", "如果您遵循本指南的制作流程而发现有问题或可以改进的流程，请提出 Issue 或 Pull request 。"]
+    return "\n".join(lines)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+菜谱库热加载。
+
+后台线程定期检查菜谱库文件（路径、修改时间、大小），文件变化并稳定后，
+在后台加载新的菜谱库、构建全部索引，并用最近的查询预热候选缓存，
+最后一次赋值整体替换当前快照。进行中的请求继续使用它开始时取得的快照，
+替换过程不需要重启服务，也不会丢弃排队中的请求。
+被替换的快照在最后一个读取者结束后关闭（SQLite菜谱库的连接），反复热加载不会泄漏连接。
+"""
+import contextlib
+import os
+import threading
+
+from recipe_catalog import catalog_source_path, load_catalog_snapshot
+
+# 检查间隔（秒），0表示不启用热加载
+DEFAULT_RELOAD_INTERVAL = float(os.environ.get("RECIPES_RELOAD_INTERVAL", 5))
+
+# 预热新索引时重放的最近查询数
+WARM_QUERIES = 512
+
+
+def _source_signature(path):
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+class CatalogReloader:
+    """持有当前菜谱库快照，并在文件变化时原子替换
+
+    Args:
+        snapshot: 初始的 CatalogSnapshot
+        interval: 检查间隔（秒）
+        source_path: 返回要监视的文件路径的函数，默认与 load_recipes_database 的查找顺序相同
+    """
+
+    def __init__(self, snapshot, interval=DEFAULT_RELOAD_INTERVAL, source_path=catalog_source_path):
+        self._snapshot = snapshot
+        self.interval = interval
+        self._source_path = source_path
+        self._loaded = _source_signature(snapshot.source)
+        self._pending = None
+        # 加载失败的文件版本，文件再次变化前不重试
+        self._failed = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.reload_count = 0
+
+    @property
+    def current(self):
+        """当前快照，请求开始时取一次并在整个请求中使用
+
+        只使用快照中已经加载到内存的数据时可以直接读取；需要查询菜谱库的请求使用 reading，
+        否则快照被替换后菜谱库可能已经关闭。
+        """
+        return self._snapshot
+
+    @contextlib.contextmanager
+    def reading(self):
+        """取得当前快照并登记为读取者，退出前快照不会被关闭
+
+        Yields:
+            CatalogSnapshot
+        """
+        while True:
+            snapshot = self._snapshot
+            if snapshot.acquire():
+                break
+            # 取得快照后、登记前它恰好被替换了，改用新的快照
+        try:
+            yield snapshot
+        finally:
+            snapshot.release()
+
+    def _replace(self, snapshot):
+        old = self._snapshot
+        self._snapshot = snapshot
+        if old is not snapshot:
+            old.retire()
+
+    def swap(self, snapshot):
+        """直接替换当前快照（如测试或基准测试装入指定的菜谱库）"""
+        self._replace(snapshot)
+        self._loaded = _source_signature(snapshot.source)
+        self._pending = None
+
+    def reload(self, path=None):
+        """立即加载菜谱库并替换，加载失败时保留旧快照
+
+        Returns:
+            是否替换成功
+        """
+        with self._reload_lock:
+            path = path or self._source_path()
+            signature = _source_signature(path)
+            try:
+                snapshot = load_catalog_snapshot(path)
+            except Exception as e:
+                print(f"⚠️ 重新加载菜谱库失败，继续使用旧数据: {e}")
+                self._failed = signature
+                return False
+            self._warm(snapshot)
+            self._replace(snapshot)
+            self._loaded = signature
+            self._pending = None
+            self.reload_count += 1
+            print(f"🔄 菜谱库已更新: {os.path.basename(path) if path else '默认菜谱数据库'}")
+            return True
+
+    def _warm(self, snapshot):
+        """用旧索引最近的查询预热新索引，替换后不会出现冷缓存"""
+        recent = self._snapshot.candidate_index.recent_queries(WARM_QUERIES)
+        for query in recent:
+            try:
+                snapshot.candidate_index.candidates(*query)
+            except KeyError:
+                # 新菜谱库可能不再有该餐次或偏好
+                continue
+
+    def check(self):
+        """检查一次文件是否变化，变化且连续两次检查都相同（写入已完成）时重新加载
+
+        Returns:
+            是否替换了快照
+        """
+        signature = _source_signature(self._source_path())
+        if signature == self._loaded or signature == self._failed:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            # 文件可能还在写入，等下一次检查确认稳定
+            self._pending = signature
+            return False
+        return self.reload(signature[0] if signature else None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ 检查菜谱库更新时出错: {e}")
+
+    def start(self):
+        """启动后台检查线程（interval为0时不启动）"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台检查线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+数据驱动的节庆菜单。
+
+节日、地区版本、菜品池、份数规则、必备分类和emoji规则都定义在 festivals.json 中，
+新增节日或调整菜品只需修改数据文件，不需要改代码。数据文件在加载时编译一次：
+菜品分类关键词编译成一个自动机，每道菜的分类位图和emoji预先算好，
+菜品池的累积权重也预先算好，生成菜单时不再重复扫描关键词。
+
+每个菜品池先不放回地抽取；人数超过菜品池大小时（宴席、食堂），
+按权重有放回地补足，并在菜单中合并成“菜名 ×份数”。
+抽取、检查必备分类和格式化都只遍历一遍所选菜品，耗时与人数成线性关系。
+"""
+import bisect
+import collections
+import itertools
+import json
+import os
+import random
+import threading
+
+from keyword_matcher import compile_keywords
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FESTIVALS_PATH = os.path.join(BASE_DIR, "festivals.json")
+
+# 单次生成的最多用餐人数
+MAX_PARTY_SIZE = int(os.environ.get("FESTIVAL_MAX_PARTY_SIZE", 1000))
+
+DEFAULT_EMOJI = "🍽️"
+
+
+def festivals_path():
+    """节庆数据文件路径：环境变量 FESTIVALS_PATH 或默认的 festivals.json"""
+    return os.environ.get("FESTIVALS_PATH", "") or DEFAULT_FESTIVALS_PATH
+
+
+class _DishPool:
+    """预编译的菜品池
+
+    Args:
+        entries: 菜品列表，每项为菜名或 {"dish": 菜名, "weight": 权重}
+    """
+
+    def __init__(self, entries):
+        dishes = []
+        weights = []
+        for entry in entries:
+            if isinstance(entry, str):
+                dishes.append(entry)
+                weights.append(1)
+            else:
+                dishes.append(entry["dish"])
+                weights.append(entry.get("weight", 1))
+        if not dishes:
+            raise ValueError("菜品池不能为空")
+        if any(weight <= 0 for weight in weights):
+            raise ValueError("菜品权重必须为正数")
+        self.dishes = tuple(dishes)
+        self.uniform = len(set(weights)) == 1
+        self.cum_weights = tuple(itertools.accumulate(weights))
+
+    def choose(self, rng):
+        """按权重抽一道菜"""
+        if self.uniform:
+            return rng.choice(self.dishes)
+        x = rng.random() * self.cum_weights[-1]
+        return self.dishes[bisect.bisect(self.cum_weights, x, 0, len(self.dishes) - 1)]
+
+    def choices(self, rng, k):
+        """按权重有放回地抽k道菜"""
+        if self.uniform:
+            return [rng.choice(self.dishes) for _ in range(k)]
+        return rng.choices(self.dishes, cum_weights=self.cum_weights, k=k)
+
+    def sample(self, rng, k):
+        """先不放回地抽取，菜品池用完后按权重有放回地补足"""
+        if k <= len(self.dishes):
+            return rng.sample(self.dishes, k)
+        return rng.sample(self.dishes, len(self.dishes)) + self.choices(rng, k - len(self.dishes))
+
+
+class _Course:
+    """菜单中的一组菜：菜品池和份数规则"""
+
+    def __init__(self, spec, pools):
+        pool = spec["pool"]
+        self.pool = pools[pool] if isinstance(pool, str) else _DishPool(pool)
+        count = spec.get("count", "fill")
+        self.take_all = spec.get("take") == "all"
+        self.fill = count == "fill"
+        if not self.fill and not self.take_all:
+            self.per_person = float(count.get("per_person", 0))
+            self.offset = float(count.get("offset", 0))
+            self.minimum = int(count.get("min", 0))
+        self.pick = spec.get("pick", "sample")
+        self.last = spec.get("position") == "last"
+
+    def count(self, people, selected, total):
+        if self.take_all:
+            return len(self.pool.dishes)
+        if self.fill:
+            return max(0, total - selected)
+        # 与 int() 截断一致：先算浮点数再向下取整
+        return max(self.minimum, int(people * self.per_person + self.offset))
+
+    def draw(self, rng, k):
+        if self.take_all:
+            return list(self.pool.dishes)
+        if self.pick == "choice":
+            return self.pool.choices(rng, k)
+        return self.pool.sample(rng, k)
+
+
+class FestivalVariant:
+    """节日的一个版本（如元宵节的南方、北方版本）"""
+
+    def __init__(self, key, spec, festival_name, pools, classifier, emoji_rules):
+        self.key = key
+        self.festival_name = festival_name
+        self.label = spec.get("label", "")
+        self.aliases = tuple(spec.get("aliases", ()))
+        self.region = spec.get("region", "")
+        self.title = spec["title"]
+        self.features = tuple(spec.get("features", ()))
+        self.dishes_per_person = float(spec.get("dishes_per_person", 1))
+        self.extra_dishes = int(spec.get("extra_dishes", 1))
+        self.courses = [_Course(course, pools) for course in spec.get("courses", ())]
+        self.ensure = []
+        for rule in spec.get("ensure", ()):
+            bits = 0
+            for tag in rule["tags"]:
+                bits |= classifier.tag_bit(tag)
+            pool = rule["pool"]
+            self.ensure.append((bits, pools[pool] if isinstance(pool, str) else _DishPool(pool)))
+
+        # 预先计算本版本所有菜品的分类位图和emoji
+        rules = [(classifier.tag_bit(tag), emoji) for tag, emoji in emoji_rules.get(spec.get("emoji", ""), ())]
+        all_pools = [course.pool for course in self.courses] + [pool for _, pool in self.ensure]
+        self.masks = {}
+        self.emojis = {}
+        self.tags = {}
+        for pool in all_pools:
+            for dish in pool.dishes:
+                if dish in self.masks:
+                    continue
+                mask = classifier.mask(dish)
+                self.masks[dish] = mask
+                self.emojis[dish] = next((emoji for bit, emoji in rules if mask & bit), DEFAULT_EMOJI)
+                self.tags[dish] = classifier.tags_of(mask)
+
+    def select(self, people, rng):
+        """按份数规则选菜
+
+        Args:
+            people: 用餐人数
+            rng: 随机数生成器
+
+        Returns:
+            菜品列表（可能有重复）
+        """
+        total = int(people * self.dishes_per_person) + self.extra_dishes
+        selected = []
+        tail = []
+        for course in self.courses:
+            k = course.count(people, len(selected) + len(tail), total)
+            if k <= 0 and not course.take_all:
+                continue
+            (tail if course.last else selected).extend(course.draw(rng, k))
+        selected.extend(tail)
+
+        masks = self.masks
+        present = 0
+        for dish in selected:
+            present |= masks[dish]
+        for bits, pool in self.ensure:
+            if not present & bits:
+                dish = pool.choose(rng)
+                selected.append(dish)
+                present |= masks[dish]
+        return selected
+
+    def menu_data(self, people, dishes):
+        """菜单的结构化数据，重复的菜品合并并记录份数
+
+        Returns:
+            {"festival", "variant", "region", "title", "people", "servings", "dishes", "features"}，
+            dishes 中每项为 {"name", "count", "emoji", "tags"}
+        """
+        counts = collections.Counter(dishes)
+        return {
+            "festival": self.festival_name,
+            "variant": self.key,
+            "region": self.region,
+            "title": self.title.format(people=people),
+            "people": people,
+            "servings": len(dishes),
+            "dishes": [
+                {"name": dish, "count": count, "emoji": self.emojis[dish], "tags": list(self.tags[dish])}
+                for dish, count in counts.items()
+            ],
+            "features": list(self.features)
+        }
+
+    @staticmethod
+    def render(data):
+        """把 menu_data 的结果格式化为菜单文本，重复的菜品显示为“菜名 ×份数”"""
+        dishes = data["dishes"]
+        parts = [data["title"], "\n", "═" * 60, "\n\n", "📊 菜单信息：\n"]
+        if data["region"]:
+            parts.append(f"   🌍 地区：{data['region']}\n")
+        parts.append(f"   👥 人数：{data['people']}人\n")
+        if len(dishes) < data["servings"]:
+            parts.append(f"   🔁 份数：共{data['servings']}份，{len(dishes)}种菜品\n")
+        parts.append("🍽️ 菜品清单：\n")
+        parts.append("─" * 40 + "\n")
+        for i, dish in enumerate(dishes, 1):
+            suffix = f" ×{dish['count']}" if dish["count"] > 1 else ""
+            parts.append(f"{i:2d}. {dish['emoji']} {dish['name']}{suffix}\n")
+        parts.append("\n" + "═" * 60 + "\n")
+        parts.append(f"💡 {data['festival']}菜单特点：\n")
+        for feature in data["features"]:
+            parts.append(f"   • {feature}\n")
+        return "".join(parts)
+
+    def format(self, people, dishes):
+        """格式化菜单，重复的菜品合并为“菜名 ×份数”"""
+        return self.render(self.menu_data(people, dishes))
+
+
+class Festival:
+    """一个节日及其各个版本"""
+
+    def __init__(self, key, spec, pools, classifier, emoji_rules):
+        self.key = key
+        self.name = spec["name"]
+        self.variants = {}
+        self._lookup = {}
+        for variant_key, variant_spec in spec["variants"].items():
+            variant = FestivalVariant(variant_key, variant_spec, self.name, pools, classifier, emoji_rules)
+            self.variants[variant_key] = variant
+            for name in (variant_key, variant.label) + variant.aliases:
+                self._lookup.setdefault(name, variant)
+        self.default = self.variants.get("default") or next(iter(self.variants.values()))
+
+    @property
+    def region_choices(self):
+        """界面上可选的版本名称"""
+        return [variant.label for variant in self.variants.values() if variant.label]
+
+    def variant(self, region=""):
+        """按版本键、显示名称或别名查找版本，只有一个版本时忽略region
+
+        Raises:
+            KeyError: 没有匹配的版本
+        """
+        if len(self.variants) == 1:
+            return self.default
+        region = (region or "").strip()
+        if not region:
+            return self.default
+        return self._lookup[region]
+
+
+class FestivalRegistry:
+    """从节庆数据编译出的全部节日
+
+    Args:
+        data: festivals.json 的内容
+        source: 数据文件路径
+    """
+
+    def __init__(self, data, source=None):
+        self.source = source
+        self.classifier = compile_keywords(data.get("dish_groups", {}))
+        pools = {name: _DishPool(entries) for name, entries in data.get("pools", {}).items()}
+        emoji_rules = data.get("emoji_rules", {})
+        self.festivals = {
+            key: Festival(key, spec, pools, self.classifier, emoji_rules)
+            for key, spec in data["festivals"].items()
+        }
+        self._by_name = {festival.name: festival for festival in self.festivals.values()}
+
+    def festival(self, name):
+        """按键或中文名称查找节日
+
+        Raises:
+            KeyError: 没有该节日
+        """
+        return self.festivals.get(name) or self._by_name[name]
+
+    def menu_data(self, festival, people_count, region, rng):
+        """生成节庆菜单的结构化数据
+
+        Args:
+            festival: 节日的键或中文名称
+            people_count: 用餐人数
+            region: 地区版本，节日只有一个版本时忽略
+            rng: 随机数生成器
+
+        Returns:
+            FestivalVariant.menu_data 的结果
+
+        Raises:
+            ValueError: 输入无效，异常信息为给用户的提示
+        """
+        try:
+            people = int(people_count)
+        except (TypeError, ValueError):
+            raise ValueError("请输入有效的人数") from None
+        if people <= 0:
+            raise ValueError("请输入有效的人数")
+        if people > MAX_PARTY_SIZE:
+            raise ValueError(f"用餐人数最多为{MAX_PARTY_SIZE}人")
+        try:
+            entry = self.festival(festival)
+        except KeyError:
+            raise ValueError(f"未知的节日：{festival}") from None
+        try:
+            variant = entry.variant(region)
+        except KeyError:
+            raise ValueError(f"未知的地区：{region}，可选：{'、'.join(entry.region_choices)}") from None
+        return variant.menu_data(people, variant.select(people, rng))
+
+    def menu(self, festival, people_count, region, rng):
+        """生成节庆菜单文本
+
+        Args:
+            festival: 节日的键或中文名称
+            people_count: 用餐人数
+            region: 地区版本，节日只有一个版本时忽略
+            rng: 随机数生成器
+
+        Returns:
+            格式化的菜单，输入无效时返回提示信息
+        """
+        try:
+            data = self.menu_data(festival, people_count, region, rng)
+        except ValueError as e:
+            return str(e)
+        return FestivalVariant.render(data)
+
+
+def load_festivals(path=None):
+    """加载并编译节庆数据文件
+
+    Args:
+        path: 数据文件路径，默认为 festivals_path()
+
+    Returns:
+        FestivalRegistry
+    """
+    path = path or festivals_path()
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return FestivalRegistry(data, source=path)
+
+
+_registry = None
+_registry_signature = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """当前的节庆数据，数据文件修改后下一次调用时重新编译"""
+    global _registry, _registry_signature
+    path = festivals_path()
+    try:
+        stat = os.stat(path)
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        signature = (path, None, None)
+    registry = _registry
+    if registry is not None and signature == _registry_signature:
+        return registry
+    with _registry_lock:
+        if _registry is None or signature != _registry_signature:
+            try:
+                _registry = load_festivals(path)
+            except (OSError, ValueError, KeyError) as e:
+                if _registry is None:
+                    raise
+                print(f"⚠️ 加载节庆数据失败，继续使用旧数据: {e}")
+            _registry_signature = signature
+        return _registry
+
+
+def generate_festival_menu(festival, people_count, region="", seed=None):
+    """生成节庆菜单
+
+    Args:
+        festival: 节日的键（如 spring、lantern）或中文名称（如 春节）
+        people_count: 用餐人数
+        region: 地区版本（如 推荐南方美食），节日只有一个版本时忽略
+        seed: 随机种子，每次调用使用自己的 random.Random(seed)，为None时由系统熵源初始化
+
+    Returns:
+        格式化的菜单
+    """
+    return get_registry().menu(festival, people_count, region, random.Random(seed))
+
+
+def festival_menu_data(festival, people_count, region="", seed=None):
+    """生成节庆菜单的结构化数据，参数与 generate_festival_menu 相同
+
+    Returns:
+        {"festival", "variant", "region", "title", "people", "servings", "dishes", "features"}
+
+    Raises:
+        ValueError: 输入无效
+    """
+    return get_registry().menu_data(festival, people_count, region, random.Random(seed))
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+不加载Gradio的MCP和命令行入口。
+
+    python headless.py mcp                         以stdio方式运行MCP服务（换行分隔的JSON-RPC）
+    python headless.py tools                       列出可用的工具
+    python headless.py call meal_planner days=30 health_goal=增肌
+                                                   直接调用一个工具并打印结果
+
+工具与Gradio界面暴露的MCP工具同名、参数相同，都由 meal_service 实现。
+以 _json 结尾的工具返回结构化数据，放在结果的 structuredContent 中，文本内容是同样的JSON。
+本模块只导入标准库，meal_service 在第一次调用工具时才导入，
+自动扩缩的工作进程冷启动只需几十毫秒。
+"""
+import argparse
+import json
+import sys
+
+PROTOCOL_VERSION = "2024-11-05"
+SERVER_INFO = {"name": "meal-planner", "version": "1.0.0"}
+
+_PEOPLE = {"type": "integer", "minimum": 1, "description": "用餐人数"}
+_RECIPE_NAME = {"type": "string", "description": "菜品名称"}
+_SEED = {"type": "integer", "description": "随机种子，指定后同样的参数得到同样的结果，留空则每次不同"}
+_PLAN_PROPERTIES = {
+    "start_date": {"type": "string", "description": "开始日期，YYYY-MM-DD 或 YYYY年MM月DD日，留空为今天"},
+    "health_goal": {"type": "string", "enum": ["无目标", "增肌", "减脂"], "description": "饮食健康目标"},
+    "taste_preferences": {
+        "type": "array",
+        "items": {"type": "string", "enum": ["不要香菜", "不吃乳制品", "不吃葱", "不吃辣", "素食"]},
+        "description": "口味偏好"
+    },
+    "exclude_terms": {"type": "string", "description": "其他忌口，用逗号或空格分隔"},
+    "days": {"type": "integer", "minimum": 1, "description": "规划天数"},
+    "seed": _SEED
+}
+_SHOPPING_PROPERTIES = dict(_PLAN_PROPERTIES, people={"type": "integer", "minimum": 1, "description": "每餐的人数"})
+_FESTIVAL_PROPERTIES = {
+    "festival": {"type": "string", "description": "节日的键或中文名称，如 spring、春节"},
+    "people_count": _PEOPLE,
+    "region": {"type": "string", "description": "地区版本，节日只有一个版本时忽略"},
+    "seed": _SEED
+}
+
+# 工具名 -> (meal_service 中的处理函数, 说明, 参数属性, 必填参数)
+TOOLS = {
+    "meal_planner": (
+        "meal_planner_stream",
+        "生成餐饮规划（默认七天，可指定30/90/365天），支持健康目标、口味偏好和自定义忌口",
+        dict(_PLAN_PROPERTIES, include_recipes={"type": "boolean", "description": "是否附带每道菜的详细做法"}),
+        []
+    ),
+    "meal_planner_json": (
+        "meal_planner_json",
+        "生成餐饮规划，返回结构化数据：每天的日期和各餐次的菜名、做法链接",
+        _PLAN_PROPERTIES,
+        []
+    ),
+    "shopping_list": (
+        "shopping_list",
+        "生成规划的购物清单：并发获取全部菜品的做法，按人数合并原料用量",
+        _SHOPPING_PROPERTIES,
+        []
+    ),
+    "shopping_list_json": (
+        "shopping_list_json",
+        "生成规划的购物清单，返回结构化数据：合并后的原料用量、搭配份数和未能获取做法的菜品",
+        _SHOPPING_PROPERTIES,
+        []
+    ),
+    "search_recipe": (
+        "search_recipe_async", "模糊搜索菜品做法", {"recipe_name": _RECIPE_NAME}, ["recipe_name"]
+    ),
+    "exact_search_recipe": (
+        "exact_search_recipe_async", "按完整菜品名称查询详细做法", {"recipe_name": _RECIPE_NAME}, ["recipe_name"]
+    ),
+    "search_recipe_json": (
+        "search_recipe_json", "模糊搜索菜品，返回全部命中的名称、分类、做法链接和匹配度", {"recipe_name": _RECIPE_NAME},
+        ["recipe_name"]
+    ),
+    "exact_search_recipe_json": (
+        "exact_search_recipe_json",
+        "按完整菜品名称查询，返回结构化数据，可附带做法的Markdown原文",
+        {"recipe_name": _RECIPE_NAME, "include_content": {"type": "boolean", "description": "是否附带做法原文"}},
+        ["recipe_name"]
+    ),
+    "generate_spring_festival_menu": (
+        "generate_spring_festival_menu", "生成春节菜单", {"people_count": _PEOPLE, "seed": _SEED}, ["people_count"]
+    ),
+    "generate_lantern_festival_menu": (
+        "generate_lantern_festival_menu",
+        "生成元宵节菜单",
+        {
+            "people_count": _PEOPLE,
+            "region": {"type": "string", "description": "推荐南方美食、推荐北方美食或直接推荐"},
+            "seed": _SEED
+        },
+        ["people_count", "region"]
+    ),
+    "generate_festival_menu": (
+        "generate_festival_menu",
+        "生成节庆数据中任意节日的菜单",
+        _FESTIVAL_PROPERTIES,
+        ["festival", "people_count"]
+    ),
+    "festival_menu_json": (
+        "festival_menu_json",
+        "生成任意节日的菜单，返回结构化数据：菜品、份数和分类标签",
+        _FESTIVAL_PROPERTIES,
+        ["festival", "people_count"]
+    )
+}
+
+
+def tool_list():
+    """MCP tools/list 的结果"""
+    return [
+        {
+            "name": name,
+            "description": description,
+            "inputSchema": {"type": "object", "properties": properties, "required": required}
+        }
+        for name, (_, description, properties, required) in TOOLS.items()
+    ]
+
+
+class ToolRunner:
+    """在同一个事件循环中执行工具，异步获取器的连接池可以在多次调用间复用"""
+
+    def __init__(self):
+        self._loop = None
+
+    def call(self, name, arguments):
+        """调用工具
+
+        Returns:
+            工具输出的文本，_json 工具返回字典
+
+        Raises:
+            KeyError: 没有该工具
+            TypeError: 参数不匹配
+        """
+        import asyncio
+        import inspect
+        import meal_service
+
+        handler_name, _, properties, _ = TOOLS[name]
+        unknown = set(arguments) - set(properties)
+        if unknown:
+            raise TypeError(f"未知参数: {', '.join(sorted(unknown))}")
+        handler = getattr(meal_service, handler_name)
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        if inspect.isasyncgenfunction(handler):
+            # 流式工具只返回最终的完整文本
+            return self._loop.run_until_complete(self._last(handler(**arguments)))
+        result = handler(**arguments)
+        if inspect.isawaitable(result):
+            result = self._loop.run_until_complete(result)
+        return result
+
+    @staticmethod
+    async def _last(stream):
+        text = ""
+        async for text in stream:
+            pass
+        return text
+
+    def close(self):
+        if self._loop is not None:
+            import meal_service
+            self._loop.run_until_complete(meal_service.ASYNC_FETCHER.aclose())
+            self._loop.close()
+            self._loop = None
+
+
+def _response(request_id, result=None, error=None):
+    message = {"jsonrpc": "2.0", "id": request_id}
+    if error is not None:
+        message["error"] = error
+    else:
+        message["result"] = result
+    return message
+
+
+def handle_message(runner, message):
+    """处理一条JSON-RPC消息
+
+    Returns:
+        响应消息，通知消息返回None
+    """
+    if not isinstance(message, dict):
+        # 批量请求、数字、字符串等都不是合法的单条请求
+        return _response(None, error={"code": -32600, "message": "无效的请求：消息必须是JSON对象"})
+    request_id = message.get("id")
+    method = message.get("method")
+    params = message.get("params") or {}
+    if request_id is None:
+        # 通知（如 notifications/initialized）不需要响应
+        return None
+    if method == "initialize":
+        return _response(request_id, {
+            "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+            "capabilities": {"tools": {}},
+            "serverInfo": SERVER_INFO
+        })
+    if method == "ping":
+        return _response(request_id, {})
+    if method == "tools/list":
+        return _response(request_id, {"tools": tool_list()})
+    if method == "tools/call":
+        name = params.get("name")
+        if name not in TOOLS:
+            return _response(request_id, error={"code": -32602, "message": f"未知的工具: {name}"})
+        try:
+            output = runner.call(name, params.get("arguments") or {})
+        except Exception as e:
+            return _response(request_id, {"content": [{"type": "text", "text": f"❌ {e}"}], "isError": True})
+        if isinstance(output, str):
+            return _response(request_id, {"content": [{"type": "text", "text": output}], "isError": False})
+        # 结构化结果：新的客户端读取 structuredContent，旧客户端解析文本中的JSON
+        return _response(request_id, {
+            "content": [{"type": "text", "text": json.dumps(output, ensure_ascii=False)}],
+            "structuredContent": output,
+            "isError": "error" in output
+        })
+    return _response(request_id, error={"code": -32601, "message": f"不支持的方法: {method}"})
+
+
+def serve_stdio(stdin=None, stdout=None):
+    """以stdio方式运行MCP服务，直到输入结束
+
+    stdout 只用于协议消息，其他输出（如加载菜谱库的提示）都转到 stderr。
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    sys.stdout = sys.stderr
+
+    import meal_service
+    from metrics import start_metrics_server
+    meal_service.CATALOG.start()
+    start_metrics_server()
+
+    runner = ToolRunner()
+    try:
+        for line in stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                response = _response(None, error={"code": -32700, "message": "无法解析的JSON"})
+            else:
+                try:
+                    response = handle_message(runner, message)
+                except Exception as e:
+                    # 单条消息出错只返回错误，不让服务退出
+                    request_id = message.get("id") if isinstance(message, dict) else None
+                    response = _response(request_id, error={"code": -32603, "message": f"内部错误: {e}"})
+            if response is not None:
+                stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+                stdout.flush()
+    finally:
+        runner.close()
+        meal_service.CATALOG.stop()
+
+
+def parse_arguments(pairs):
+    """把 key=value 形式的参数解析成字典，值能按JSON解析时使用解析结果"""
+    arguments = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"参数格式应为 key=value: {pair}")
+        try:
+            arguments[key] = json.loads(value)
+        except ValueError:
+            arguments[key] = value
+    return arguments
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="七日餐饮规划助手（无界面）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("mcp", help="以stdio方式运行MCP服务")
+    subparsers.add_parser("tools", help="列出可用的工具")
+    call = subparsers.add_parser("call", help="调用一个工具")
+    call.add_argument("tool", choices=sorted(TOOLS), help="工具名")
+    call.add_argument("arguments", nargs="*", help="key=value 形式的参数，值可以是JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "mcp":
+        serve_stdio()
+        return 0
+    if args.command == "tools":
+        for tool in tool_list():
+            print(f"{tool['name']}: {tool['description']}")
+        return 0
+
+    try:
+        arguments = parse_arguments(args.arguments)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    runner = ToolRunner()
+    try:
+        output = runner.call(args.tool, arguments)
+        print(output if isinstance(output, str) else json.dumps(output, ensure_ascii=False, indent=2))
+    except TypeError as e:
+        print(f"❌ {e}")
+        return 2
+    finally:
+        runner.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+从 HowToCook 菜谱 markdown 中提取原料。
+
+解析「必备原料和工具」和「计算」两节的列表项，去掉用量、备注和 markdown 标记，
+得到规范化、去重并排序的原料名列表。只依赖标准库，由 process_recipes.py 在生成菜谱库时调用，
+请求时不需要访问网络。
+
+parse_quantities 还从「计算」一节中解析用量（数值、范围、单位，是否按份数计算），供购物清单汇总。
+"""
+import re
+
+# 需要解析的小节标题（二级标题中包含这些词即可）
+INGREDIENT_SECTIONS = ("必备原料和工具", "计算")
+
+_HEADING = re.compile(r"^(#{1,6})\s*(.*?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.、)])\s+(.*)$")
+_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MARKUP = re.compile(r"[*_`~>]")
+# 用量、括号备注、说明性的分隔符之后的内容都不是原料名
+_CUT = re.compile(r"[\s\d０-９(（\[【:：=＝,，;；。~～≈约/／]")
+# 顿号和“或者”总是分隔原料；单字的 或/及/和/与 也会出现在原料名中（如“和牛”），
+# 只有前后是空白或分隔符时才当作连接词
+_SEPARATOR = r"[\s、,，;；]"
+_SPLIT = re.compile(rf"、|或者|(?:(?<={_SEPARATOR})|^)[或及和与](?=(?:{_SEPARATOR}|$))")
+# 原料名前常见的修饰词
+_PREFIXES = ("适量", "少许", "少量", "若干", "新鲜的", "新鲜")
+# 明显不是原料的条目
+_NOT_INGREDIENT = re.compile(r"^(可选|选用|备注|注意|提示|总量|每份|份数)")
+
+# 用量：数值（小数、分数）、可选的范围上限和单位；括号中的备注（如“约180g”）先去掉
+_NOTE = re.compile(r"[(（][^)）]*[)）]")
+_NUMBER = r"\d+(?:\.\d+)?(?:/\d+)?"
+_QUANTITY = re.compile(
+    rf"({_NUMBER})(?:\s*[-~～到至]\s*({_NUMBER}))?\s*"
+    r"(kg|mg|ml|g|l|千克|公斤|毫克|毫升|克|升|斤|两|[个只根片瓣勺匙块颗粒枚张把碗杯条头棵朵滴盒袋包])?",
+    re.I
+)
+# 乘以份数、按人计算的用量
+_PER_SERVING = re.compile(r"[*×xX]\s*(?:份数|人数|份)|[/／]\s*(?:人|份)|每人|每份")
+# 「计算」一节中说明后面的列表是每份用量还是总量的段落
+_PER_SERVING_LINE = re.compile(r"^\s*(?:每份|每人)")
+_TOTAL_LINE = re.compile(r"^\s*总量")
+# 统一成克和毫升
+UNIT_ALIASES = {
+    "g": ("g", 1), "克": ("g", 1), "kg": ("g", 1000), "千克": ("g", 1000), "公斤": ("g", 1000),
+    "mg": ("g", 0.001), "毫克": ("g", 0.001), "斤": ("g", 500), "两": ("g", 50),
+    "ml": ("ml", 1), "毫升": ("ml", 1), "l": ("ml", 1000), "升": ("ml", 1000)
+}
+
+
+def _clean_item(text):
+    text = _LINK.sub(r"\1", text)
+    text = _MARKUP.sub("", text).strip()
+    names = []
+    for part in _SPLIT.split(text):
+        part = part.strip()
+        for prefix in _PREFIXES:
+            if part.startswith(prefix):
+                part = part[len(prefix):]
+        part = _CUT.split(part, 1)[0].strip()
+        if part and not _NOT_INGREDIENT.match(part):
+            names.append(part.lower())
+    return names
+
+
+def parse_ingredients(markdown):
+    """提取菜谱中的原料
+
+    Args:
+        markdown: 菜谱 markdown 原文
+
+    Returns:
+        规范化后的原料名列表（去重、排序），没有相关小节时为空列表
+    """
+    ingredients = set()
+    in_section = False
+    for line in markdown.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            in_section = len(heading.group(1)) >= 2 and any(s in heading.group(2) for s in INGREDIENT_SECTIONS)
+            continue
+        if not in_section:
+            continue
+        item = _LIST_ITEM.match(line)
+        if item:
+            ingredients.update(_clean_item(item.group(1)))
+    return sorted(ingredients)
+
+
+def _number(text):
+    if "/" in text:
+        numerator, denominator = text.split("/")
+        return float(numerator) / float(denominator) if float(denominator) else None
+    return float(text)
+
+
+def _parse_quantity(text):
+    """解析一行中原料名之后的用量
+
+    Returns:
+        (数量, 范围上限或None, 单位)，没有数值（如“适量”）时为None
+    """
+    match = _QUANTITY.search(_NOTE.sub("", text))
+    if match is None:
+        return None
+    amount = _number(match.group(1))
+    upper = _number(match.group(2)) if match.group(2) else None
+    if amount is None:
+        return None
+    unit = (match.group(3) or "").lower()
+    unit, factor = UNIT_ALIASES.get(unit, (unit, 1))
+    return amount * factor, None if upper is None else upper * factor, unit
+
+
+def parse_quantities(markdown):
+    """提取菜谱中的原料及用量
+
+    「必备原料和工具」中的原料只有名称；「计算」一节中的列表项解析出数值、范围和单位，
+    克、千克、斤等统一成 g，毫升、升统一成 ml。带“* 份数”“/人”或位于“每份：”段落下的用量按份计算，
+    否则是整道菜的总量。
+
+    Args:
+        markdown: 菜谱 markdown 原文
+
+    Returns:
+        [{"name", "amount", "amount_max", "unit", "per_serving"}, ...]，按首次出现的顺序，
+        没有用量的原料 amount 为None
+    """
+    quantities = {}
+    section = None
+    per_serving = False
+    for line in markdown.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            title = heading.group(2)
+            section = None
+            if len(heading.group(1)) >= 2:
+                section = next((s for s in INGREDIENT_SECTIONS if s in title), None)
+            per_serving = False
+            continue
+        if section is None:
+            continue
+        item = _LIST_ITEM.match(line)
+        if item is None:
+            if section == "计算":
+                if _PER_SERVING_LINE.match(line):
+                    per_serving = True
+                elif _TOTAL_LINE.match(line):
+                    per_serving = False
+            continue
+        text = item.group(1)
+        names = _clean_item(text)
+        if not names:
+            continue
+        quantity = _parse_quantity(text) if section == "计算" else None
+        # “盐、糖各5g”时每种原料都是这个用量，否则只属于第一种
+        shared = "各" in text
+        for i, name in enumerate(names):
+            if shared and name.endswith("各"):
+                name = name[:-1]
+            entry = {"name": name, "amount": None, "amount_max": None, "unit": "", "per_serving": False}
+            if quantity is not None and (i == 0 or shared):
+                entry["amount"], entry["amount_max"], entry["unit"] = quantity
+                entry["per_serving"] = per_serving or bool(_PER_SERVING.search(text))
+            previous = quantities.get(name)
+            if previous is None or (previous["amount"] is None and entry["amount"] is not None):
+                quantities[name] = entry
+    return list(quantities.values())
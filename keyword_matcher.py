@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+多模式关键词匹配（Aho-Corasick自动机）。
+
+把若干组关键词编译成一个自动机，对菜品名称只扫描一遍就能得到所有命中的分组标签，
+耗时只与名称长度有关，与关键词数量无关。编译好的自动机按关键词分组缓存。
+"""
+import functools
+import re
+
+
+class KeywordAutomaton:
+    """按分组标签编译的Aho-Corasick自动机
+
+    Args:
+        groups: {标签: 关键词列表}，标签的顺序决定其在位图中的位置
+    """
+
+    def __init__(self, groups):
+        self.tags = list(groups)
+        self._tag_bits = {tag: 1 << i for i, tag in enumerate(self.tags)}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [0]
+
+        # 构建字典树，终止节点记录所属分组的位
+        for tag, keywords in groups.items():
+            bit = self._tag_bits[tag]
+            for keyword in keywords:
+                if not keyword:
+                    continue
+                node = 0
+                for ch in keyword:
+                    nxt = self._goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append(0)
+                        self._goto[node][ch] = nxt
+                    node = nxt
+                self._out[node] |= bit
+
+        # 按层次计算失配指针，并把失配节点的输出合并进来
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                if node:
+                    self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] |= self._out[self._fail[child]]
+                queue.append(child)
+
+    def mask(self, text):
+        """扫描一遍文本，返回命中分组组成的位图"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        node = 0
+        result = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            result |= out[node]
+        return result
+
+    def tag_bit(self, tag):
+        """获取某个标签对应的位"""
+        return self._tag_bits[tag]
+
+    def classify(self, text):
+        """返回文本命中的全部分组标签"""
+        mask = self.mask(text)
+        return frozenset(tag for tag, bit in self._tag_bits.items() if mask & bit)
+
+    def tags_of(self, mask):
+        """把位图还原成标签列表，按标签定义的顺序"""
+        return [tag for tag, bit in self._tag_bits.items() if mask & bit]
+
+    def first_tag(self, text, tags, default=None):
+        """按给定顺序返回第一个命中的标签，都未命中时返回default"""
+        mask = self.mask(text)
+        for tag in tags:
+            if mask & self._tag_bits[tag]:
+                return tag
+        return default
+
+    def contains_any(self, text):
+        """文本是否命中任意关键词"""
+        return self.mask(text) != 0
+
+
+@functools.lru_cache(maxsize=128)
+def _compile(frozen_groups):
+    return KeywordAutomaton({tag: list(keywords) for tag, keywords in frozen_groups})
+
+
+def compile_keywords(groups):
+    """编译关键词分组，相同的分组只会编译一次
+
+    Args:
+        groups: {标签: 关键词列表}
+
+    Returns:
+        KeywordAutomaton
+    """
+    return _compile(tuple((tag, tuple(keywords)) for tag, keywords in groups.items()))
+
+
+def parse_exclusion_terms(text):
+    """解析用户输入的自由文本忌口，如"香菇，花生 芹菜"
+
+    Args:
+        text: 用逗号、顿号、分号或空白分隔的忌口词
+
+    Returns:
+        去重后的忌口词元组（保持输入顺序）
+    """
+    if not text:
+        return ()
+    if not isinstance(text, str):
+        text = ",".join(text)
+    terms = [t for t in re.split(r"[,，、;；\s]+", text) if t]
+    return tuple(dict.fromkeys(terms))
+
+
+def exclusion_automaton(terms):
+    """为用户自定义忌口词构建（并缓存）自动机，命中时的标签为“忌口”"""
+    return compile_keywords({"忌口": sorted(set(terms))})
@@ -0,0 +1,738 @@
+# -*- coding: utf-8 -*-
+"""
+餐饮规划、菜谱搜索和节庆菜单的核心，不依赖Gradio。
+
+app.py 只负责界面；MCP和命令行工作进程（headless.py）直接导入本模块，
+导入时只加载标准库，HTTP客户端在第一次获取做法时才导入，asyncio 在异步路径中才导入，
+冷启动只需几十毫秒。
+
+每个工具都有返回结构化数据的 *_json 版本（规划、带分类/链接/匹配度的搜索结果、带标签的节庆菜品），
+供程序化调用方直接使用；文本版本只是在同样的数据上再做一次格式化。
+"""
+import datetime
+import os
+import sys
+import time
+
+from catalog_reloader import CatalogReloader
+from festival_menu import festival_menu_data, generate_festival_menu as _generate_festival_menu
+from ingredient_parser import parse_quantities
+from keyword_matcher import parse_exclusion_terms
+from metrics import (
+    CANDIDATE_POOL_SIZE, RECIPE_CACHE_REQUESTS, UPSTREAM_FETCH_DURATION, instrument
+)
+from plan_engine import MAX_INGREDIENT_REPEATS, NO_REPEAT_DAYS, NoRepeatPlanner
+from plan_memo import PlanMemo, plan_key
+from planner import (
+    NO_DISH, meal_types_for, parse_plan_days, parse_start_date, plan_day, plan_title, resolve_seed
+)
+from profiling import profiled
+from recipe_cache import RecipeCache
+from recipe_catalog import load_catalog_snapshot
+from recipe_fetcher import ASYNC_FETCHER, fetch, to_raw_url
+from recipe_formatter import format_recipe
+from recipe_index import check_taste_preferences
+from shopping_list import aggregate, format_shopping_list, plan_dishes
+from single_flight import SingleFlight
+
+# 加载菜谱数据库，并一次性构建候选索引和搜索索引（SQLite菜谱库直接使用库中的索引）；
+# 菜谱库文件更新后由 CATALOG 在后台重建索引并整体替换，每个请求开始时取一次快照
+CATALOG = CatalogReloader(load_catalog_snapshot())
+
+# 菜品做法缓存（内存 + 磁盘），RECIPE_CACHE_OFFLINE=1 时只使用缓存
+RECIPE_CACHE = RecipeCache()
+RECIPE_CACHE_OFFLINE = os.environ.get("RECIPE_CACHE_OFFLINE", "") == "1"
+
+# 进行中的做法获取，按raw链接合并并发请求
+RECIPE_FETCHES = SingleFlight()
+
+# 指定了种子的规划，重试的请求直接返回同样的结果
+PLAN_MEMO = PlanMemo()
+
+# 餐点图标
+MEAL_ICONS = {
+    "早餐": "🌅",
+    "午餐": "🌞",
+    "晚餐": "🌙",
+    "加餐": "🍎"
+}
+
+# 长规划按周输出，避免每天都推送一次完整文本
+STREAM_WEEKLY_AFTER_DAYS = 31
+
+def iter_weekly_meal_plan(start_date=None, health_goal="无目标", taste_preferences=None, exclude_terms=None, days=7,
+                          no_repeat_days=NO_REPEAT_DAYS, max_ingredient_repeats=MAX_INGREDIENT_REPEATS, seed=None):
+    """逐天生成餐饮规划
+
+    候选列表只取一次，之后每天由 NoRepeatPlanner 做不放回抽样：
+    no_repeat_days 天内同一道菜不重复，午餐和晚餐的主料重复次数有上限、类别轮换。
+    每次抽取的均摊开销是常数，总耗时与天数成正比。
+    每次调用使用自己的 random.Random(seed)，指定seed时同样的参数得到同样的规划。
+
+    Yields:
+        (日期标题, {餐次: 菜品})，每生成一天就返回一天
+
+    Raises:
+        ValueError: 日期、天数无效或口味偏好未知
+    """
+    start_date = parse_start_date(start_date)
+    days = parse_plan_days(days)
+    if taste_preferences is None:
+        taste_preferences = []
+    check_taste_preferences(taste_preferences)
+    exclude_terms = parse_exclusion_terms(exclude_terms)
+    # 候选列表在一次请求内不会变化，只需从索引中取一次
+    with CATALOG.reading() as catalog:
+        meal_candidates = {
+            meal_type: catalog.candidate_index.candidates(meal_type, health_goal, taste_preferences, exclude_terms)
+            for meal_type in meal_types_for(health_goal) if meal_type in catalog.database
+        }
+    for meal_type, candidates in meal_candidates.items():
+        CANDIDATE_POOL_SIZE.observe(len(candidates), meal_type=meal_type)
+    planner = NoRepeatPlanner(meal_candidates, no_repeat_days, max_ingredient_repeats, seed=seed)
+    for i in range(days):
+        yield plan_day(start_date, i, planner.plan_day())
+
+def generate_weekly_meal_plan(start_date=None, health_goal="无目标", taste_preferences=None, exclude_terms=None, days=7,
+                              no_repeat_days=NO_REPEAT_DAYS, max_ingredient_repeats=MAX_INGREDIENT_REPEATS, seed=None):
+    """生成餐饮规划（默认一周，可用days指定30/90/365天等），支持健康目标、口味偏好和自定义忌口筛选"""
+    return dict(iter_weekly_meal_plan(
+        start_date, health_goal, taste_preferences, exclude_terms, days, no_repeat_days, max_ingredient_repeats, seed
+    ))
+
+def iter_seeded_plan(start_date=None, health_goal="无目标", taste_preferences=None, exclude_terms=None, days=7,
+                     seed=None, memoize=True):
+    """用每个请求自己的 random.Random(seed) 逐天生成规划
+
+    同样的种子和参数得到同样的规划；memoize 时结果缓存在 PLAN_MEMO 中，
+    重复的请求直接返回缓存，不再抽样。请求之间不共享随机数状态。
+
+    Args:
+        seed: 整数种子，已由 resolve_seed 解析
+        memoize: 是否使用缓存，调用方没有指定种子时为False
+
+    Yields:
+        (日期标题, {餐次: 菜品})
+    """
+    start_date = parse_start_date(start_date)
+    days = parse_plan_days(days)
+    exclude_terms = parse_exclusion_terms(exclude_terms)
+    if not memoize:
+        yield from iter_weekly_meal_plan(start_date, health_goal, taste_preferences, exclude_terms, days, seed=seed)
+        return
+    catalog = CATALOG.current
+    key = plan_key(seed, start_date, health_goal, taste_preferences, exclude_terms, days)
+    cached = PLAN_MEMO.get(catalog, key)
+    if cached is not None:
+        yield from cached
+        return
+    plan = []
+    for item in iter_weekly_meal_plan(start_date, health_goal, taste_preferences, exclude_terms, days, seed=seed):
+        plan.append(item)
+        yield item
+    # 只缓存完整生成的规划，中途断开的请求不写入
+    PLAN_MEMO.put(catalog, key, tuple(plan))
+
+def plan_data(start_date=None, health_goal="无目标", taste_preferences=None, exclude_terms=None, days=7, seed=None):
+    """生成餐饮规划的结构化数据
+
+    Args:
+        seed: 随机种子，为None时生成一个新的种子
+
+    Returns:
+        {"title", "seed", "start_date", "health_goal", "taste_preferences", "exclude_terms", "days"}，
+        days 中每天为 {"date", "label", "meals": {餐次: {"name", "url"}}}，没有可用菜品的餐次为None
+    """
+    start = parse_start_date(start_date)
+    days = parse_plan_days(days)
+    memoize = seed is not None and seed != ""
+    seed = resolve_seed(seed)
+    plan = iter_seeded_plan(start, health_goal, taste_preferences, exclude_terms, days, seed, memoize)
+    return {
+        "title": plan_title(days),
+        "seed": seed,
+        "start_date": start.strftime("%Y-%m-%d"),
+        "health_goal": health_goal,
+        "taste_preferences": list(taste_preferences or []),
+        "exclude_terms": list(parse_exclusion_terms(exclude_terms)),
+        "days": [
+            {
+                "date": (start + datetime.timedelta(days=i)).strftime("%Y-%m-%d"),
+                "label": label,
+                # 缓存中的条目是共享的，复制后再交给调用方
+                "meals": {meal_type: None if info == NO_DISH else dict(info) for meal_type, info in meals.items()}
+            }
+            for i, (label, meals) in enumerate(plan)
+        ]
+    }
+
+def format_meal_plan_header(days=7):
+    """餐饮规划的标题部分"""
+    return f"🍽️ {plan_title(days)} 🍽️\n" + "═" * 60 + "\n\n"
+
+def format_meal_day(day, meals, details=None):
+    """格式化规划中的一天
+    
+    Args:
+        day: 日期标题
+        meals: {餐次: 菜品}
+        details: {餐次: 格式化的做法内容}，需要内联详细做法时提供
+        
+    Returns:
+        格式化的字符串
+    """
+    parts = [f"📅 {day}\n", "─" * 40 + "\n"]
+    for meal_type, meal_info in meals.items():
+        icon = MEAL_ICONS.get(meal_type, "🍽️")
+        if isinstance(meal_info, dict):
+            meal_url = meal_info.get("url", "")
+            parts.append(f"{icon} {meal_type}: {meal_info['name']}\n")
+            if meal_url:
+                parts.append(f"   🔗 做法: {meal_url}\n")
+        else:
+            # 兼容旧格式
+            parts.append(f"{icon} {meal_type}: {meal_info}\n")
+        if details and details.get(meal_type):
+            parts.append("\n" + details[meal_type] + "\n\n")
+    parts.append("\n" + "═" * 60 + "\n\n")
+    return "".join(parts)
+
+def format_meal_plan(meal_plan):
+    """格式化餐饮规划为可读的字符串
+    
+    Args:
+        meal_plan: 餐饮规划字典
+        
+    Returns:
+        格式化的字符串
+    """
+    header = format_meal_plan_header(len(meal_plan))
+    return header + "".join(format_meal_day(day, meals) for day, meals in meal_plan.items())
+
+def _request_plan(start_date, health_goal, taste_preferences, exclude_terms, days, seed):
+    """处理函数共用：指定了种子时使用缓存，否则用新种子生成"""
+    memoize = seed is not None and seed != ""
+    return iter_seeded_plan(
+        start_date, health_goal, taste_preferences, exclude_terms, days, resolve_seed(seed), memoize
+    )
+
+@instrument("meal_planner")
+@profiled("meal_planner")
+def meal_planner(start_date="", health_goal="无目标", taste_preferences=None, exclude_terms="", days=7, seed=None):
+    days = parse_plan_days(days)
+    meal_plan = _request_plan(start_date, health_goal, taste_preferences, exclude_terms, days, seed)
+    return format_meal_plan_header(days) + "".join(format_meal_day(day, meals) for day, meals in meal_plan)
+
+async def _day_recipe_details(meals):
+    """并发获取一天中各餐菜品的做法并格式化"""
+    linked = [(meal_type, info) for meal_type, info in meals.items() if isinstance(info, dict) and info.get("url")]
+    import asyncio
+    contents = await asyncio.gather(*(get_recipe_content_async(info["url"]) for _, info in linked))
+    return {
+        meal_type: format_recipe_content(content, info["name"])
+        for (meal_type, info), content in zip(linked, contents)
+    }
+
+@instrument("meal_planner")
+@profiled("meal_planner")
+async def meal_planner_stream(start_date="", health_goal="无目标", taste_preferences=None, exclude_terms="", include_recipes=False, days=7, seed=None):
+    """流式生成餐饮规划，每完成一天就输出一次（超过一个月的规划每完成一周输出一次）
+    
+    Gradio 的输出框会逐步填充，MCP 客户端会收到逐步增加的内容；
+    首次输出只包含标题，耗时与规划长度和是否内联做法无关。
+    
+    Args:
+        start_date: 开始日期
+        health_goal: 健康目标
+        taste_preferences: 口味偏好列表
+        exclude_terms: 其他忌口
+        include_recipes: 是否在每道菜后附上详细做法
+        days: 规划天数，如7、30、90、365
+        seed: 随机种子，指定后同样的参数得到同样的规划，留空则每次不同
+        
+    Yields:
+        截至当前的完整规划文本
+    """
+    days = parse_plan_days(days)
+    flush_every = 7 if days > STREAM_WEEKLY_AFTER_DAYS else 1
+    text = format_meal_plan_header(days)
+    yield text
+    plan = _request_plan(start_date, health_goal, taste_preferences, exclude_terms, days, seed)
+    for i, (day, meals) in enumerate(plan, 1):
+        details = await _day_recipe_details(meals) if include_recipes else None
+        text += format_meal_day(day, meals, details)
+        if i % flush_every == 0 or i == days:
+            yield text
+
+@instrument("meal_planner_json")
+@profiled("meal_planner_json")
+def meal_planner_json(start_date="", health_goal="无目标", taste_preferences=None, exclude_terms="", days=7, seed=None):
+    """生成餐饮规划，返回结构化数据而不是文本
+
+    Returns:
+        plan_data 的结果（包含使用的种子），输入无效时为 {"error": 提示信息}
+    """
+    try:
+        return plan_data(start_date, health_goal, taste_preferences, exclude_terms, days, seed)
+    except ValueError as e:
+        return {"error": f"无效的输入: {e}"}
+
+def _cached_recipe_content(raw_url):
+    """查询缓存，返回 (可以直接使用的内容或None, 缓存条目)"""
+    cached = RECIPE_CACHE.get(raw_url)
+    if cached is not None and (RECIPE_CACHE_OFFLINE or RECIPE_CACHE.is_fresh(cached)):
+        return cached["content"], cached
+    if RECIPE_CACHE_OFFLINE:
+        return f"❌ 离线模式下缓存中没有该菜品做法\nURL: {raw_url}", cached
+    return None, cached
+
+def _record_cache_lookup(content, cached):
+    """记录一次做法缓存查询：新鲜命中、过期需重新验证或未命中"""
+    if cached is None:
+        result = "miss"
+    elif content is None:
+        result = "stale"
+    else:
+        result = "hit"
+    RECIPE_CACHE_REQUESTS.inc(result=result)
+
+def _is_timeout(error):
+    """是否为获取超时；asyncio 只在异步路径中导入，未导入时不会有它的超时异常"""
+    asyncio = sys.modules.get("asyncio")
+    return isinstance(error, TimeoutError) or (asyncio is not None and isinstance(error, asyncio.TimeoutError))
+
+def _fetch_outcome(response=None, error=None):
+    """上游获取结果的标签值"""
+    if error is not None:
+        return "timeout" if _is_timeout(error) else "error"
+    return str(response.status_code)
+
+def _handle_recipe_response(raw_url, cached, response):
+    """根据上游响应更新缓存并返回内容"""
+    if response.status_code == 304 and cached is not None:
+        RECIPE_CACHE.touch(raw_url)
+        return cached["content"]
+    if response.status_code == 200:
+        RECIPE_CACHE.put(
+            raw_url, response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+        return response.text
+    if cached is not None:
+        return cached["content"]
+    return f"❌ 无法获取菜品做法，HTTP状态码: {response.status_code}\nURL: {raw_url}"
+
+def _handle_recipe_error(raw_url, cached, error):
+    """上游不可用时使用缓存中的旧内容"""
+    if cached is not None:
+        return cached["content"]
+    if _is_timeout(error):
+        return f"❌ 获取菜品做法超时\nURL: {raw_url}"
+    return f"❌ 获取菜品做法时出错: {str(error)}\nURL: {raw_url}"
+
+def _refresh_recipe_content(raw_url):
+    """向上游获取（或重新验证）做法内容，由 RECIPE_FETCHES 保证同一URL同时只有一次"""
+    # 刚结束的另一次获取可能已经写入了缓存
+    content, cached = _cached_recipe_content(raw_url)
+    if content is not None:
+        return content
+    start = time.perf_counter()
+    try:
+        response = fetch(raw_url, headers=RECIPE_CACHE.validators(cached))
+    except Exception as e:
+        UPSTREAM_FETCH_DURATION.observe(time.perf_counter() - start, mode="sync", outcome=_fetch_outcome(error=e))
+        return _handle_recipe_error(raw_url, cached, e)
+    UPSTREAM_FETCH_DURATION.observe(time.perf_counter() - start, mode="sync", outcome=_fetch_outcome(response))
+    return _handle_recipe_response(raw_url, cached, response)
+
+async def _refresh_recipe_content_async(raw_url, deadline=None):
+    """_refresh_recipe_content 的异步版本"""
+    content, cached = _cached_recipe_content(raw_url)
+    if content is not None:
+        return content
+    start = time.perf_counter()
+    try:
+        response = await ASYNC_FETCHER.fetch(raw_url, headers=RECIPE_CACHE.validators(cached), deadline=deadline)
+    except Exception as e:
+        UPSTREAM_FETCH_DURATION.observe(time.perf_counter() - start, mode="async", outcome=_fetch_outcome(error=e))
+        return _handle_recipe_error(raw_url, cached, e)
+    UPSTREAM_FETCH_DURATION.observe(time.perf_counter() - start, mode="async", outcome=_fetch_outcome(response))
+    return _handle_recipe_response(raw_url, cached, response)
+
+@instrument("get_recipe_content")
+def get_recipe_content(url):
+    """从GitHub获取菜品做法内容
+    
+    优先使用本地缓存，缓存过期后向GitHub做条件请求重新验证，
+    GitHub不可用时返回缓存中的旧内容。
+    
+    Args:
+        url: GitHub链接
+        
+    Returns:
+        菜品做法内容或错误信息
+    """
+    raw_url = to_raw_url(url)
+    content, cached = _cached_recipe_content(raw_url)
+    _record_cache_lookup(content, cached)
+    if content is not None:
+        return content
+    # 同一道菜的并发请求只向上游获取一次
+    return RECIPE_FETCHES.do(raw_url, _refresh_recipe_content, raw_url)
+
+@instrument("get_recipe_content")
+async def get_recipe_content_async(url, deadline=None):
+    """异步版本的 get_recipe_content，不占用工作线程
+    
+    Args:
+        url: GitHub链接
+        deadline: 截止时间（秒），默认使用获取器的超时设置
+        
+    Returns:
+        菜品做法内容或错误信息
+    """
+    raw_url = to_raw_url(url)
+    content, cached = _cached_recipe_content(raw_url)
+    _record_cache_lookup(content, cached)
+    if content is not None:
+        return content
+    try:
+        # 等待他人进行中的获取时同样遵守自己的截止时间
+        return await RECIPE_FETCHES.do_async(
+            raw_url, _refresh_recipe_content_async, raw_url, deadline, timeout=deadline
+        )
+    except Exception as e:
+        return _handle_recipe_error(raw_url, cached, e)
+
+def format_recipe_content(content, recipe_name):
+    """格式化菜品做法内容
+    
+    Args:
+        content: 原始Markdown内容
+        recipe_name: 菜品名称
+        
+    Returns:
+        格式化的做法内容
+    """
+    if not content or content.startswith("❌"):
+        return content
+    return format_recipe(content, recipe_name)
+
+def _search_recipe_result(recipe_name):
+    """模糊搜索菜品
+    
+    Returns:
+        (结果文本, None)，或唯一命中且有做法链接时返回 (None, 菜品信息)，由调用方获取做法
+    """
+    if not recipe_name or recipe_name.strip() == "":
+        return "请输入要搜索的菜品名称", None
+    
+    recipe_name = recipe_name.strip()
+    
+    # 通过倒排索引查找候选并验证，按匹配质量排序
+    with CATALOG.reading() as catalog:
+        found_recipes = catalog.search_index.search(recipe_name)
+    
+    if not found_recipes:
+        return f"❌ 抱歉，没有找到包含 '{recipe_name}' 的菜品\n\n💡 提示：\n- 请检查菜品名称是否正确\n- 可以尝试搜索菜品的关键词\n- 例如：搜索 '鸡蛋' 可以找到 '太阳蛋'、'蒸水蛋' 等", None
+    
+    # 如果只找到一个菜品，直接显示详细做法
+    if len(found_recipes) == 1:
+        recipe = found_recipes[0]
+        if recipe['url']:
+            return None, recipe
+        else:
+            return f"🍽️ {recipe['name']}\n📂 分类: {recipe['category']}\n\n❌ 该菜品暂无详细做法链接", None
+    
+    # 如果找到多个菜品，显示列表
+    result = f"🔍 找到 {len(found_recipes)} 个相关菜品：\n"
+    result += "═" * 50 + "\n\n"
+    result += "请选择其中一个菜品查看详细做法：\n\n"
+    
+    for i, recipe in enumerate(found_recipes, 1):
+        result += f"{i}. 🍽️ {recipe['name']}\n"
+        result += f"   📂 分类: {recipe['category']}\n"
+        if recipe['url']:
+            result += f"   🔗 做法链接: {recipe['url']}\n"
+        result += "\n"
+    
+    result += "💡 提示：输入完整的菜品名称可以查看详细做法"
+    
+    return result, None
+
+@instrument("search_recipe")
+@profiled("search_recipe")
+def search_recipe(recipe_name):
+    """搜索菜品做法
+    
+    Args:
+        recipe_name: 菜品名称
+        
+    Returns:
+        菜品做法信息或错误提示
+    """
+    result, recipe = _search_recipe_result(recipe_name)
+    if recipe is None:
+        return result
+    content = get_recipe_content(recipe['url'])
+    return format_recipe_content(content, recipe['name'])
+
+@instrument("search_recipe")
+@profiled("search_recipe")
+async def search_recipe_async(recipe_name):
+    """搜索菜品做法（异步获取做法，不占用工作线程）
+    
+    Args:
+        recipe_name: 菜品名称
+        
+    Returns:
+        菜品做法信息或错误提示
+    """
+    result, recipe = _search_recipe_result(recipe_name)
+    if recipe is None:
+        return result
+    content = await get_recipe_content_async(recipe['url'])
+    return format_recipe_content(content, recipe['name'])
+
+def _exact_search_recipe_result(recipe_name):
+    """精确搜索菜品
+    
+    Returns:
+        (结果文本, None)，或命中且有做法链接时返回 (None, 菜品信息)，由调用方获取做法
+    """
+    if not recipe_name or recipe_name.strip() == "":
+        return "请输入要搜索的菜品名称", None
+    
+    recipe_name = recipe_name.strip()
+    
+    # 通过哈希表精确查找，同名菜品出现在多个餐次时使用数据库中的第一个
+    with CATALOG.reading() as catalog:
+        matches = catalog.search_index.lookup(recipe_name)
+    if matches:
+        recipe = matches[0]
+        if recipe["url"]:
+            return None, recipe
+        return f"🍽️ {recipe['name']}\n📂 分类: {recipe['category']}\n\n❌ 该菜品暂无详细做法链接", None
+    
+    return f"❌ 抱歉，没有找到名为 '{recipe_name}' 的菜品\n\n💡 提示：\n- 请确保输入的是完整的菜品名称\n- 可以尝试搜索关键词来查看相关菜品", None
+
+@instrument("exact_search_recipe")
+@profiled("exact_search_recipe")
+def exact_search_recipe(recipe_name):
+    """精确搜索菜品做法
+    
+    Args:
+        recipe_name: 完整的菜品名称
+        
+    Returns:
+        菜品详细做法
+    """
+    result, recipe = _exact_search_recipe_result(recipe_name)
+    if recipe is None:
+        return result
+    content = get_recipe_content(recipe["url"])
+    return format_recipe_content(content, recipe["name"])
+
+@instrument("exact_search_recipe")
+@profiled("exact_search_recipe")
+async def exact_search_recipe_async(recipe_name):
+    """精确搜索菜品做法（异步获取做法，不占用工作线程）
+    
+    Args:
+        recipe_name: 完整的菜品名称
+        
+    Returns:
+        菜品详细做法
+    """
+    result, recipe = _exact_search_recipe_result(recipe_name)
+    if recipe is None:
+        return result
+    content = await get_recipe_content_async(recipe["url"])
+    return format_recipe_content(content, recipe["name"])
+
+async def shopping_list_data(start_date=None, health_goal="无目标", taste_preferences=None, exclude_terms=None, days=7,
+                             seed=None, people=1):
+    """生成规划的购物清单数据
+
+    规划中所有菜品的做法同时获取（缓存命中的直接返回，其余通过异步连接池并发请求），
+    总耗时约等于最慢的一次获取，而不是逐道菜获取的耗时之和。
+    使用与规划相同的种子和参数时，清单与显示的规划一致（规划直接来自 PLAN_MEMO）。
+
+    Args:
+        seed: 随机种子，为None时生成一个新的规划
+        people: 每餐的人数
+
+    Returns:
+        {"title", "seed", "start_date", "plan_days", "people", "dishes", "items", "sides", "missing"}
+
+    Raises:
+        ValueError: 输入无效
+    """
+    people = 1 if people is None or people == "" else int(people)
+    if people <= 0:
+        raise ValueError("请输入有效的人数")
+    start = parse_start_date(start_date)
+    days = parse_plan_days(days)
+    memoize = seed is not None and seed != ""
+    seed = resolve_seed(seed)
+    plan = iter_seeded_plan(start, health_goal, taste_preferences, exclude_terms, days, seed, memoize)
+    dishes, sides = plan_dishes(plan)
+
+    import asyncio
+    contents = await asyncio.gather(*(get_recipe_content_async(dish["url"]) for dish in dishes))
+    recipes = []
+    missing = []
+    for dish, content in zip(dishes, contents):
+        if not content or content.startswith("❌"):
+            missing.append({"name": dish["name"], "url": dish["url"], "error": content})
+            dish["fetched"] = False
+            continue
+        dish["fetched"] = True
+        recipes.append((dish["name"], dish["count"], parse_quantities(content)))
+    return {
+        "title": f"{plan_title(days)}购物清单",
+        "seed": seed,
+        "start_date": start.strftime("%Y-%m-%d"),
+        "plan_days": days,
+        "people": people,
+        "dishes": dishes,
+        "items": aggregate(recipes, people),
+        "sides": [{"name": name, "count": count * people} for name, count in sides.items()],
+        "missing": missing
+    }
+
+@instrument("shopping_list")
+@profiled("shopping_list")
+async def shopping_list(start_date="", health_goal="无目标", taste_preferences=None, exclude_terms="", days=7, seed=None,
+                        people=1):
+    """生成规划的购物清单：并发获取全部做法，解析原料用量，按人数放大后合并
+    
+    Args:
+        start_date: 开始日期
+        health_goal: 健康目标
+        taste_preferences: 口味偏好列表
+        exclude_terms: 其他忌口
+        days: 规划天数
+        seed: 随机种子，与生成规划时相同才能得到同一份规划的清单
+        people: 每餐的人数
+        
+    Returns:
+        格式化的购物清单
+    """
+    try:
+        data = await shopping_list_data(start_date, health_goal, taste_preferences, exclude_terms, days, seed, people)
+    except ValueError as e:
+        return f"❌ 无效的输入: {e}"
+    return format_shopping_list(data)
+
+@instrument("shopping_list_json")
+@profiled("shopping_list_json")
+async def shopping_list_json(start_date="", health_goal="无目标", taste_preferences=None, exclude_terms="", days=7,
+                             seed=None, people=1):
+    """生成规划的购物清单，返回结构化数据而不是文本
+
+    Returns:
+        shopping_list_data 的结果，items 中每项为 {"name", "quantities", "as_needed", "dishes"}；
+        输入无效时为 {"error": 提示信息}
+    """
+    try:
+        return await shopping_list_data(start_date, health_goal, taste_preferences, exclude_terms, days, seed, people)
+    except ValueError as e:
+        return {"error": f"无效的输入: {e}"}
+
+@instrument("search_recipe_json")
+@profiled("search_recipe_json")
+def search_recipe_json(recipe_name):
+    """模糊搜索菜品，返回全部命中而不获取做法
+
+    Returns:
+        {"query", "hits"}，hits 按匹配质量排序，每项为 {"name", "category", "url", "score"}；
+        score 为 3 完全匹配、2 前缀匹配、1 包含
+    """
+    if not recipe_name or recipe_name.strip() == "":
+        return {"error": "请输入要搜索的菜品名称"}
+    recipe_name = recipe_name.strip()
+    with CATALOG.reading() as catalog:
+        hits = catalog.search_index.search(recipe_name)
+    return {"query": recipe_name, "hits": hits}
+
+@instrument("exact_search_recipe_json")
+@profiled("exact_search_recipe_json")
+async def exact_search_recipe_json(recipe_name, include_content=False):
+    """精确搜索菜品，返回结构化数据
+
+    Args:
+        recipe_name: 完整的菜品名称
+        include_content: 是否附带第一个命中的Markdown原文
+
+    Returns:
+        {"query", "matches"}，matches 为同名菜品 {"name", "category", "url"}；
+        include_content 时加上 content，获取失败时 content 为None、content_error 为原因
+    """
+    if not recipe_name or recipe_name.strip() == "":
+        return {"error": "请输入要搜索的菜品名称"}
+    recipe_name = recipe_name.strip()
+    # 索引中的条目是共享的，复制后再交给调用方
+    with CATALOG.reading() as catalog:
+        matches = [dict(match) for match in catalog.search_index.lookup(recipe_name)]
+    result = {"query": recipe_name, "matches": matches}
+    if include_content and matches and matches[0]["url"]:
+        content = await get_recipe_content_async(matches[0]["url"])
+        if content.startswith("❌"):
+            result["content"] = None
+            result["content_error"] = content
+        else:
+            result["content"] = content
+    return result
+
+@instrument("generate_spring_festival_menu")
+@profiled("generate_spring_festival_menu")
+def generate_spring_festival_menu(people_count, seed=None):
+    """生成春节菜单
+    
+    Args:
+        people_count: 人数
+        seed: 随机种子，指定后同样的人数得到同样的菜单
+        
+    Returns:
+        春节菜单
+    """
+    return _generate_festival_menu("spring", people_count, seed=resolve_seed(seed))
+
+@instrument("generate_lantern_festival_menu")
+@profiled("generate_lantern_festival_menu")
+def generate_lantern_festival_menu(people_count, region, seed=None):
+    """生成元宵节菜单，region可为'south', 'north', ''，指定seed时结果可复现"""
+    return _generate_festival_menu("lantern", people_count, region, resolve_seed(seed))
+
+@instrument("generate_festival_menu")
+@profiled("generate_festival_menu")
+def generate_festival_menu(festival, people_count, region="", seed=None):
+    """生成节庆数据中任意节日的菜单
+
+    Args:
+        festival: 节日的键（如 spring、lantern）或中文名称（如 春节）
+        people_count: 用餐人数
+        region: 地区版本（如 推荐南方美食），节日只有一个版本时忽略
+        seed: 随机种子，指定后同样的参数得到同样的菜单
+
+    Returns:
+        格式化的菜单
+    """
+    return _generate_festival_menu(festival, people_count, region, resolve_seed(seed))
+
+@instrument("festival_menu_json")
+@profiled("festival_menu_json")
+def festival_menu_json(festival, people_count, region="", seed=None):
+    """生成节庆菜单，返回结构化数据而不是文本
+
+    Returns:
+        {"festival", "variant", "region", "title", "people", "servings", "dishes", "features", "seed"}，
+        dishes 中每项为 {"name", "count", "emoji", "tags"}；输入无效时为 {"error": 提示信息}
+    """
+    try:
+        seed = resolve_seed(seed)
+        return dict(festival_menu_data(festival, people_count, region, seed), seed=seed)
+    except ValueError as e:
+        return {"error": str(e)}
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+进程内指标与Prometheus文本格式导出。
+
+提供计数器、仪表和直方图三种指标，按标签值分别统计，全部线程安全。
+instrument 装饰器为处理函数（普通函数、协程函数、异步生成器）记录调用次数、
+异常次数和耗时直方图；start_metrics_server 在本地端口以Prometheus文本格式
+（text/plain; version=0.0.4）提供 /metrics，不依赖 prometheus_client。
+http.server 在启动端点时才导入，只记录指标的工作进程不需要加载它。
+"""
+import bisect
+import functools
+import inspect
+import math
+import os
+import sys
+import threading
+import time
+
+# 指标端口，0表示不启动
+DEFAULT_METRICS_PORT = int(os.environ.get("METRICS_PORT", 9464))
+DEFAULT_METRICS_ADDR = os.environ.get("METRICS_ADDR", "127.0.0.1")
+
+# 耗时直方图的默认分桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 候选列表大小的分桶
+SIZE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    """带标签的指标基类
+
+    Args:
+        name: 指标名称
+        documentation: 说明
+        labelnames: 标签名列表
+    """
+
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，收到 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        """Prometheus文本格式"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def value(self, **labels):
+        """当前计数（未记录过时为0）"""
+        with self._lock:
+            return self._children.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._children.items())
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._children.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._children.items())
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """分桶直方图，记录每个桶的累计次数、总和与总次数
+
+    Args:
+        buckets: 桶的上界（升序），自动追加 +Inf
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # 落在第一个上界不小于value的桶里，渲染时再做累计
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            child[0][index] += 1
+            child[1] += value
+            child[2] += 1
+
+    def count(self, **labels):
+        """记录的总次数"""
+        with self._lock:
+            child = self._children.get(self._key(labels))
+            return child[2] if child else 0
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, (list(child[0]), child[1], child[2])) for key, child in self._children.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = (("le", _format_value(float(bound))),)
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表，同名指标只创建一次"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同的类型或标签注册")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """全部指标的Prometheus文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ---------- 共用的指标 ----------
+
+HANDLER_REQUESTS = REGISTRY.counter("handler_requests_total", "处理函数的调用次数", ["handler"])
+HANDLER_ERRORS = REGISTRY.counter("handler_errors_total", "处理函数抛出异常的次数", ["handler", "error"])
+HANDLER_LATENCY = REGISTRY.histogram("handler_latency_seconds", "处理函数的耗时（流式处理为全部输出完成的耗时）", ["handler"])
+HANDLER_FIRST_OUTPUT = REGISTRY.histogram("handler_first_output_seconds", "流式处理函数首次输出的耗时", ["handler"])
+HANDLER_IN_PROGRESS = REGISTRY.gauge("handler_in_progress", "正在执行的处理函数数", ["handler"])
+
+UPSTREAM_FETCH_DURATION = REGISTRY.histogram(
+    "recipe_upstream_fetch_seconds", "向上游获取菜品做法的耗时", ["mode", "outcome"]
+)
+RECIPE_CACHE_REQUESTS = REGISTRY.counter(
+    "recipe_cache_requests_total", "菜品做法缓存的查询结果（hit 新鲜命中, stale 过期需重新验证, miss 未命中）", ["result"]
+)
+CANDIDATE_CACHE_REQUESTS = REGISTRY.counter(
+    "candidate_cache_requests_total", "候选列表缓存的查询结果", ["result"]
+)
+CANDIDATE_POOL_SIZE = REGISTRY.histogram(
+    "candidate_pool_size", "规划时每个餐次的候选菜品数", ["meal_type"], buckets=SIZE_BUCKETS
+)
+FORMAT_CACHE_REQUESTS = REGISTRY.counter(
+    "recipe_format_cache_requests_total", "做法格式化结果缓存的查询结果", ["result"]
+)
+PLAN_MEMO_REQUESTS = REGISTRY.counter(
+    "plan_memo_requests_total", "带种子的规划缓存的查询结果", ["result"]
+)
+
+
+class _Timer:
+    """记录一次处理函数调用"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.start = time.perf_counter()
+        HANDLER_REQUESTS.inc(handler=handler)
+        HANDLER_IN_PROGRESS.inc(handler=handler)
+
+    def first_output(self):
+        HANDLER_FIRST_OUTPUT.observe(time.perf_counter() - self.start, handler=self.handler)
+
+    def finish(self, error=None):
+        HANDLER_IN_PROGRESS.dec(handler=self.handler)
+        HANDLER_LATENCY.observe(time.perf_counter() - self.start, handler=self.handler)
+        if error is not None:
+            HANDLER_ERRORS.inc(handler=self.handler, error=type(error).__name__)
+
+
+def _disconnected(error):
+    """客户端断开（生成器被关闭、任务被取消）不算错误"""
+    if isinstance(error, GeneratorExit):
+        return True
+    # asyncio 未导入时不会有它的取消异常
+    asyncio = sys.modules.get("asyncio")
+    return asyncio is not None and isinstance(error, asyncio.CancelledError)
+
+
+def instrument(handler=None):
+    """为处理函数记录调用次数、异常和耗时
+
+    支持普通函数、协程函数和异步生成器；functools.wraps 保留原函数的名称、签名和文档，
+    Gradio 生成的API和MCP工具描述不受影响。
+
+    Args:
+        handler: 指标中的处理函数名，默认使用函数名
+
+    Returns:
+        装饰器
+    """
+    def decorator(fn):
+        name = handler or fn.__name__
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                timer = _Timer(name)
+                stream = fn(*args, **kwargs)
+                first = True
+                try:
+                    async for item in stream:
+                        if first:
+                            timer.first_output()
+                            first = False
+                        yield item
+                except BaseException as e:
+                    timer.finish(None if _disconnected(e) else e)
+                    raise
+                else:
+                    timer.finish()
+                finally:
+                    await stream.aclose()
+        elif inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                timer = _Timer(name)
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException as e:
+                    timer.finish(None if _disconnected(e) else e)
+                    raise
+                timer.finish()
+                return result
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                timer = _Timer(name)
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    timer.finish(e)
+                    raise
+                timer.finish()
+                return result
+        return wrapper
+
+    return decorator
+
+
+def start_metrics_server(port=DEFAULT_METRICS_PORT, addr=DEFAULT_METRICS_ADDR, registry=REGISTRY):
+    """在后台线程中启动 /metrics 端点
+
+    Args:
+        port: 端口，0表示不启动
+        addr: 监听地址，默认只监听本机
+        registry: 要导出的指标注册表
+
+    Returns:
+        HTTP服务器，未启动或端口被占用时为None
+    """
+    if not port:
+        return None
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 抓取请求很频繁，不输出访问日志
+            pass
+
+    try:
+        server = http.server.ThreadingHTTPServer((addr, port), MetricsHandler)
+    except OSError as e:
+        print(f"⚠️ 指标端口 {addr}:{port} 无法使用: {e}")
+        return None
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    print(f"📈 指标已在 http://{addr}:{port}/metrics 提供")
+    return server
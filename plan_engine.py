@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+不重复的餐饮规划引擎。
+
+在候选列表上做不放回抽样，满足以下约束：
+- 同一道菜（按去掉搭配后的菜名）在 no_repeat_days 天内不重复出现，早中晚加餐之间也不重复
+- 午餐和晚餐中同一种主料（鸡、猪、牛、鱼……）在窗口内最多出现 max_ingredient_repeats 次
+- 午餐和晚餐按菜品类别（荤菜、素菜、水产、汤羹）轮换，同一天的午餐和晚餐尽量不同类
+
+每个候选池是一个稀疏的部分 Fisher–Yates 排列：可用菜品在排列前部，
+抽取、移出、放回都只交换两个位置，交换记录在字典里，建池不需要复制候选列表。
+违反约束的菜品被移出可用区，等约束解除（超出窗口或主料计数下降）时再放回，
+每道菜在一次约束期内最多被移出一次，因此每次抽取的均摊开销是O(1)，不会反复重抽。
+候选太少、约束无法满足时，先放宽主料上限，在窗口内没出现过的菜品中选择；
+仍然没有时，选择本餐次最久未出现的菜品（按每道菜最后一次出现的时间），重复的菜品轮流出现。
+"""
+import collections
+import random
+import threading
+
+from keyword_matcher import compile_keywords
+from recipe_index import INGREDIENT_FALSE_FRIENDS, _iter_bits, normalize_name, recipe_ingredients, recipe_name
+
+# 默认的不重复窗口（天）和主料重复上限
+NO_REPEAT_DAYS = 7
+MAX_INGREDIENT_REPEATS = 3
+
+# 需要按类别轮换、限制主料重复的餐次
+BALANCED_MEALS = ("午餐", "晚餐")
+
+# 主料关键词
+BASE_INGREDIENT_KEYWORDS = {
+    "鸡": ["鸡"],
+    "鸭": ["鸭"],
+    "鹅": ["鹅"],
+    "猪": ["猪", "排骨", "五花", "里脊", "肘子", "腊肉", "培根", "火腿"],
+    "牛": ["牛肉", "牛腩", "牛排", "肥牛", "牛腱", "牛柳"],
+    "羊": ["羊"],
+    "鱼": ["鱼"],
+    "虾蟹": ["虾", "蟹"],
+    "蛋": ["蛋"],
+    "豆制品": ["豆腐", "豆干", "腐竹", "千张", "素鸡"]
+}
+BASE_INGREDIENT_CLASSIFIER = compile_keywords(BASE_INGREDIENT_KEYWORDS)
+
+# 判断主料前替换掉的词（鸡蛋是蛋不是鸡，鸡精不是主料）
+_BASE_INGREDIENT_REWRITES = [("鸡蛋", "蛋"), ("鸭蛋", "蛋"), ("鹅蛋", "蛋"), ("鸡精", "")] + [
+    (word, "") for word in INGREDIENT_FALSE_FRIENDS
+]
+
+# HowToCook 目录与菜品类别
+CATEGORY_DIRS = {
+    "meat_dish": "荤菜",
+    "aquatic": "水产",
+    "vegetable_dish": "素菜",
+    "soup": "汤羹",
+    "staple": "主食",
+    "breakfast": "早餐",
+    "dessert": "甜品"
+}
+
+# 候选列表元数据缓存上限
+MAX_POOL_META = 1024
+
+
+def base_ingredient_mask(recipe):
+    """菜品主料的位图（按主菜名称和原料判断，不看搭配部分）"""
+    text = "\n".join((recipe_name(recipe).split(" + ")[0],) + tuple(recipe_ingredients(recipe)))
+    for word, replacement in _BASE_INGREDIENT_REWRITES:
+        if word in text:
+            text = text.replace(word, replacement)
+    return BASE_INGREDIENT_CLASSIFIER.mask(text)
+
+
+def dish_category(recipe):
+    """菜品类别：优先使用做法链接中的 HowToCook 目录，没有链接时按是否含主料区分荤素"""
+    url = recipe.get("url", "") if isinstance(recipe, dict) else ""
+    if "/dishes/" in url:
+        directory = url.split("/dishes/", 1)[1].split("/", 1)[0]
+        if directory in CATEGORY_DIRS:
+            return CATEGORY_DIRS[directory]
+    return "荤菜" if base_ingredient_mask(recipe) else "素菜"
+
+
+class _PoolMeta:
+    """一个候选列表的预计算信息，同一个候选列表在多次规划之间共享"""
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.keys = [normalize_name(recipe_name(r).split(" + ")[0]) for r in candidates]
+        self.ingredients = [base_ingredient_mask(r) for r in candidates]
+        groups = {}
+        for i, recipe in enumerate(candidates):
+            groups.setdefault(dish_category(recipe), []).append(i)
+        self.groups = {category: tuple(items) for category, items in groups.items()}
+        # 候选下标 -> (类别, 在类别中的位置)
+        self.locate = [None] * len(candidates)
+        for category, items in self.groups.items():
+            for local, i in enumerate(items):
+                self.locate[i] = (category, local)
+
+
+_pool_meta = collections.OrderedDict()
+_pool_meta_lock = threading.Lock()
+
+
+def pool_meta(candidates):
+    """获取候选列表的元数据（按对象缓存，CandidateIndex 对相同查询返回同一个元组）"""
+    key = id(candidates)
+    with _pool_meta_lock:
+        cached = _pool_meta.get(key)
+        if cached is not None and cached.candidates is candidates:
+            _pool_meta.move_to_end(key)
+            return cached
+    meta = _PoolMeta(candidates)
+    with _pool_meta_lock:
+        _pool_meta[key] = meta
+        while len(_pool_meta) > MAX_POOL_META:
+            _pool_meta.popitem(last=False)
+    return meta
+
+
+class _SparsePool:
+    """稀疏的部分 Fisher–Yates 排列，位置 [0, available) 是可用的菜品
+
+    Args:
+        size: 池中的菜品数
+    """
+
+    def __init__(self, size):
+        self.available = size
+        self._perm = {}
+        self._pos = {}
+
+    def _swap(self, i, j):
+        a = self._perm.get(i, i)
+        b = self._perm.get(j, j)
+        self._perm[i] = b
+        self._perm[j] = a
+        self._pos[b] = i
+        self._pos[a] = j
+
+    def pick(self, rng):
+        """随机取一个可用位置上的菜品（不移出）"""
+        j = rng.randrange(self.available)
+        return self._perm.get(j, j)
+
+    def remove(self, local):
+        """把菜品移出可用区"""
+        p = self._pos.get(local, local)
+        if p < self.available:
+            self.available -= 1
+            self._swap(p, self.available)
+
+    def restore(self, local):
+        """把菜品放回可用区"""
+        p = self._pos.get(local, local)
+        if p >= self.available:
+            self._swap(p, self.available)
+            self.available += 1
+
+
+class NoRepeatPlanner:
+    """逐天生成满足不重复、主料上限和类别轮换约束的规划
+
+    Args:
+        meal_candidates: {餐次: 候选菜品元组}，按餐次顺序安排
+        no_repeat_days: 不重复窗口（天），0表示只保证同一天内不重复
+        max_ingredient_repeats: 窗口内午餐和晚餐中同一主料的最多次数，0表示不限制
+        seed: 随机种子，每个规划器使用自己的 random.Random(seed)，为None时由系统熵源初始化
+    """
+
+    def __init__(self, meal_candidates, no_repeat_days=NO_REPEAT_DAYS,
+                 max_ingredient_repeats=MAX_INGREDIENT_REPEATS, seed=None):
+        self.no_repeat_days = max(0, int(no_repeat_days))
+        self.max_ingredient_repeats = max(0, int(max_ingredient_repeats))
+        self.rng = random.Random(seed)
+        self.day = 0
+        self._meals = {}
+        for meal_type, candidates in meal_candidates.items():
+            if candidates:
+                meta = pool_meta(candidates)
+                pools = {category: _SparsePool(len(items)) for category, items in meta.groups.items()}
+                self._meals[meal_type] = (meta, pools)
+            else:
+                self._meals[meal_type] = None
+        # 窗口内的使用记录：(第几天, 餐次, 候选下标)
+        self._usage = collections.deque()
+        self._key_uses = collections.Counter()
+        self._ingredient_uses = collections.Counter()
+        self._category_uses = collections.Counter()
+        # 菜品（按菜名）最后一次出现的序号，约束无法满足时选最久未出现的
+        self._last_used = {}
+        self._serial = 0
+        # 因约束被移出可用区的菜品，约束解除时放回
+        self._parked_keys = collections.defaultdict(list)
+        self._parked_ingredients = collections.defaultdict(list)
+
+    def _restore(self, parked):
+        for meal_type, i in parked:
+            meta, pools = self._meals[meal_type]
+            category, local = meta.locate[i]
+            pools[category].restore(local)
+
+    def _expire(self):
+        """移除超出窗口的使用记录，解除相应的约束"""
+        oldest_allowed = self.day - self.no_repeat_days if self.no_repeat_days else self.day
+        while self._usage and self._usage[0][0] < oldest_allowed:
+            _, meal_type, i = self._usage.popleft()
+            meta, _ = self._meals[meal_type]
+            key = meta.keys[i]
+            self._key_uses[key] -= 1
+            if not self._key_uses[key]:
+                del self._key_uses[key]
+                self._restore(self._parked_keys.pop(key, ()))
+            if meal_type in BALANCED_MEALS:
+                for bit in _iter_bits(meta.ingredients[i]):
+                    self._ingredient_uses[bit] -= 1
+                    if self._ingredient_uses[bit] < self.max_ingredient_repeats:
+                        self._restore(self._parked_ingredients.pop(bit, ()))
+
+    def _park_reason(self, meal_type, meta, i):
+        """菜品当前违反的约束，满足全部约束时返回None"""
+        key = meta.keys[i]
+        if key in self._key_uses:
+            return self._parked_keys[key]
+        if self.max_ingredient_repeats and meal_type in BALANCED_MEALS:
+            for bit in _iter_bits(meta.ingredients[i]):
+                if self._ingredient_uses[bit] >= self.max_ingredient_repeats:
+                    return self._parked_ingredients[bit]
+        return None
+
+    def _pick_category(self, meal_type, pools, today_categories):
+        choices = [category for category, pool in pools.items() if pool.available]
+        if len(choices) <= 1 or meal_type not in BALANCED_MEALS:
+            return choices[0] if choices else None
+        # 同一天的午餐和晚餐尽量不同类，再选用得最少的类别
+        fresh = [category for category in choices if category not in today_categories]
+        choices = fresh or choices
+        least = min(self._category_uses[category] for category in choices)
+        choices = [category for category in choices if self._category_uses[category] == least]
+        return choices[0] if len(choices) == 1 else self.rng.choice(choices)
+
+    def _least_recent(self, meta, indices):
+        """在给定的候选中选最久未出现的菜品，从未出现过的优先，并列时随机选择"""
+        last_used = self._last_used
+        best = []
+        oldest = None
+        for i in indices:
+            used = last_used.get(meta.keys[i], -1)
+            if oldest is None or used < oldest:
+                oldest = used
+                best = [i]
+            elif used == oldest:
+                best.append(i)
+        return best[0] if len(best) == 1 else self.rng.choice(best)
+
+    def _fallback(self, meal_type, meta):
+        """约束无法满足时的选择
+
+        先放宽主料上限（软约束）：只因主料次数被移出的菜品中，窗口内没出现过的仍然可选；
+        都不行时才重复，选本餐次最久未出现的菜品，重复的菜品按出现先后轮流使用。
+        """
+        relaxed = {
+            i
+            for parked in self._parked_ingredients.values()
+            for parked_meal_type, i in parked
+            if parked_meal_type == meal_type and meta.keys[i] not in self._key_uses
+        }
+        if relaxed:
+            return self._least_recent(meta, sorted(relaxed))
+        return self._least_recent(meta, range(len(meta.candidates)))
+
+    def _choose(self, meal_type, today_categories):
+        meta, pools = self._meals[meal_type]
+        while True:
+            category = self._pick_category(meal_type, pools, today_categories)
+            if category is None:
+                return self._fallback(meal_type, meta)
+            pool = pools[category]
+            local = pool.pick(self.rng)
+            i = meta.groups[category][local]
+            parked = self._park_reason(meal_type, meta, i)
+            if parked is None:
+                # 选中的菜品在窗口内不再可用
+                pool.remove(local)
+                self._parked_keys[meta.keys[i]].append((meal_type, i))
+                return i
+            # 违反约束的菜品移出可用区，约束解除前不会再被抽到
+            pool.remove(local)
+            parked.append((meal_type, i))
+
+    def _record(self, meal_type, meta, i, today_categories):
+        self._usage.append((self.day, meal_type, i))
+        self._key_uses[meta.keys[i]] += 1
+        self._last_used[meta.keys[i]] = self._serial
+        self._serial += 1
+        if meal_type in BALANCED_MEALS:
+            for bit in _iter_bits(meta.ingredients[i]):
+                self._ingredient_uses[bit] += 1
+            category = meta.locate[i][0]
+            self._category_uses[category] += 1
+            today_categories.add(category)
+
+    def plan_day(self):
+        """安排下一天的各餐
+
+        Returns:
+            {餐次: 菜品}，没有候选的餐次为None
+        """
+        self._expire()
+        daily_meals = {}
+        today_categories = set()
+        for meal_type, state in self._meals.items():
+            if state is None:
+                daily_meals[meal_type] = None
+                continue
+            meta = state[0]
+            i = self._choose(meal_type, today_categories)
+            self._record(meal_type, meta, i, today_categories)
+            daily_meals[meal_type] = meta.candidates[i]
+        self.day += 1
+        return daily_meals
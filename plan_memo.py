@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+带种子的餐饮规划缓存。
+
+指定种子后规划是确定的：同样的种子、开始日期、健康目标、口味偏好、忌口和天数
+总是得到同样的规划。MCP客户端重试同一个调用时直接从有界LRU中返回，不再抽样，
+输出与第一次逐字节相同。缓存属于某个菜谱库快照，快照替换后整体清空。
+"""
+import collections
+import os
+import threading
+
+from metrics import PLAN_MEMO_REQUESTS
+
+# 缓存的规划数，可通过环境变量覆盖
+DEFAULT_MAX_PLANS = int(os.environ.get("PLAN_MEMO_SIZE", 1024))
+
+
+def plan_key(seed, start_date, health_goal, taste_preferences, exclude_terms, days):
+    """规划缓存的键
+
+    Args:
+        seed: 整数种子
+        start_date: 开始日期（datetime.date 或 datetime.datetime，只取日期部分）
+        health_goal: 健康目标
+        taste_preferences: 口味偏好
+        exclude_terms: 解析后的忌口词
+        days: 规划天数
+    """
+    if hasattr(start_date, "date"):
+        start_date = start_date.date()
+    return (seed, start_date, health_goal, frozenset(taste_preferences or ()), frozenset(exclude_terms), days)
+
+
+class PlanMemo:
+    """有界LRU：规划缓存的键 -> ((日期标题, {餐次: 菜品}), ...)
+
+    Args:
+        max_plans: 最多缓存的规划数，0表示不缓存
+    """
+
+    def __init__(self, max_plans=DEFAULT_MAX_PLANS):
+        self.max_plans = max_plans
+        self._lock = threading.Lock()
+        self._plans = collections.OrderedDict()
+        self._snapshot = None
+
+    def get(self, snapshot, key):
+        """查询缓存
+
+        Args:
+            snapshot: 当前的菜谱库快照，与缓存所属的快照不同时清空缓存
+            key: plan_key 的结果
+
+        Returns:
+            缓存的规划，没有时为None
+        """
+        with self._lock:
+            if snapshot is not self._snapshot:
+                self._plans.clear()
+                self._snapshot = snapshot
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+        PLAN_MEMO_REQUESTS.inc(result="miss" if plan is None else "hit")
+        return plan
+
+    def put(self, snapshot, key, plan):
+        """写入缓存，基于旧快照生成的规划直接丢弃"""
+        if self.max_plans <= 0:
+            return
+        with self._lock:
+            if snapshot is not self._snapshot:
+                return
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+
+    def __len__(self):
+        return len(self._plans)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+餐饮规划的公共工具：日期解析、餐次、星期名称等。
+只依赖标准库，供 app.py 和批量规划等模块共用。
+"""
+import datetime
+import random
+
+WEEKDAY_NAMES = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+
+# 没有可用菜品时的占位
+NO_DISH = {"name": "❌ 无可用菜品，请减少忌口选项", "url": ""}
+
+# 规划天数的可选项和上限
+PLAN_HORIZONS = [7, 30, 90, 365]
+DEFAULT_PLAN_DAYS = 7
+MAX_PLAN_DAYS = 366
+
+# 没有指定种子时用系统随机源生成，不读写 random 模块的全局状态；
+# 32位的种子在界面的数字框和JSON客户端中都不会丢失精度
+_SEED_SOURCE = random.SystemRandom()
+# 种子的取值范围：JavaScript 能精确表示的整数不超过 2**53，JSON工具返回的种子在客户端中不会被舍入
+SEED_MODULUS = 2 ** 53
+
+
+def parse_start_date(start_date):
+    """解析开始日期
+
+    Args:
+        start_date: None/空字符串（使用当前日期）、datetime、"YYYY-MM-DD" 或 "YYYY年MM月DD日"
+
+    Returns:
+        datetime.datetime
+
+    Raises:
+        ValueError: 日期格式无法识别
+    """
+    if start_date is None or start_date == "":
+        return datetime.datetime.now()
+    if isinstance(start_date, str):
+        if "-" in start_date:
+            return datetime.datetime.strptime(start_date, "%Y-%m-%d")
+        if "年" in start_date:
+            return datetime.datetime.strptime(start_date, "%Y年%m月%d日")
+        raise ValueError(f"无法识别的日期：{start_date}，请使用 YYYY-MM-DD 或 YYYY年MM月DD日")
+    if isinstance(start_date, datetime.date) and not isinstance(start_date, datetime.datetime):
+        return datetime.datetime(start_date.year, start_date.month, start_date.day)
+    return start_date
+
+
+def parse_plan_days(days):
+    """解析规划天数
+
+    Args:
+        days: None/空字符串（使用默认的7天）、整数或数字字符串
+
+    Returns:
+        1 到 MAX_PLAN_DAYS 之间的整数
+    """
+    if days is None or days == "":
+        return DEFAULT_PLAN_DAYS
+    return max(1, min(MAX_PLAN_DAYS, int(days)))
+
+
+def plan_title(days):
+    """规划的标题，如 七日餐饮规划、30日餐饮规划"""
+    return "七日餐饮规划" if days == 7 else f"{days}日餐饮规划"
+
+
+def meal_types_for(health_goal):
+    """根据健康目标确定每天的餐次，减脂时不安排加餐"""
+    return ["早餐", "午餐", "晚餐"] if health_goal == "减脂" else ["早餐", "午餐", "晚餐", "加餐"]
+
+
+def day_label(date):
+    """规划中每一天的标题，如 周一(2024年01月15日)"""
+    return f"{WEEKDAY_NAMES[date.weekday()]}({date.strftime('%Y年%m月%d日')})"
+
+
+def meal_entry(choice):
+    """把候选菜品转换为规划中的条目"""
+    if isinstance(choice, dict):
+        return {"name": choice["name"], "url": choice.get("url", "")}
+    return {"name": choice, "url": ""}
+
+
+def plan_day(start_date, offset, choices):
+    """规划中的一天，逐天生成和批量生成共用
+
+    Args:
+        start_date: 规划的开始日期
+        offset: 第几天（从0开始）
+        choices: {餐次: 选中的候选菜品}，没有可用菜品的餐次为None
+
+    Returns:
+        (日期标题, {餐次: 菜品条目})
+    """
+    meals = {
+        meal_type: dict(NO_DISH) if choice is None else meal_entry(choice)
+        for meal_type, choice in choices.items()
+    }
+    return day_label(start_date + datetime.timedelta(days=offset)), meals
+
+
+def resolve_seed(seed):
+    """解析随机种子
+
+    Args:
+        seed: None/空字符串（生成一个新的种子）、整数或数字字符串
+
+    Returns:
+        [0, 2**53) 内的整数种子。random.Random 对负数种子取绝对值，这里改为取模，
+        使 -n 与 n 得到不同的规划；[0, 2**53) 内的种子原样使用
+    """
+    if seed is None or seed == "":
+        return _SEED_SOURCE.getrandbits(32)
+    return int(seed) % SEED_MODULUS
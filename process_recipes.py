@@ -3,71 +3,250 @@
 """
 自动遍历HowToCook/dishes下的菜品，按早餐、午餐、晚餐、加餐分类，生成RECIPES_DATABASE并保存为recipes_database.py和recipes_database.json。
 每道菜在JSON中包含做法链接。
+同时生成带索引的SQLite菜谱库recipes_database.sqlite，app.py会优先以只读、内存映射方式打开它。
+
+构建是增量的：recipes_manifest.json 记录每个目录的修改时间和每个菜谱文件的内容哈希，
+再次运行时各分类目录用 os.scandir 并行扫描，只有修改时间或大小变化的文件才重新读取和计算哈希；
+没有任何菜品变化、且菜谱库模式版本和标签关键词分组也没变时不重写输出文件；
+菜品有变化但生成的菜谱数据库内容不变（例如只改了做法步骤）时同样跳过。
+数据库内容有变化时三个输出文件仍整体重写。清单中每道菜的版本哈希可供下游缓存精确失效。
+
+读取菜谱文件时顺便解析「必备原料和工具」和「计算」两节，每道菜带上规范化的原料列表（ingredients），
+SQLite菜谱库中据此预先计算标签位图，规划时不再按菜名猜测。
 """
+import argparse
+import concurrent.futures
+import hashlib
 import os
 import json
 import urllib.parse
 
+from ingredient_parser import parse_ingredients
+from recipe_catalog import build_signature, write_sqlite_catalog
+
 GITHUB_BASE = "https://github.com/Anduin2017/HowToCook/blob/master/dishes"
 
-def get_dish_objs_from_dir(dir_path, category_dir):
+CATEGORY_DIRS = ['breakfast', 'meat_dish', 'vegetable_dish', 'soup', 'dessert', 'staple', 'aquatic']
+
+MANIFEST_PATH = 'recipes_manifest.json'
+MANIFEST_VERSION = 3
+
+OUTPUT_FILES = ['recipes_database.py', 'recipes_database.json', 'recipes_database.sqlite']
+
+
+def _file_record(path, stat, previous):
+    """文件的版本记录（内容哈希和原料列表），修改时间和大小都没变时复用上次的记录
+
+    Returns:
+        (记录, 是否重新读取了文件)
+    """
+    if previous and previous.get('mtime_ns') == stat.st_mtime_ns and previous.get('size') == stat.st_size:
+        return previous, False
+    with open(path, 'rb') as f:
+        data = f.read()
+    return {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'hash': hashlib.sha256(data).hexdigest(),
+        'ingredients': parse_ingredients(data.decode('utf-8', errors='replace'))
+    }, True
+
+
+def scan_category(dir_path, category_dir, previous=None):
+    """扫描一个分类目录下的菜品
+
+    菜品可以是分类目录下的 .md 文件，也可以是包含 .md 文件的子目录（使用排序后的第一个 .md 文件）。
+    子目录的修改时间没变时直接复用上次记录的 .md 文件名，不再列出子目录。
+
+    Args:
+        dir_path: 分类目录路径
+        category_dir: 分类目录名，用于生成链接
+        previous: 上次构建时该分类的清单记录
+
+    Returns:
+        (菜品列表, 新的清单记录, 重新读取的菜品名列表)，
+        菜品包含 name、url、菜谱文件的内容哈希 hash 和原料列表 ingredients
+    """
+    previous = previous or {}
+    previous_items = previous.get('items', {})
     dishes = []
+    items = {}
+    changed = []
     if not os.path.exists(dir_path):
-        return dishes
-    for item in os.listdir(dir_path):
-        if item.endswith('.md'):
-            name = item[:-3]
-            url = f"{GITHUB_BASE}/{urllib.parse.quote(category_dir)}/{urllib.parse.quote(item)}"
-            dishes.append({"name": name, "url": url})
-        elif os.path.isdir(os.path.join(dir_path, item)):
-            # 检查目录下是否有.md文件
-            dir_path_full = os.path.join(dir_path, item)
-            md_files = [f for f in os.listdir(dir_path_full) if f.endswith('.md')]
-            if md_files:
+        return dishes, {'mtime_ns': None, 'items': items}, changed
+
+    with os.scandir(dir_path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        prev = previous_items.get(entry.name, {})
+        if entry.name.endswith('.md') and entry.is_file():
+            name = entry.name[:-3]
+            url = f"{GITHUB_BASE}/{urllib.parse.quote(category_dir)}/{urllib.parse.quote(entry.name)}"
+            record, rehashed = _file_record(entry.path, entry.stat(), prev.get('file'))
+            items[entry.name] = {'file': record}
+        elif entry.is_dir():
+            name = entry.name
+            dir_mtime = entry.stat().st_mtime_ns
+            if prev.get('dir_mtime_ns') == dir_mtime and 'md' in prev:
+                md_file = prev['md']
+            else:
+                # 检查目录下是否有.md文件
+                with os.scandir(entry.path) as sub:
+                    md_files = sorted(e.name for e in sub if e.name.endswith('.md') and e.is_file())
+                md_file = md_files[0] if md_files else None
+            item = {'dir_mtime_ns': dir_mtime, 'md': md_file}
+            if md_file:
                 # 使用第一个.md文件
-                md_file = md_files[0]
-                name = item
-                url = f"{GITHUB_BASE}/{urllib.parse.quote(category_dir)}/{urllib.parse.quote(item)}/{urllib.parse.quote(md_file)}"
-                dishes.append({"name": name, "url": url})
+                url = f"{GITHUB_BASE}/{urllib.parse.quote(category_dir)}/{urllib.parse.quote(entry.name)}/{urllib.parse.quote(md_file)}"
+                md_path = os.path.join(entry.path, md_file)
+                previous_file = prev.get('file') if prev.get('md') == md_file else None
+                record, rehashed = _file_record(md_path, os.stat(md_path), previous_file)
+                item['file'] = record
             else:
                 # 没有.md文件，使用目录名
-                name = item
-                url = f"{GITHUB_BASE}/{urllib.parse.quote(category_dir)}/{urllib.parse.quote(item)}"
-                dishes.append({"name": name, "url": url})
-    return dishes
-
-def main():
-    base = 'HowToCook/dishes'
-    # 分类
-    breakfast = get_dish_objs_from_dir(os.path.join(base, 'breakfast'), 'breakfast')
-    meat = get_dish_objs_from_dir(os.path.join(base, 'meat_dish'), 'meat_dish')
-    veg = get_dish_objs_from_dir(os.path.join(base, 'vegetable_dish'), 'vegetable_dish')
-    soup = get_dish_objs_from_dir(os.path.join(base, 'soup'), 'soup')
-    dessert = get_dish_objs_from_dir(os.path.join(base, 'dessert'), 'dessert')
-    staple = get_dish_objs_from_dir(os.path.join(base, 'staple'), 'staple')
-    aquatic = get_dish_objs_from_dir(os.path.join(base, 'aquatic'), 'aquatic')
+                url = f"{GITHUB_BASE}/{urllib.parse.quote(category_dir)}/{urllib.parse.quote(entry.name)}"
+                rehashed = not prev or prev.get('md') is not None
+            items[entry.name] = item
+        else:
+            continue
+        if rehashed:
+            changed.append(name)
+        file_record = items[entry.name].get('file', {})
+        dishes.append({
+            "name": name,
+            "url": url,
+            "hash": file_record.get('hash', ''),
+            "ingredients": file_record.get('ingredients', [])
+        })
+
+    removed = set(previous_items) - set(items)
+    changed.extend(sorted(removed))
+    return dishes, {'mtime_ns': os.stat(dir_path).st_mtime_ns, 'items': items}, changed
+
+
+def get_dish_objs_from_dir(dir_path, category_dir):
+    """兼容旧接口：扫描分类目录，返回菜品列表"""
+    return scan_category(dir_path, category_dir)[0]
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """读取构建清单，不存在或格式不对时返回空清单"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def load_dish_versions(path=MANIFEST_PATH):
+    """读取每道菜的版本哈希
+
+    Returns:
+        {做法链接: 版本哈希}，菜谱文件内容变化时版本哈希随之变化
+    """
+    return {url: info['version'] for url, info in load_manifest(path).get('dishes', {}).items()}
+
+
+def scan_all(base, manifest, jobs=None):
+    """并行扫描全部分类目录
+
+    Returns:
+        ({分类目录: 菜品列表}, 新的清单, {分类目录: 重新读取的菜品名列表})
+    """
+    previous_categories = manifest.get('categories', {})
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or len(CATEGORY_DIRS)) as pool:
+        futures = {
+            category_dir: pool.submit(
+                scan_category, os.path.join(base, category_dir), category_dir, previous_categories.get(category_dir)
+            )
+            for category_dir in CATEGORY_DIRS
+        }
+        for category_dir, future in futures.items():
+            results[category_dir] = future.result()
+
+    categories = {}
+    dishes_by_category = {}
+    changed = {}
+    dish_versions = {}
+    for category_dir, (dishes, category_manifest, changed_names) in results.items():
+        categories[category_dir] = category_manifest
+        dishes_by_category[category_dir] = dishes
+        if changed_names:
+            changed[category_dir] = changed_names
+        for dish in dishes:
+            dish_versions[dish['url']] = {
+                'name': dish['name'],
+                'category': category_dir,
+                'version': hashlib.sha256(f"{dish['url']}\n{dish['hash']}".encode('utf-8')).hexdigest()[:16]
+            }
+    new_manifest = {
+        'version': MANIFEST_VERSION,
+        'build': build_signature(),
+        'categories': categories,
+        'dishes': dish_versions,
+        'catalog_version': hashlib.sha256(
+            json.dumps(sorted((url, d['version']) for url, d in dish_versions.items())).encode('utf-8')
+        ).hexdigest()[:16]
+    }
+    return dishes_by_category, new_manifest, changed
+
+
+def _entry(name, dish):
+    """数据库中的一道菜，有原料信息时一并保存"""
+    entry = {"name": name, "url": dish["url"]}
+    if dish.get("ingredients"):
+        entry["ingredients"] = dish["ingredients"]
+    return entry
+
+
+def build_recipes_database(dishes_by_category):
+    """按早餐、午餐、晚餐、加餐组织菜品"""
+    breakfast = dishes_by_category['breakfast']
+    meat = dishes_by_category['meat_dish']
+    veg = dishes_by_category['vegetable_dish']
+    soup = dishes_by_category['soup']
+    dessert = dishes_by_category['dessert']
+    aquatic = dishes_by_category['aquatic']
 
     # 早餐
-    breakfast_recipes = [{"name": f"{dish['name']} + 牛奶/豆浆/粥", "url": dish["url"]} for dish in breakfast]
+    breakfast_recipes = [_entry(f"{dish['name']} + 牛奶/豆浆/粥", dish) for dish in breakfast]
     # 午餐
-    lunch_recipes = [{"name": f"{dish['name']} + 青菜 + 米饭", "url": dish["url"]} for dish in meat[:20]]
-    lunch_recipes += [{"name": f"{dish['name']} + 米饭", "url": dish["url"]} for dish in veg[:10]]
-    lunch_recipes += [{"name": f"{dish['name']} + 米饭", "url": dish["url"]} for dish in aquatic[:5]]
+    lunch_recipes = [_entry(f"{dish['name']} + 青菜 + 米饭", dish) for dish in meat[:20]]
+    lunch_recipes += [_entry(f"{dish['name']} + 米饭", dish) for dish in veg[:10]]
+    lunch_recipes += [_entry(f"{dish['name']} + 米饭", dish) for dish in aquatic[:5]]
     # 晚餐
-    dinner_recipes = [{"name": f"{dish['name']} + 米饭", "url": dish["url"]} for dish in veg[10:25]]
-    dinner_recipes += [{"name": f"{dish['name']} + 米饭", "url": dish["url"]} for dish in meat[20:35]]
-    dinner_recipes += [{"name": f"{dish['name']} + 米饭", "url": dish["url"]} for dish in soup[:10]]
+    dinner_recipes = [_entry(f"{dish['name']} + 米饭", dish) for dish in veg[10:25]]
+    dinner_recipes += [_entry(f"{dish['name']} + 米饭", dish) for dish in meat[20:35]]
+    dinner_recipes += [_entry(f"{dish['name']} + 米饭", dish) for dish in soup[:10]]
     # 加餐
-    snack_recipes = [{"name": dish['name'], "url": dish["url"]} for dish in dessert[:10]]
+    snack_recipes = [_entry(dish['name'], dish) for dish in dessert[:10]]
     snack_recipes += [{"name": fruit, "url": ""} for fruit in ['苹果', '香蕉', '橙子', '葡萄', '草莓', '蓝莓', '猕猴桃', '柚子', '梨', '桃子']]
 
-    RECIPES_DATABASE = {
+    return {
         '早餐': breakfast_recipes,
         '午餐': lunch_recipes,
         '晚餐': dinner_recipes,
         '加餐': snack_recipes
     }
 
+
+def database_hash(RECIPES_DATABASE):
+    """菜谱数据库内容的哈希，用于判断输出文件是否需要重写"""
+    data = json.dumps(RECIPES_DATABASE, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+
+
+def _write_manifest(path, manifest):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def write_outputs(RECIPES_DATABASE):
+    """保存为py、json和SQLite菜谱库"""
     # 保存为py
     with open('recipes_database.py', 'w', encoding='utf-8') as f:
         f.write('# 自动生成的菜谱数据库\n')
@@ -76,7 +255,45 @@ def main():
     # 保存为json
     with open('recipes_database.json', 'w', encoding='utf-8') as f:
         json.dump(RECIPES_DATABASE, f, ensure_ascii=False, indent=2)
-    print('已生成 recipes_database.py 和 recipes_database.json')
+    # 保存为带索引的SQLite菜谱库
+    write_sqlite_catalog(RECIPES_DATABASE, 'recipes_database.sqlite')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="从HowToCook生成菜谱数据库（增量构建）")
+    parser.add_argument('--base', default='HowToCook/dishes', help="HowToCook的dishes目录")
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help="构建清单路径")
+    parser.add_argument('--force', action='store_true', help="忽略清单，全部重新构建")
+    parser.add_argument('--jobs', type=int, default=None, help="并行扫描的线程数")
+    args = parser.parse_args(argv)
+
+    manifest = {} if args.force else load_manifest(args.manifest)
+    dishes_by_category, new_manifest, changed = scan_all(args.base, manifest, args.jobs)
+
+    # 模式版本或标签关键词分组变化后，已生成的SQLite菜谱库中的标签位图失效，必须重新生成
+    reusable = bool(manifest) and manifest.get('build') == new_manifest['build'] and all(
+        os.path.exists(path) for path in OUTPUT_FILES
+    )
+    if reusable and new_manifest['catalog_version'] == manifest.get('catalog_version'):
+        # 菜品集合和内容都没变，只更新清单中的修改时间
+        new_manifest['database_hash'] = manifest.get('database_hash')
+        _write_manifest(args.manifest, new_manifest)
+        print('菜谱没有变化，跳过生成')
+        return
+
+    RECIPES_DATABASE = build_recipes_database(dishes_by_category)
+    new_manifest['database_hash'] = database_hash(RECIPES_DATABASE)
+    for category_dir, names in changed.items():
+        print(f"  {category_dir}: {len(names)} 道菜有变化")
+    if reusable and new_manifest['database_hash'] == manifest.get('database_hash'):
+        # 变化的内容（如做法步骤）不影响菜谱数据库
+        _write_manifest(args.manifest, new_manifest)
+        print('菜谱数据库内容没有变化，跳过写出')
+        return
+
+    write_outputs(RECIPES_DATABASE)
+    _write_manifest(args.manifest, new_manifest)
+    print('已生成 recipes_database.py、recipes_database.json 和 recipes_database.sqlite')
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+按需的请求级性能剖析。
+
+默认关闭。设置 PROFILE_REQUESTS=1 剖析全部请求，或设置 PROFILE_SAMPLE_RATE=0.01
+按比例抽样。被剖析的请求用 cProfile 记录函数耗时、用 tracemalloc 记录请求期间的内存分配，
+结果写入 PROFILE_DIR（默认 ./profiles）：
+    <时间>-<处理函数>-<输入签名>.prof        cProfile 统计（pstats 可读）
+    <时间>-<处理函数>-<输入签名>.tracemalloc  请求结束时的分配快照（tracemalloc.Snapshot.load 可读）
+    <时间>-<处理函数>-<输入签名>.json        处理函数、输入签名、耗时和分配增长最多的代码行
+
+协程和异步生成器只在自身执行的片段中启用 cProfile，同一事件循环上的其他请求不会混进来；
+tracemalloc 是进程级的，并发请求的分配会出现在彼此的统计中。
+
+汇总：
+    python profiling.py report [目录] --top 20 [--handler meal_planner] [--sort tottime]
+输出耗时最多的函数、按筛选/格式化/获取归类的耗时占比，以及分配最多的代码行。
+
+cProfile、tracemalloc 和汇总用到的模块都在需要时才导入，未开启剖析时导入本模块几乎没有开销。
+"""
+import collections
+import functools
+import hashlib
+import inspect
+import json
+import os
+import random
+import threading
+import time
+
+PROFILE_ALL = os.environ.get("PROFILE_REQUESTS", "").lower() in ("1", "true", "yes", "all")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# 是否同时记录内存分配（tracemalloc 开销较大）
+PROFILE_MEMORY = os.environ.get("PROFILE_MEMORY", "1").lower() not in ("0", "false", "no")
+# tracemalloc 记录的调用栈深度
+TRACEMALLOC_FRAMES = int(os.environ.get("PROFILE_TRACEMALLOC_FRAMES", 1))
+# 元数据中保留的分配增长最多的代码行数
+TOP_ALLOCATIONS = 25
+
+# 汇总时按文件路径和函数名中的片段归类的阶段，按顺序取第一个命中的
+STAGE_PATTERNS = {
+    "筛选": ("recipe_index", "recipe_catalog", "plan_engine", "keyword_matcher", "planner.py", "sqlite3"),
+    "格式化": ("recipe_formatter", "festival_menu", "format_", "/re/", "re.Pattern", "sre_"),
+    "获取": ("recipe_fetcher", "recipe_cache", "single_flight", "/requests/", "urllib3", "httpx", "httpcore",
+             "ssl", "socket", "selectors", "http/client")
+}
+
+_local = threading.local()
+_memory_lock = threading.Lock()
+_memory_users = 0
+_memory_started = False
+
+
+def should_profile():
+    """本次请求是否需要剖析"""
+    if PROFILE_ALL:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def input_signature(args, kwargs):
+    """输入的签名：参数repr的短哈希，相同输入的剖析文件名相同"""
+    text = repr((args, sorted(kwargs.items())))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def _start_memory():
+    global _memory_users, _memory_started
+    import tracemalloc
+    with _memory_lock:
+        if _memory_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _memory_started = True
+        _memory_users += 1
+    return tracemalloc.take_snapshot()
+
+
+def _stop_memory():
+    global _memory_users, _memory_started
+    import tracemalloc
+    snapshot = tracemalloc.take_snapshot()
+    with _memory_lock:
+        _memory_users -= 1
+        if _memory_users == 0 and _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+    return snapshot
+
+
+class _Session:
+    """一次被剖析的请求"""
+
+    def __init__(self, handler, args, kwargs):
+        self.handler = handler
+        self.signature = input_signature(args, kwargs)
+        self.inputs = repr((args, kwargs))[:500]
+        import cProfile
+        self.profile = cProfile.Profile()
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.memory_before = _start_memory() if PROFILE_MEMORY else None
+
+    def enable(self):
+        """在当前线程启用剖析，当前线程已有剖析（嵌套调用）时返回False"""
+        if getattr(_local, "active", False):
+            return False
+        _local.active = True
+        self.profile.enable()
+        return True
+
+    def disable(self):
+        self.profile.disable()
+        _local.active = False
+
+    def finish(self, error=None):
+        """写出剖析文件，写入失败不影响请求本身"""
+        duration = time.perf_counter() - self.start
+        memory_after = _stop_memory() if self.memory_before is not None else None
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        stamp += f"{self.started_at % 1:.6f}"[1:]
+        base = os.path.join(PROFILE_DIR, f"{stamp}-{self.handler}-{self.signature}")
+        meta = {
+            "handler": self.handler,
+            "signature": self.signature,
+            "inputs": self.inputs,
+            "started_at": self.started_at,
+            "duration": duration,
+            "error": type(error).__name__ if error is not None else None
+        }
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            self.profile.dump_stats(base + ".prof")
+            if memory_after is not None:
+                memory_after.dump(base + ".tracemalloc")
+                diff = memory_after.compare_to(self.memory_before, "lineno")
+                meta["allocations"] = [
+                    {"location": str(stat.traceback[0]), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                    for stat in diff[:TOP_ALLOCATIONS] if stat.size_diff > 0
+                ]
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"⚠️ 写入剖析文件失败: {e}")
+
+
+def _begin(handler, args, kwargs):
+    """需要剖析时开始一个会话；当前线程已在剖析中（嵌套的处理函数）时不再开始"""
+    if getattr(_local, "active", False) or not should_profile():
+        return None
+    return _Session(handler, args, kwargs)
+
+
+class _Stepper:
+    """逐步驱动协程，只在协程自身执行的片段中启用剖析"""
+
+    def __init__(self, coro, session):
+        self.coro = coro
+        self.session = session
+
+    def __await__(self):
+        value = None
+        error = None
+        while True:
+            enabled = self.session.enable()
+            try:
+                if error is not None:
+                    step = self.coro.throw(error)
+                else:
+                    step = self.coro.send(value)
+            except StopIteration as e:
+                return e.value
+            finally:
+                if enabled:
+                    self.session.disable()
+            try:
+                value = yield step
+                error = None
+            except BaseException as e:
+                value = None
+                error = e
+
+
+def profiled(handler=None):
+    """按需剖析处理函数
+
+    未开启剖析时只多一次判断；开启后对抽中的请求记录 cProfile 和 tracemalloc，
+    支持普通函数、协程函数和异步生成器，functools.wraps 保留原函数的名称、签名和文档。
+
+    Args:
+        handler: 剖析文件中的处理函数名，默认使用函数名
+
+    Returns:
+        装饰器
+    """
+    def decorator(fn):
+        name = handler or fn.__name__
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                session = _begin(name, args, kwargs)
+                if session is None:
+                    async for item in fn(*args, **kwargs):
+                        yield item
+                    return
+                stream = fn(*args, **kwargs)
+                error = None
+                try:
+                    while True:
+                        try:
+                            item = await _Stepper(stream.__anext__(), session)
+                        except StopAsyncIteration:
+                            break
+                        yield item
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    await stream.aclose()
+                    session.finish(error)
+        elif inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                session = _begin(name, args, kwargs)
+                if session is None:
+                    return await fn(*args, **kwargs)
+                error = None
+                try:
+                    return await _Stepper(fn(*args, **kwargs), session)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    session.finish(error)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                session = _begin(name, args, kwargs)
+                if session is None:
+                    return fn(*args, **kwargs)
+                error = None
+                enabled = session.enable()
+                try:
+                    return fn(*args, **kwargs)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    if enabled:
+                        session.disable()
+                    session.finish(error)
+        return wrapper
+
+    return decorator
+
+
+# ---------- 汇总 ----------
+
+def stage_of(filename, func=""):
+    """按文件路径和函数名把函数归入筛选、格式化、获取或其他"""
+    text = filename.replace("\\", "/") + ":" + func
+    for stage, patterns in STAGE_PATTERNS.items():
+        if any(pattern in text for pattern in patterns):
+            return stage
+    return "其他"
+
+
+def load_profiles(directory, handler=None):
+    """读取目录中的剖析元数据
+
+    Returns:
+        [(文件名前缀, 元数据)]，按开始时间排序
+    """
+    import glob
+    profiles = []
+    for meta_path in glob.glob(os.path.join(directory, "*.json")):
+        base = meta_path[:-len(".json")]
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if handler and meta.get("handler") != handler:
+            continue
+        if os.path.exists(base + ".prof"):
+            profiles.append((base, meta))
+    profiles.sort(key=lambda item: item[1].get("started_at", 0))
+    return profiles
+
+
+def aggregate(profiles, top=20, sort="cumulative"):
+    """合并多个剖析文件
+
+    Returns:
+        {"requests", "handlers", "functions", "stages", "allocations"}
+    """
+    import pstats
+    stats = pstats.Stats(*(base + ".prof" for base, _ in profiles))
+    total = stats.total_tt or 1e-12
+    column = 5 if sort == "cumulative" else 4
+    rows = []
+    stages = collections.Counter()
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append((filename, line, func, nc, tt, ct))
+        stages[stage_of(filename, func)] += tt
+    rows.sort(key=lambda row: row[column], reverse=True)
+
+    handlers = collections.defaultdict(list)
+    allocations = collections.Counter()
+    for _, meta in profiles:
+        handlers[meta["handler"]].append(meta["duration"])
+        for item in meta.get("allocations", ()):
+            allocations[item["location"]] += item["size_diff"]
+
+    return {
+        "requests": len(profiles),
+        "handlers": {
+            name: {"count": len(durations), "mean": sum(durations) / len(durations), "max": max(durations)}
+            for name, durations in handlers.items()
+        },
+        "functions": [
+            {
+                "function": f"{os.path.basename(filename)}:{line}({func})",
+                "calls": nc,
+                "tottime": tt,
+                "cumtime": ct
+            }
+            for filename, line, func, nc, tt, ct in rows[:top]
+        ],
+        "stages": {stage: seconds / total for stage, seconds in stages.most_common()},
+        "allocations": allocations.most_common(top)
+    }
+
+
+def format_report(report):
+    """汇总结果的文本形式"""
+    parts = [f"📊 共 {report['requests']} 个请求\n"]
+    for name, info in sorted(report["handlers"].items()):
+        parts.append(f"   {name}: {info['count']}次，平均 {info['mean'] * 1000:.1f}ms，最长 {info['max'] * 1000:.1f}ms\n")
+    parts.append("\n⏱️ 各阶段自身耗时占比：\n")
+    for stage, share in report["stages"].items():
+        parts.append(f"   {stage}: {share:.1%}\n")
+    parts.append("\n🔥 耗时最多的函数：\n")
+    parts.append(f"   {'调用次数':>10} {'自身(s)':>10} {'累计(s)':>10}  函数\n")
+    for row in report["functions"]:
+        parts.append(f"   {row['calls']:>10} {row['tottime']:>10.4f} {row['cumtime']:>10.4f}  {row['function']}\n")
+    if report["allocations"]:
+        parts.append("\n🧠 分配最多的代码行：\n")
+        for location, size in report["allocations"]:
+            parts.append(f"   {size / 1024:>10.1f} KiB  {location}\n")
+    return "".join(parts)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="汇总请求剖析文件")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report = subparsers.add_parser("report", help="汇总耗时最多的函数和分配最多的代码行")
+    report.add_argument("directory", nargs="?", default=PROFILE_DIR, help="剖析文件目录")
+    report.add_argument("--top", type=int, default=20, help="显示前N项")
+    report.add_argument("--handler", default=None, help="只汇总某个处理函数")
+    report.add_argument("--sort", choices=["cumulative", "tottime"], default="cumulative", help="函数排序方式")
+    report.add_argument("--json", action="store_true", help="以JSON输出")
+    args = parser.parse_args(argv)
+
+    profiles = load_profiles(args.directory, args.handler)
+    if not profiles:
+        print(f"❌ {args.directory} 中没有剖析文件")
+        return 1
+    result = aggregate(profiles, args.top, args.sort)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(result), end="")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
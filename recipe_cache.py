@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+菜品做法缓存。
+
+两级缓存：进程内LRU + 磁盘存储（重启后仍然有效），两级都按总字节数淘汰。
+缓存条目超过TTL后需要向上游做条件请求（ETag / Last-Modified）重新验证，
+上游不可用时可以直接使用缓存中的旧内容。
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+# 默认配置，可通过环境变量覆盖
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RECIPE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".recipe_cache")
+)
+DEFAULT_TTL = float(os.environ.get("RECIPE_CACHE_TTL", 24 * 3600))
+DEFAULT_MEMORY_BYTES = int(os.environ.get("RECIPE_CACHE_MEMORY_BYTES", 32 * 1024 * 1024))
+DEFAULT_DISK_BYTES = int(os.environ.get("RECIPE_CACHE_DISK_BYTES", 256 * 1024 * 1024))
+
+
+def _entry_size(entry):
+    return len(entry["content"].encode("utf-8")) + 256
+
+
+class RecipeCache:
+    """菜品做法的两级缓存
+
+    缓存条目是一个字典：
+        {"url", "content", "etag", "last_modified", "fetched_at"}
+
+    Args:
+        cache_dir: 磁盘缓存目录，为None时只使用内存缓存
+        ttl: 条目的新鲜期（秒），过期后需要重新验证
+        max_memory_bytes: 内存缓存的总字节上限
+        max_disk_bytes: 磁盘缓存的总字节上限
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL,
+                 max_memory_bytes=DEFAULT_MEMORY_BYTES, max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()
+        self._memory_bytes = 0
+        # 磁盘索引: 文件名 -> [大小, 最近访问时间]
+        self._disk = {}
+        self._disk_bytes = 0
+        # 磁盘索引在第一次读写磁盘时才建立，目录在第一次写入时才创建，导入模块没有文件系统副作用
+        self._disk_loaded = not cache_dir
+
+    # ---------- 对外接口 ----------
+
+    def get(self, url):
+        """读取缓存条目（不论是否过期），不存在时返回None"""
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+                return entry
+        entry = self._read_disk(url)
+        if entry is not None:
+            with self._lock:
+                self._remember(url, entry)
+        return entry
+
+    def is_fresh(self, entry):
+        """条目是否仍在新鲜期内"""
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def validators(self, entry):
+        """生成条件请求头"""
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, content, etag=None, last_modified=None):
+        """写入新内容，返回写入的条目"""
+        entry = {
+            "url": url,
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time()
+        }
+        with self._lock:
+            self._remember(url, entry)
+        self._write_disk(url, entry)
+        return entry
+
+    def touch(self, url):
+        """上游返回304时刷新条目的新鲜期"""
+        entry = self.get(url)
+        if entry is None:
+            return None
+        entry = dict(entry, fetched_at=time.time())
+        with self._lock:
+            self._remember(url, entry)
+        self._write_disk(url, entry)
+        return entry
+
+    def clear(self):
+        """清空两级缓存"""
+        self._ensure_disk_index()
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            names = list(self._disk)
+        for name in names:
+            self._remove_disk(name)
+
+    # ---------- 内存缓存 ----------
+
+    def _remember(self, url, entry):
+        old = self._memory.pop(url, None)
+        if old is not None:
+            self._memory_bytes -= old["_size"]
+        entry = dict(entry, _size=_entry_size(entry))
+        if entry["_size"] > self.max_memory_bytes:
+            return
+        self._memory[url] = entry
+        self._memory_bytes += entry["_size"]
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted["_size"]
+
+    # ---------- 磁盘缓存 ----------
+
+    def _file_name(self, url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+
+    def _ensure_disk_index(self):
+        """第一次访问磁盘缓存时扫描目录，建立 文件名 -> [大小, 最近访问时间] 的索引"""
+        if self._disk_loaded:
+            return
+        with self._lock:
+            if self._disk_loaded:
+                return
+            try:
+                with os.scandir(self.cache_dir) as it:
+                    for item in it:
+                        if item.is_file() and item.name.endswith(".json"):
+                            stat = item.stat()
+                            self._disk[item.name] = [stat.st_size, stat.st_mtime]
+                            self._disk_bytes += stat.st_size
+            except FileNotFoundError:
+                pass
+            self._disk_loaded = True
+
+    def _read_disk(self, url):
+        if not self.cache_dir:
+            return None
+        self._ensure_disk_index()
+        name = self._file_name(url)
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            if name in self._disk:
+                self._disk[name][1] = now
+        return entry
+
+    def _write_disk(self, url, entry):
+        if not self.cache_dir:
+            return
+        name = self._file_name(url)
+        path = os.path.join(self.cache_dir, name)
+        data = json.dumps({k: v for k, v in entry.items() if not k.startswith("_")}, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_disk_bytes:
+            return
+        self._ensure_disk_index()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            old = self._disk.get(name)
+            if old is not None:
+                self._disk_bytes -= old[0]
+            self._disk[name] = [size, time.time()]
+            self._disk_bytes += size
+            victims = self._disk_victims()
+        for victim in victims:
+            self._remove_disk(victim)
+
+    def _disk_victims(self):
+        """超出上限时按最近访问时间淘汰到上限的90%"""
+        if self._disk_bytes <= self.max_disk_bytes:
+            return []
+        target = self.max_disk_bytes * 0.9
+        victims = []
+        remaining = self._disk_bytes
+        for name, (size, _) in sorted(self._disk.items(), key=lambda item: item[1][1]):
+            if remaining <= target:
+                break
+            victims.append(name)
+            remaining -= size
+        return victims
+
+    def _remove_disk(self, name):
+        with self._lock:
+            info = self._disk.pop(name, None)
+            if info is not None:
+                self._disk_bytes -= info[0]
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
@@ -0,0 +1,499 @@
+# -*- coding: utf-8 -*-
+"""
+菜谱数据库的加载。
+
+除了 recipes_database.py / recipes_database.json，process_recipes.py 还会生成
+带索引的SQLite菜谱库 recipes_database.sqlite。SQLite菜谱库以只读、内存映射方式打开，
+启动时不读取任何菜品，候选筛选、模糊搜索和精确查找都直接查询索引，
+启动时间和常驻内存不随菜谱数量增长。
+菜品的标签位图（含根据原料判断的口味偏好标签）在生成时预先计算好，筛选只做整数位运算。
+"""
+import collections.abc
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
+import threading
+import urllib.parse
+
+from keyword_matcher import exclusion_automaton
+from recipe_index import (
+    DISH_CLASSIFIER, DISH_TAG_GROUPS, INGREDIENT_FALSE_FRIENDS, INGREDIENT_KEYWORDS, TASTE_KEYWORDS,
+    CandidateIndex, SearchIndex, dish_tags, exclusion_text, match_score, name_ngrams, normalize_name,
+    recipe_ingredients, recipe_name, strip_dairy
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SQLITE_PATH = os.path.join(BASE_DIR, "recipes_database.sqlite")
+DEFAULT_PY_PATH = os.path.join(BASE_DIR, "recipes_database.py")
+
+SCHEMA_VERSION = "2"
+
+# 变体：0为原始菜品，1为去掉乳制品搭配后的早餐
+VARIANT_NORMAL = 0
+VARIANT_DAIRY_FREE = 1
+
+# SQLite内存映射大小
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+# 搜索时参与求交集的二元组上限：SQLite复合查询的项数有限制（默认500），
+# 长查询只取最少见的几个二元组缩小候选，其余由子串验证保证结果与内存索引一致
+MAX_QUERY_GRAMS = 8
+# 单条语句中绑定参数的数量上限（兼容旧版SQLite的999）
+SQLITE_MAX_PARAMS = 900
+
+# 默认菜谱数据库（未生成 recipes_database.py 时作为备用）
+DEFAULT_RECIPES_DATABASE = {
+    "早餐": [
+        "牛奶燕麦粥 + 水煮蛋 + 水果",
+        "全麦面包 + 煎蛋 + 牛奶",
+        "小米粥 + 咸菜 + 馒头",
+        "豆浆 + 油条 + 小菜",
+        "酸奶 + 坚果 + 全麦饼干",
+        "鸡蛋羹 + 白粥 + 咸菜",
+        "牛奶 + 面包片 + 香蕉"
+    ],
+    "午餐": [
+        "红烧肉 + 青菜 + 米饭",
+        "宫保鸡丁 + 土豆丝 + 米饭",
+        "鱼香肉丝 + 青椒 + 米饭",
+        "麻婆豆腐 + 青菜 + 米饭",
+        "糖醋里脊 + 胡萝卜 + 米饭",
+        "蒜蓉西兰花 + 鸡胸肉 + 米饭",
+        "番茄炒蛋 + 青菜 + 米饭"
+    ],
+    "晚餐": [
+        "清蒸鱼 + 青菜 + 米饭",
+        "红烧茄子 + 鸡胸肉 + 米饭",
+        "蒜蓉菠菜 + 鸡蛋 + 米饭",
+        "青椒土豆丝 + 瘦肉 + 米饭",
+        "番茄蛋汤 + 青菜 + 米饭",
+        "蒸蛋羹 + 青菜 + 米饭",
+        "豆腐汤 + 青菜 + 米饭"
+    ],
+    "加餐": [
+        "苹果",
+        "香蕉",
+        "橙子",
+        "酸奶",
+        "坚果",
+        "全麦饼干",
+        "牛奶"
+    ]
+}
+
+
+def catalog_source_path():
+    """load_recipes_database 将要加载的文件路径，使用默认菜谱数据库时为None
+
+    依次尝试：环境变量 RECIPES_CATALOG 指定的 .sqlite/.json 文件、
+    process_recipes.py 生成的 recipes_database.sqlite、recipes_database.py。
+    """
+    path = os.environ.get("RECIPES_CATALOG", "")
+    if path:
+        return path
+    if os.path.exists(DEFAULT_SQLITE_PATH):
+        return DEFAULT_SQLITE_PATH
+    if os.path.exists(DEFAULT_PY_PATH):
+        return DEFAULT_PY_PATH
+    return None
+
+
+def load_catalog_file(path):
+    """加载一个菜谱库文件（.sqlite、.json 或 recipes_database.py）
+
+    Returns:
+        {餐次: [菜品, ...]}，SQLite菜谱库返回行为相同的 SQLiteCatalog
+    """
+    name = os.path.basename(path)
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            database = json.load(f)
+        print(f"✅ 成功从 {name} 加载菜谱数据库")
+        return database
+    if path.endswith(".py"):
+        # 每次都重新执行文件，热加载时能读到新内容
+        spec = importlib.util.spec_from_file_location("recipes_database", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        print(f"✅ 成功从 {name} 导入菜谱数据库")
+        return module.RECIPES_DATABASE
+    print(f"✅ 成功打开菜谱库 {name}")
+    return SQLiteCatalog(path)
+
+
+def load_recipes_database():
+    """加载菜谱数据库
+
+    文件的查找顺序见 catalog_source_path，都找不到时使用默认菜谱数据库。
+
+    Returns:
+        {餐次: [菜品, ...]}，SQLite菜谱库返回行为相同的 SQLiteCatalog
+    """
+    path = catalog_source_path()
+    if path is None:
+        print("⚠️ 未找到 recipes_database.py，使用默认菜谱数据库")
+        return DEFAULT_RECIPES_DATABASE
+    return load_catalog_file(path)
+
+
+def create_indexes(database):
+    """为菜谱数据库创建候选索引和搜索索引
+
+    Returns:
+        (CandidateIndex, 搜索索引)，搜索索引提供 search(query) 和 lookup(name)
+    """
+    if isinstance(database, SQLiteCatalog):
+        if database.tags_current:
+            return database.candidate_index(), database.search_index()
+        # 关键词分组在生成菜谱库之后发生了变化，预先计算的标签已失效
+        print("⚠️ 菜谱库中的标签已过期，请重新运行 process_recipes.py；暂时在内存中重建索引")
+        database = {meal_type: list(recipes) for meal_type, recipes in database.items()}
+    return CandidateIndex(database), SearchIndex(database)
+
+
+class CatalogSnapshot:
+    """某一时刻的菜谱库及其全部派生索引，创建后不再修改
+
+    热加载时整体替换，请求开始时取一次快照，之后始终使用同一份数据。
+    需要读取菜谱库的请求用 acquire/release 登记；被替换的快照 retire 后，
+    等最后一个读取者 release 时才关闭菜谱库（SQLite连接）。
+
+    Args:
+        database: {餐次: [菜品, ...]}
+        candidate_index: 候选索引
+        search_index: 搜索索引（模糊搜索和精确查找）
+        source: 加载的文件路径，默认菜谱数据库为None
+    """
+
+    __slots__ = ("database", "candidate_index", "search_index", "source", "_lock", "_readers", "_retired")
+
+    def __init__(self, database, candidate_index, search_index, source=None):
+        self.database = database
+        self.candidate_index = candidate_index
+        self.search_index = search_index
+        self.source = source
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._retired = False
+
+    def acquire(self):
+        """登记一个读取者
+
+        Returns:
+            是否成功，快照已经被替换时返回False，调用方应改用新的快照
+        """
+        with self._lock:
+            if self._retired:
+                return False
+            self._readers += 1
+            return True
+
+    def release(self):
+        """读取结束，快照已被替换且没有其他读取者时关闭"""
+        with self._lock:
+            self._readers -= 1
+            close = self._retired and not self._readers
+        if close:
+            self.close()
+
+    def retire(self):
+        """快照已被替换，之后不再接受新的读取者，没有读取者时立即关闭"""
+        with self._lock:
+            if self._retired:
+                return
+            self._retired = True
+            close = not self._readers
+        if close:
+            self.close()
+
+    def close(self):
+        """关闭菜谱库持有的资源，内存中的菜谱库没有需要关闭的资源"""
+        close = getattr(self.database, "close", None)
+        if close is not None:
+            close()
+
+
+def load_catalog_snapshot(path=None):
+    """加载菜谱库并构建全部索引
+
+    Args:
+        path: 菜谱库文件，默认按 load_recipes_database 的顺序查找
+
+    Returns:
+        CatalogSnapshot
+    """
+    if path is None:
+        path = catalog_source_path()
+    database = load_recipes_database() if path is None else load_catalog_file(path)
+    candidate_index, search_index = create_indexes(database)
+    return CatalogSnapshot(database, candidate_index, search_index, path)
+
+
+def _tag_groups_signature():
+    data = json.dumps([DISH_TAG_GROUPS, INGREDIENT_KEYWORDS, INGREDIENT_FALSE_FRIENDS], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def build_signature():
+    """生成菜谱库时的模式版本和关键词分组签名，任一变化后已生成的菜谱库都需要重新生成"""
+    return f"{SCHEMA_VERSION}:{_tag_groups_signature()}"
+
+
+def write_sqlite_catalog(database, path):
+    """把菜谱数据库写成带索引的SQLite文件
+
+    Args:
+        database: {餐次: [菜品, ...]}
+        path: 输出路径（先写临时文件再原子替换）
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE meal_types (position INTEGER PRIMARY KEY, name TEXT NOT NULL);
+            CREATE TABLE recipes (
+                id INTEGER PRIMARY KEY,
+                meal_type TEXT NOT NULL,
+                variant INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                url TEXT NOT NULL,
+                is_dict INTEGER NOT NULL,
+                exact_key TEXT NOT NULL,
+                tags INTEGER NOT NULL,
+                ingredients TEXT NOT NULL
+            );
+            CREATE TABLE grams (gram TEXT NOT NULL, recipe_id INTEGER NOT NULL, PRIMARY KEY (gram, recipe_id)) WITHOUT ROWID;
+        """)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("schema_version", SCHEMA_VERSION),
+            ("tag_groups", _tag_groups_signature()),
+            ("tag_names", json.dumps(DISH_CLASSIFIER.tags, ensure_ascii=False))
+        ])
+        conn.executemany("INSERT INTO meal_types VALUES (?, ?)", list(enumerate(database)))
+
+        rows = []
+        grams = []
+        for meal_type, recipes in database.items():
+            variants = [(VARIANT_NORMAL, recipes)]
+            if meal_type == "早餐":
+                stripped = [strip_dairy(r) for r in recipes]
+                variants.append((VARIANT_DAIRY_FREE, [r for r in stripped if r is not None]))
+            for variant, items in variants:
+                for recipe in items:
+                    name = recipe_name(recipe)
+                    is_dict = isinstance(recipe, dict)
+                    url = recipe.get("url", "") if is_dict else ""
+                    exact_key = normalize_name(name.split(" + ")[0] if is_dict else name)
+                    recipe_id = len(rows) + 1
+                    ingredients = recipe_ingredients(recipe)
+                    rows.append((recipe_id, meal_type, variant, name, url, int(is_dict), exact_key, dish_tags(recipe),
+                                 json.dumps(list(ingredients), ensure_ascii=False) if ingredients else ""))
+                    if variant == VARIANT_NORMAL:
+                        grams.extend((gram, recipe_id) for gram in name_ngrams(name.lower()))
+        conn.executemany("INSERT INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO grams VALUES (?, ?)", grams)
+        conn.executescript("""
+            CREATE INDEX idx_recipes_pool ON recipes (meal_type, variant, id);
+            CREATE INDEX idx_recipes_exact ON recipes (exact_key, variant, id);
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+class SQLiteCatalog(collections.abc.Mapping):
+    """只读的SQLite菜谱库
+
+    行为与 {餐次: [菜品, ...]} 字典相同，某个餐次的菜品列表在第一次访问时才读取。
+    每个线程使用独立的只读连接，数据库文件通过mmap映射；
+    全部连接都登记在案，close 时一起关闭（热加载替换快照时由 CatalogSnapshot 调用）。
+
+    Args:
+        path: recipes_database.sqlite 的路径
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._closed = False
+        self._lists = {}
+        conn = self.connection()
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        if meta.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(f"不支持的菜谱库版本: {meta.get('schema_version')}")
+        self.tags_current = meta.get("tag_groups") == _tag_groups_signature()
+        self._meal_types = [name for (name,) in conn.execute("SELECT name FROM meal_types ORDER BY position")]
+
+    def connection(self):
+        """当前线程的只读连接"""
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"菜谱库已关闭: {self.path}")
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = "file:" + urllib.parse.quote(self.path) + "?mode=ro"
+            # 连接只在创建它的线程中使用，但 close 可能在热加载线程中调用
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            with self._connections_lock:
+                if self._closed:
+                    conn.close()
+                    raise sqlite3.ProgrammingError(f"菜谱库已关闭: {self.path}")
+                self._connections.append(conn)
+            conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """关闭全部线程的连接，之后不能再读取"""
+        with self._connections_lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def __getitem__(self, meal_type):
+        recipes = self._lists.get(meal_type)
+        if recipes is None:
+            if meal_type not in self._meal_types:
+                raise KeyError(meal_type)
+            recipes = self._lists[meal_type] = self.query_recipes(
+                "WHERE meal_type = ? AND variant = ? ORDER BY id", (meal_type, VARIANT_NORMAL)
+            )
+        return recipes
+
+    def __iter__(self):
+        return iter(self._meal_types)
+
+    def __len__(self):
+        return len(self._meal_types)
+
+    def __contains__(self, meal_type):
+        return meal_type in self._meal_types
+
+    def query_recipes(self, where, params=()):
+        """按条件读取菜品，返回与 RECIPES_DATABASE 相同格式的列表"""
+        cursor = self.connection().execute(f"SELECT name, url, is_dict, ingredients FROM recipes {where}", params)
+        recipes = []
+        for name, url, is_dict, ingredients in cursor:
+            if not is_dict:
+                recipes.append(name)
+            elif ingredients:
+                recipes.append({"name": name, "url": url, "ingredients": json.loads(ingredients)})
+            else:
+                recipes.append({"name": name, "url": url})
+        return recipes
+
+    def candidate_index(self):
+        """基于SQL查询的候选索引"""
+        pools = {meal_type: SQLiteCandidatePool(self, meal_type, VARIANT_NORMAL) for meal_type in self._meal_types}
+        dairy_free_breakfast = SQLiteCandidatePool(self, "早餐", VARIANT_DAIRY_FREE)
+        fruit_bit = DISH_CLASSIFIER.tag_bit("水果")
+        fruits = self.query_recipes(
+            "WHERE meal_type = '加餐' AND variant = ? AND (tags & ?) != 0 ORDER BY id", (VARIANT_NORMAL, fruit_bit)
+        )
+        return CandidateIndex.from_pools(pools, dairy_free_breakfast, fruits)
+
+    def search_index(self):
+        """基于SQL查询的搜索索引"""
+        return SQLiteSearchIndex(self)
+
+
+class SQLiteCandidatePool:
+    """SQLite菜谱库中一个餐次的候选池，筛选条件直接在预先计算的标签位上执行"""
+
+    def __init__(self, catalog, meal_type, variant):
+        self.catalog = catalog
+        self.meal_type = meal_type
+        self.variant = variant
+
+    def filter(self, health_goal, taste_preferences, exclude_terms=()):
+        """筛选候选菜品，增肌时优先选择高蛋白菜品"""
+        excluded = 0
+        if health_goal == "减脂":
+            excluded |= DISH_CLASSIFIER.tag_bit("减脂排除")
+        for pref in taste_preferences:
+            if pref not in TASTE_KEYWORDS:
+                raise KeyError(pref)
+            excluded |= DISH_CLASSIFIER.tag_bit(pref)
+        where = "WHERE meal_type = ? AND variant = ? AND (tags & ?) = 0"
+        params = (self.meal_type, self.variant, excluded)
+        if health_goal == "增肌":
+            protein_bit = DISH_CLASSIFIER.tag_bit("高蛋白")
+            protein = self._query(where + " AND (tags & ?) != 0", params + (protein_bit,), exclude_terms)
+            if protein:
+                return protein
+        return self._query(where, params, exclude_terms)
+
+    def _query(self, where, params, exclude_terms):
+        recipes = self.catalog.query_recipes(where + " ORDER BY id", params)
+        if exclude_terms:
+            automaton = exclusion_automaton(exclude_terms)
+            recipes = [r for r in recipes if not automaton.contains_any(exclusion_text(r))]
+        return tuple(recipes)
+
+
+class SQLiteSearchIndex:
+    """SQLite菜谱库的搜索索引，与 SearchIndex 接口相同"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def _info(self, name, url, meal_type):
+        return {"name": name, "url": url, "category": meal_type}
+
+    @staticmethod
+    def _rarest_grams(conn, grams):
+        """按倒排表长度取最少见的 MAX_QUERY_GRAMS 个二元组，有二元组不存在时返回空列表"""
+        counts = {}
+        for start in range(0, len(grams), SQLITE_MAX_PARAMS):
+            batch = grams[start:start + SQLITE_MAX_PARAMS]
+            placeholders = ", ".join("?" * len(batch))
+            counts.update(conn.execute(
+                f"SELECT gram, COUNT(*) FROM grams WHERE gram IN ({placeholders}) GROUP BY gram", batch
+            ))
+        if len(counts) < len(grams):
+            return []
+        return sorted(grams, key=counts.__getitem__)[:MAX_QUERY_GRAMS]
+
+    def search(self, query):
+        """查找名称（含搭配）包含查询串的菜品，按匹配质量排序"""
+        query = query.lower()
+        if not query:
+            return []
+        if len(query) == 1:
+            grams = [query]
+        else:
+            grams = sorted({query[i:i + 2] for i in range(len(query) - 1)})
+        conn = self.catalog.connection()
+        if len(grams) > MAX_QUERY_GRAMS:
+            grams = self._rarest_grams(conn, grams)
+            if not grams:
+                return []
+        intersect = " INTERSECT ".join(["SELECT recipe_id FROM grams WHERE gram = ?"] * len(grams))
+        cursor = conn.execute(
+            f"SELECT id, name, url, meal_type FROM recipes WHERE id IN ({intersect}) ORDER BY id", grams
+        )
+        hits = []
+        for recipe_id, name, url, meal_type in cursor:
+            display = name.lower()
+            if query in display:
+                hits.append((-match_score(query, display.split(" + ")[0]), recipe_id, name, url, meal_type))
+        hits.sort()
+        return [dict(self._info(name, url, meal_type), score=-neg_score) for neg_score, _, name, url, meal_type in hits]
+
+    def lookup(self, name):
+        """精确查找菜品，返回同名菜品信息列表（按数据库顺序）"""
+        cursor = self.catalog.connection().execute(
+            "SELECT name, url, meal_type FROM recipes WHERE exact_key = ? AND variant = ? ORDER BY id",
+            (normalize_name(name), VARIANT_NORMAL)
+        )
+        return [self._info(*row) for row in cursor]
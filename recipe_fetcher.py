@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+菜品做法的HTTP获取层。
+
+- 同步路径：共享一个带连接池的 requests.Session，复用TLS连接
+- 异步路径：基于 httpx.AsyncClient 的长连接池，每个主机限制并发数，每个请求有独立的截止时间
+
+requests、httpx 和 asyncio 都在第一次使用时才导入，导入本模块只加载标准库中的轻量模块。
+
+设置环境变量 RECIPE_RAW_BASE（如 http://127.0.0.1:8080）可以把
+raw.githubusercontent.com 替换成本地的HTTP桩服务，方便测试。
+"""
+import os
+import threading
+import urllib.parse
+import weakref
+
+RAW_GITHUB_BASE = "https://raw.githubusercontent.com"
+RAW_BASE = os.environ.get("RECIPE_RAW_BASE", RAW_GITHUB_BASE).rstrip("/")
+
+DEFAULT_TIMEOUT = float(os.environ.get("RECIPE_FETCH_TIMEOUT", 10))
+MAX_CONNECTIONS = int(os.environ.get("RECIPE_FETCH_MAX_CONNECTIONS", 32))
+# 一周规划最多28道菜，购物清单需要同时获取全部做法
+MAX_PER_HOST = int(os.environ.get("RECIPE_FETCH_MAX_PER_HOST", 32))
+
+
+def to_raw_url(url):
+    """将GitHub页面链接转换为raw链接
+
+    例如: https://github.com/Anduin2017/HowToCook/blob/master/dishes/breakfast/太阳蛋.md
+    转换为: https://raw.githubusercontent.com/Anduin2017/HowToCook/master/dishes/breakfast/太阳蛋.md
+    """
+    if "github.com" in url and "/blob/" in url:
+        raw_url = url.replace("github.com", "raw.githubusercontent.com").replace("/blob/", "/")
+    else:
+        raw_url = url
+    if RAW_BASE != RAW_GITHUB_BASE and raw_url.startswith(RAW_GITHUB_BASE):
+        raw_url = RAW_BASE + raw_url[len(RAW_GITHUB_BASE):]
+    return raw_url
+
+
+class FetchResult:
+    """一次HTTP请求的结果"""
+
+    def __init__(self, status_code, text, headers):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+
+
+# ---------- 同步路径 ----------
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """获取共享的 requests.Session（首次调用时创建）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=MAX_CONNECTIONS, pool_maxsize=MAX_PER_HOST)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def fetch(url, headers=None, timeout=DEFAULT_TIMEOUT):
+    """同步获取URL内容
+
+    Returns:
+        FetchResult
+    """
+    response = get_session().get(url, headers=headers or {}, timeout=timeout)
+    return FetchResult(response.status_code, response.text, response.headers)
+
+
+# ---------- 异步路径 ----------
+
+class _LoopClient:
+    """某个事件循环上的客户端、每主机信号量和负责关闭客户端的异步生成器"""
+
+    __slots__ = ("client", "host_limits", "closer")
+
+    def __init__(self, client):
+        self.client = client
+        self.host_limits = {}
+        self.closer = None
+
+
+class AsyncRecipeFetcher:
+    """带连接池和每主机并发限制的异步获取器
+
+    httpx.AsyncClient 绑定在创建它的事件循环上，每个事件循环使用自己的客户端和信号量。
+    客户端创建时在该事件循环上启动一个异步生成器，事件循环结束时
+    （asyncio.run 会调用 shutdown_asyncgens）由它关闭客户端，反复调用 asyncio.run 不会泄漏连接池。
+
+    Args:
+        max_connections: 连接池的总连接数上限
+        max_per_host: 每个主机同时进行的请求数上限
+        timeout: 默认的单个请求截止时间（秒）
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_per_host=MAX_PER_HOST, timeout=DEFAULT_TIMEOUT):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        # 事件循环 -> _LoopClient，事件循环被回收后条目自动删除
+        self._clients = weakref.WeakKeyDictionary()
+
+    async def _loop_client(self):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        state = self._clients.get(loop)
+        if state is None:
+            import httpx
+            state = self._clients[loop] = _LoopClient(httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=self.timeout,
+                follow_redirects=True
+            ))
+            # 第一次迭代把生成器登记到当前事件循环，循环结束时会被关闭
+            state.closer = self._close_on_shutdown(loop, state)
+            await state.closer.__anext__()
+        return state
+
+    async def _close_on_shutdown(self, loop, state):
+        try:
+            yield
+        finally:
+            if self._clients.get(loop) is state:
+                del self._clients[loop]
+            await state.client.aclose()
+
+    def _host_limit(self, state, url):
+        host = urllib.parse.urlsplit(url).netloc
+        limit = state.host_limits.get(host)
+        if limit is None:
+            import asyncio
+            limit = state.host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return limit
+
+    async def fetch(self, url, headers=None, deadline=None):
+        """异步获取URL内容
+
+        Args:
+            url: 要获取的URL
+            headers: 额外的请求头
+            deadline: 本次请求的截止时间（秒，包含排队等待），默认使用timeout
+
+        Returns:
+            FetchResult
+
+        Raises:
+            asyncio.TimeoutError: 超过截止时间
+        """
+        import asyncio
+        state = await self._loop_client()
+        client = state.client
+        limit = self._host_limit(state, url)
+        deadline = self.timeout if deadline is None else deadline
+
+        async def _do():
+            async with limit:
+                response = await client.get(url, headers=headers or {})
+                return FetchResult(response.status_code, response.text, response.headers)
+
+        return await asyncio.wait_for(_do(), timeout=deadline)
+
+    async def aclose(self):
+        """关闭当前事件循环上的连接池"""
+        import asyncio
+        state = self._clients.get(asyncio.get_running_loop())
+        if state is not None:
+            await state.closer.aclose()
+
+
+ASYNC_FETCHER = AsyncRecipeFetcher()
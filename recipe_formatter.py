@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+菜品做法的Markdown格式化。
+
+标题、链接、粗体、斜体、代码五种标记合并成一个预编译的正则，对全文只扫描一遍；
+标记内部的文本递归处理，对正常嵌套的标记，结果与逐行依次执行五次替换相同。
+格式化结果按 (内容哈希, 菜品名称) 缓存，同一道菜再次展示时不再重新格式化。
+"""
+import collections
+import hashlib
+import os
+import re
+import threading
+
+from metrics import FORMAT_CACHE_REQUESTS
+
+# 格式化结果缓存的条目上限
+MAX_FORMATTED_ENTRIES = int(os.environ.get("RECIPE_FORMAT_CACHE_SIZE", 1024))
+
+# 各分支依次为：标题、链接、粗体、斜体、代码；都不跨行
+_MARKDOWN = re.compile(
+    r"^#+[^\S\n]*"
+    r"|\[([^\]\n]+)\]\([^)\n]+\)"
+    r"|\*\*([^*\n]+)\*\*"
+    r"|\*([^*\n]+)\*"
+    r"|`([^`\n]+)`",
+    re.M
+)
+# 去掉标记后只剩空白的行
+_BLANK_LINES = re.compile(r"^[^\S\n]*(?:\n|$)", re.M)
+
+_formatted = collections.OrderedDict()
+_formatted_lock = threading.Lock()
+
+
+def _replace(match):
+    inner = match.group(match.lastindex) if match.lastindex else ""
+    # 标记内部可能还有其他行内标记（如链接文字中的粗体）
+    return _MARKDOWN.sub(_replace, inner) if "[" in inner or "*" in inner or "`" in inner else inner
+
+
+def strip_markdown(content):
+    """去掉Markdown标记和空行，保留文本内容"""
+    text = _MARKDOWN.sub(_replace, content)
+    return _BLANK_LINES.sub("", text).rstrip("\n")
+
+
+def format_recipe(content, recipe_name):
+    """格式化菜品做法，结果按内容哈希缓存
+
+    Args:
+        content: 原始Markdown内容
+        recipe_name: 菜品名称
+
+    Returns:
+        格式化的做法内容
+    """
+    key = (hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest(), recipe_name)
+    with _formatted_lock:
+        result = _formatted.get(key)
+        if result is not None:
+            _formatted.move_to_end(key)
+    if result is not None:
+        FORMAT_CACHE_REQUESTS.inc(result="hit")
+        return result
+    FORMAT_CACHE_REQUESTS.inc(result="miss")
+
+    result = f"🍽️ {recipe_name} 详细做法\n" + "═" * 50 + "\n\n" + strip_markdown(content)
+
+    with _formatted_lock:
+        _formatted[key] = result
+        while len(_formatted) > MAX_FORMATTED_ENTRIES:
+            _formatted.popitem(last=False)
+    return result
+
+
+def clear_format_cache():
+    """清空格式化结果缓存"""
+    with _formatted_lock:
+        _formatted.clear()
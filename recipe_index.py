@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+菜谱候选索引。
+
+在加载菜谱数据库时一次性为每个餐次计算健康目标、口味偏好和高蛋白菜品的位图，
+生成餐饮规划时只需对位图做与运算，再从结果中随机抽取，
+不再需要每天、每餐都重新扫描整个菜谱列表。
+菜品分类统一使用 keyword_matcher 中的关键词自动机，每个名称只扫描一遍。
+
+process_recipes.py 生成的菜品带有从菜谱原文解析出的原料列表（ingredients），
+口味偏好和高蛋白标签优先根据原料判断，没有原料信息的菜品（如默认数据库）才退回到按名称猜测。
+"""
+import collections
+import threading
+
+from keyword_matcher import compile_keywords, exclusion_automaton
+from metrics import CANDIDATE_CACHE_REQUESTS
+
+# 健康目标
+HEALTH_GOALS = ["无目标", "增肌", "减脂"]
+
+# 口味偏好关键词映射
+TASTE_KEYWORDS = {
+    "不要香菜": ["香菜"],
+    "不吃乳制品": ["奶", "牛奶", "奶酪", "芝士", "黄油", "乳", "酸奶", "蛋糕", "蛋挞"],
+    "不吃葱": ["葱"],
+    "素食": ["鸡", "鸭", "鱼", "肉", "牛", "排骨", "猪", "虾", "蟹", "肝", "鸡翅", "鸡胸", "鸡腿", "鸡蛋", "牛肉", "猪肉", "羊肉", "鸭肉", "鱼肉", "排骨", "虾仁", "蟹肉", "肝脏", "兔", "兔肉"],
+    "不吃辣": ["辣", "辣椒", "小米辣", "剁椒", "麻辣", "香辣", "泡椒", "青椒", "红椒", "干辣椒"]
+}
+
+# 减脂时需要排除的关键词
+FAT_LOSS_KEYWORDS = ["炸", "油炸", "甜品", "糖", "蛋糕", "奶茶", "甜汤"]
+
+# 高蛋白菜品关键词（增肌时优先选择）
+PROTEIN_KEYWORDS = ["鸡", "鸭", "鱼", "肉", "牛", "排骨", "猪", "蛋", "豆"]
+
+# 素食早餐无可选时用来补充的水果
+FRUIT_KEYWORDS = ["苹果", "香蕉", "橙子", "葡萄", "草莓", "蓝莓", "猕猴桃", "柚子", "梨", "桃子"]
+
+# 规划时用到的全部关键词分组，编译成一个自动机
+DISH_TAG_GROUPS = dict(TASTE_KEYWORDS, 减脂排除=FAT_LOSS_KEYWORDS, 高蛋白=PROTEIN_KEYWORDS, 水果=FRUIT_KEYWORDS)
+DISH_CLASSIFIER = compile_keywords(DISH_TAG_GROUPS)
+
+# 按原料判断的标签，匹配的是单个原料名而不是整个菜名
+# 素食覆盖 TASTE_KEYWORDS["素食"] 的全部荤菜关键词，另外加上名称里不带“肉”字的加工肉类、
+# 各种蛋、贝类和动物性调味料（蚝油、鱼露、猪油等）
+INGREDIENT_KEYWORDS = {
+    "不要香菜": ["香菜", "芫荽"],
+    "不吃乳制品": ["牛奶", "奶油", "黄油", "奶酪", "芝士", "酸奶", "炼乳", "奶粉", "淡奶", "乳酪", "马斯卡彭", "马苏里拉"],
+    "不吃葱": ["葱"],
+    "素食": ["鸡", "鸭", "鹅", "鱼", "肉", "牛", "羊", "猪", "排骨", "虾", "蟹", "贝", "蛤", "蚝", "鱿", "章鱼", "海参",
+           "肝", "腰子", "肚", "蛋", "兔", "火腿", "培根", "香肠", "腊肠", "猪油", "鸡精", "高汤", "鱼露", "蚝油"],
+    "不吃辣": ["辣椒", "小米辣", "朝天椒", "剁椒", "泡椒", "二荆条", "辣", "豆瓣酱", "火锅底料"],
+    "高蛋白": ["鸡", "鸭", "鹅", "鱼", "肉", "牛", "羊", "猪", "排骨", "虾", "蟹", "蛋", "豆腐", "豆干", "腐竹",
+            "黄豆", "毛豆", "牛奶", "酸奶"]
+}
+
+# 字面上包含关键词、实际上不属于该类的原料，判断前先去掉
+INGREDIENT_FALSE_FRIENDS = ["洋葱", "葱头", "肉桂", "肉豆蔻", "椰奶", "椰浆", "椰子油", "牛油果", "贝贝南瓜"]
+
+# 标签顺序与 DISH_CLASSIFIER 相同，两者的位图可以直接合并
+INGREDIENT_CLASSIFIER = compile_keywords({tag: INGREDIENT_KEYWORDS.get(tag, []) for tag in DISH_TAG_GROUPS})
+
+# 只能根据菜名判断的标签（烹饪方法、水果）
+NAME_ONLY_TAGS = DISH_CLASSIFIER.tag_bit("减脂排除") | DISH_CLASSIFIER.tag_bit("水果")
+
+# 自定义忌口位图的缓存上限（每个餐次）
+MAX_EXCLUSION_MASKS = 256
+
+# 候选列表缓存上限
+MAX_CACHED_CANDIDATES = 4096
+
+
+def recipe_name(recipe):
+    """获取菜品名称，兼容字典和字符串两种格式"""
+    return recipe["name"] if isinstance(recipe, dict) else recipe
+
+
+def recipe_ingredients(recipe):
+    """获取菜品的原料列表，没有原料信息时为空元组"""
+    if isinstance(recipe, dict):
+        return recipe.get("ingredients") or ()
+    return ()
+
+
+def check_taste_preferences(taste_preferences):
+    """检查口味偏好是否都是已知的选项
+
+    Raises:
+        ValueError: 有未知的偏好，异常信息为给用户的提示
+    """
+    unknown = [pref for pref in taste_preferences or () if pref not in TASTE_KEYWORDS]
+    if unknown:
+        raise ValueError(f"未知的口味偏好：{'、'.join(map(str, unknown))}，可选：{'、'.join(TASTE_KEYWORDS)}")
+
+
+def exclusion_text(recipe):
+    """自定义忌口匹配的文本：菜名和全部原料"""
+    ingredients = recipe_ingredients(recipe)
+    name = recipe_name(recipe)
+    return "\n".join((name,) + tuple(ingredients)) if ingredients else name
+
+
+def ingredient_mask(ingredients):
+    """根据原料列表计算标签位图"""
+    mask = 0
+    for ingredient in ingredients:
+        for word in INGREDIENT_FALSE_FRIENDS:
+            if word in ingredient:
+                ingredient = ingredient.replace(word, "")
+        mask |= INGREDIENT_CLASSIFIER.mask(ingredient)
+    return mask
+
+
+def dish_tags(recipe):
+    """计算菜品的标签位图
+
+    有原料信息时，主菜部分的口味偏好和高蛋白标签由原料决定，
+    减脂排除和水果仍按菜名判断；" + " 之后的搭配部分没有原料信息，按名称判断。
+    """
+    name = recipe_name(recipe)
+    ingredients = recipe_ingredients(recipe)
+    if not ingredients:
+        return DISH_CLASSIFIER.mask(name)
+    main, _, sides = name.partition(" + ")
+    mask = (DISH_CLASSIFIER.mask(main) & NAME_ONLY_TAGS) | ingredient_mask(ingredients)
+    if sides:
+        mask |= DISH_CLASSIFIER.mask(sides)
+    return mask
+
+
+def normalize_name(name):
+    """规范化菜品名称，用于精确查找"""
+    return name.strip().lower()
+
+
+def _iter_bits(mask):
+    """按从低到高的顺序遍历位图中被置位的下标（按字节扫描，线性时间）"""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        base = byte_index << 3
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+
+def _mask_from_indices(indices, size):
+    """由下标列表一次性构造位图，避免逐位 |= 造成的平方级开销"""
+    buf = bytearray((size + 7) // 8)
+    for i in indices:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def strip_dairy(recipe):
+    """去掉早餐搭配中的乳制品部分，全部是乳制品时返回None"""
+    name = recipe_name(recipe)
+    parts = [p.strip() for p in name.split("+")]
+    dairy_bit = DISH_CLASSIFIER.tag_bit("不吃乳制品")
+    ingredients = recipe_ingredients(recipe)
+    # 有原料信息时，主菜是否含乳制品由原料决定，搭配部分按名称判断
+    if ingredients:
+        main_has_dairy = bool(ingredient_mask(ingredients) & dairy_bit)
+    else:
+        main_has_dairy = bool(DISH_CLASSIFIER.mask(parts[0]) & dairy_bit)
+    non_dairy_parts = [parts[0]] if not main_has_dairy else []
+    non_dairy_parts += [p for p in parts[1:] if not DISH_CLASSIFIER.mask(p) & dairy_bit]
+    if not non_dairy_parts:
+        return None
+    new_name = " + ".join(non_dairy_parts)
+    if isinstance(recipe, dict):
+        stripped = {"name": new_name, "url": recipe.get("url", "")}
+        if ingredients and not main_has_dairy:
+            stripped["ingredients"] = ingredients
+        return stripped
+    return new_name
+
+
+class CandidatePool:
+    """单个餐次的候选菜品及其位图
+
+    第i道菜对应位图的第i位，位被置1表示该菜品满足对应条件。
+    """
+
+    def __init__(self, recipes):
+        self.recipes = list(recipes)
+        size = len(self.recipes)
+        self.all_mask = (1 << size) - 1
+        self._exclusion_masks = collections.OrderedDict()
+        self._exclusion_lock = threading.Lock()
+        tag_masks = [dish_tags(recipe) for recipe in self.recipes]
+
+        def matching(tag):
+            bit = DISH_CLASSIFIER.tag_bit(tag)
+            return _mask_from_indices((i for i, tags in enumerate(tag_masks) if tags & bit), size)
+
+        fat_loss_excluded = matching("减脂排除")
+        self.goal_masks = {
+            "无目标": self.all_mask,
+            "增肌": self.all_mask,
+            "减脂": self.all_mask & ~fat_loss_excluded
+        }
+        self.pref_masks = {pref: self.all_mask & ~matching(pref) for pref in TASTE_KEYWORDS}
+        self.protein_mask = matching("高蛋白")
+
+    def exclusion_mask(self, terms):
+        """计算不含任何自定义忌口词的菜品位图（有界LRU缓存，线程安全）"""
+        with self._exclusion_lock:
+            mask = self._exclusion_masks.get(terms)
+            if mask is not None:
+                self._exclusion_masks.move_to_end(terms)
+                return mask
+        automaton = exclusion_automaton(terms)
+        mask = _mask_from_indices(
+            (i for i, recipe in enumerate(self.recipes) if not automaton.contains_any(exclusion_text(recipe))),
+            len(self.recipes)
+        )
+        with self._exclusion_lock:
+            self._exclusion_masks[terms] = mask
+            while len(self._exclusion_masks) > MAX_EXCLUSION_MASKS:
+                self._exclusion_masks.popitem(last=False)
+        return mask
+
+    def mask_for(self, health_goal, taste_preferences, exclude_terms=()):
+        """计算同时满足健康目标、全部口味偏好和自定义忌口的位图"""
+        mask = self.goal_masks.get(health_goal, self.all_mask)
+        for pref in taste_preferences:
+            mask &= self.pref_masks[pref]
+        if exclude_terms:
+            mask &= self.exclusion_mask(exclude_terms)
+        return mask
+
+    def select(self, mask):
+        """按原始顺序取出位图对应的菜品"""
+        return tuple(self.recipes[i] for i in _iter_bits(mask))
+
+    def filter(self, health_goal, taste_preferences, exclude_terms=()):
+        """筛选候选菜品，增肌时优先选择高蛋白菜品"""
+        mask = self.mask_for(health_goal, taste_preferences, exclude_terms)
+        if health_goal == "增肌" and mask & self.protein_mask:
+            mask &= self.protein_mask
+        return self.select(mask)
+
+
+class CandidateIndex:
+    """整个菜谱数据库的候选索引
+
+    同一组 (餐次, 健康目标, 口味偏好) 的候选列表只计算一次并缓存（有界LRU，线程安全），
+    之后的请求直接复用，开销与菜谱数量无关。
+    """
+
+    def __init__(self, database):
+        self.pools = {meal_type: CandidatePool(recipes) for meal_type, recipes in database.items()}
+        # 不吃乳制品时，早餐使用去掉乳制品搭配后的版本
+        stripped = [strip_dairy(r) for r in database.get("早餐", [])]
+        self.dairy_free_breakfast = CandidatePool(r for r in stripped if r is not None)
+        fruit_bit = DISH_CLASSIFIER.tag_bit("水果")
+        self.fruits = tuple(
+            snack for snack in database.get("加餐", [])
+            if dish_tags(snack) & fruit_bit
+        )
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_pools(cls, pools, dairy_free_breakfast, fruits):
+        """由现成的候选池构建索引（如SQLite菜谱库提供的延迟加载候选池）
+
+        候选池需要提供 filter(health_goal, taste_preferences, exclude_terms) 方法。
+        """
+        index = cls.__new__(cls)
+        index.pools = pools
+        index.dairy_free_breakfast = dairy_free_breakfast
+        index.fruits = tuple(fruits)
+        index._cache = collections.OrderedDict()
+        index._lock = threading.Lock()
+        return index
+
+    def recent_queries(self, limit=MAX_CACHED_CANDIDATES):
+        """最近缓存过的查询，每项可以直接作为 candidates 的参数，用于预热新索引"""
+        with self._lock:
+            return list(self._cache)[-limit:]
+
+    def candidates(self, meal_type, health_goal="无目标", taste_preferences=None, exclude_terms=()):
+        """获取某个餐次可供随机抽取的候选菜品
+
+        Args:
+            meal_type: 餐次，如"早餐"
+            health_goal: 健康目标
+            taste_preferences: 口味偏好列表
+            exclude_terms: 用户自定义的忌口词元组
+
+        Returns:
+            候选菜品元组，没有可用菜品时为空元组
+        """
+        prefs = frozenset(taste_preferences or [])
+        exclude_terms = tuple(sorted(set(exclude_terms)))
+        key = (meal_type, health_goal, prefs, exclude_terms)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            CANDIDATE_CACHE_REQUESTS.inc(result="hit")
+            return cached
+        CANDIDATE_CACHE_REQUESTS.inc(result="miss")
+
+        if meal_type == "早餐" and "不吃乳制品" in prefs:
+            pool = self.dairy_free_breakfast
+        else:
+            pool = self.pools.get(meal_type)
+        result = () if pool is None else pool.filter(health_goal, prefs, exclude_terms)
+        # 素食早餐无可选时，自动用加餐中的水果类补充
+        if not result and meal_type == "早餐" and "素食" in prefs:
+            result = self.fruits
+            if exclude_terms:
+                automaton = exclusion_automaton(exclude_terms)
+                result = tuple(r for r in result if not automaton.contains_any(exclusion_text(r)))
+
+        # 多个线程可能同时计算同一个查询，结果相同，后写入的覆盖即可
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > MAX_CACHED_CANDIDATES:
+                self._cache.popitem(last=False)
+        return result
+
+
+def name_ngrams(text):
+    """字符一元组和二元组"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def match_score(query, base):
+    """匹配质量：完全匹配 > 前缀匹配 > 菜名包含 > 仅搭配包含"""
+    if base == query:
+        return 3
+    if base.startswith(query):
+        return 2
+    if query in base:
+        return 1
+    return 0
+
+
+class SearchIndex:
+    """菜品名称的字符n-gram倒排索引
+
+    对完整显示名称（含搭配）的小写形式建立一元、二元字符倒排表。
+    查询时先对查询串的全部二元组（单字查询用一元组）求交集得到候选，
+    再逐个验证子串匹配，最后按匹配质量排序。
+
+    同时维护 规范化菜名 -> 菜品列表 的哈希表，用于常数时间的精确查找；
+    同一道菜出现在多个餐次（如午餐和晚餐搭配不同）时，按数据库顺序全部保留。
+    """
+
+    def __init__(self, database):
+        self.entries = []
+        self.postings = {}
+        self.exact = {}
+        for meal_type, recipes in database.items():
+            for recipe in recipes:
+                if isinstance(recipe, dict):
+                    name = recipe["name"]
+                    url = recipe.get("url", "")
+                    # 精确查找只比较原始菜品名（去掉搭配部分）
+                    exact_key = normalize_name(name.split(" + ")[0])
+                else:
+                    # 兼容旧格式
+                    name = recipe
+                    url = ""
+                    exact_key = normalize_name(name)
+                entry_id = len(self.entries)
+                display = name.lower()
+                info = {
+                    "name": name,
+                    "url": url,
+                    "category": meal_type
+                }
+                self.entries.append((display, name.split(" + ")[0].lower(), info))
+                self.exact.setdefault(exact_key, []).append(info)
+                for gram in name_ngrams(display):
+                    posting = self.postings.get(gram)
+                    if posting is None:
+                        self.postings[gram] = [entry_id]
+                    else:
+                        posting.append(entry_id)
+
+    def _candidates(self, query):
+        if len(query) == 1:
+            return self.postings.get(query, [])
+        grams = {query[i:i + 2] for i in range(len(query) - 1)}
+        lists = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if not posting:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+        result = set(lists[0])
+        for posting in lists[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
+    def search(self, query):
+        """查找名称（含搭配）包含查询串的菜品
+
+        Args:
+            query: 查询串（不区分大小写）
+
+        Returns:
+            按匹配质量排序的菜品信息列表，每项包含 name、url、category、score
+        """
+        query = query.lower()
+        if not query:
+            return []
+        hits = []
+        for entry_id in self._candidates(query):
+            display, base, info = self.entries[entry_id]
+            if query in display:
+                hits.append((-match_score(query, base), entry_id))
+        hits.sort()
+        return [dict(self.entries[entry_id][2], score=-neg_score) for neg_score, entry_id in hits]
+
+    def lookup(self, name):
+        """精确查找菜品
+
+        Args:
+            name: 完整的原始菜品名称（不含搭配，不区分大小写）
+
+        Returns:
+            同名菜品信息列表（按数据库顺序），没有时为空列表
+        """
+        return self.exact.get(normalize_name(name), [])
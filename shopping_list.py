@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+餐饮规划的购物清单。
+
+统计规划中每道菜出现的次数，把各道菜做法中解析出的用量（ingredient_parser.parse_quantities）
+按人数和次数放大后，按原料名和单位合并成一份清单。菜名中“ + ”之后的搭配（米饭、青菜等）
+和没有做法链接的菜品（水果等）按份数单独列出。获取做法由调用方并发完成，本模块只做计算和格式化。
+"""
+import collections
+
+# 菜名中搭配部分的分隔符，与菜谱库中的写法一致
+SIDE_SEPARATOR = " + "
+
+# 文本清单中每种原料最多列出的菜名数
+MAX_LISTED_DISHES = 3
+
+
+def plan_dishes(plan):
+    """统计规划中的菜品
+
+    Args:
+        plan: generate_weekly_meal_plan 的结果，或 (日期标题, {餐次: 菜品}) 序列
+
+    Returns:
+        (dishes, sides)：dishes 为有做法链接的菜品 [{"name", "url", "count"}]，按首次出现的顺序；
+        sides 为 {搭配或没有链接的菜品: 次数}
+    """
+    if isinstance(plan, dict):
+        plan = plan.items()
+    dishes = {}
+    sides = collections.Counter()
+    for _, meals in plan:
+        for info in meals.values():
+            if not info or info["name"].startswith("❌"):
+                continue
+            name, *extras = info["name"].split(SIDE_SEPARATOR)
+            sides.update(extras)
+            url = info.get("url", "")
+            if not url:
+                sides[name] += 1
+                continue
+            dish = dishes.get(url)
+            if dish is None:
+                dishes[url] = {"name": name, "url": url, "count": 1}
+            else:
+                dish["count"] += 1
+    return list(dishes.values()), sides
+
+
+def _round(value):
+    value = round(value, 2)
+    return int(value) if value == int(value) else value
+
+
+def aggregate(recipes, people=1):
+    """合并各道菜的用量
+
+    按份计算的用量乘以人数和出现次数，整道菜的总量只乘以出现次数；
+    同一原料按单位分别累加，范围用量的上下限分别累加。
+
+    Args:
+        recipes: [(菜名, 出现次数, parse_quantities 的结果), ...]
+        people: 每餐的人数
+
+    Returns:
+        [{"name", "quantities": [{"amount", "amount_max", "unit"}], "as_needed", "dishes"}, ...]，
+        按首次出现的顺序；as_needed 表示有的菜只写了“适量”或没有写用量
+    """
+    items = {}
+    for dish_name, count, quantities in recipes:
+        for quantity in quantities:
+            item = items.get(quantity["name"])
+            if item is None:
+                item = items[quantity["name"]] = {"units": {}, "as_needed": False, "dishes": {}}
+            item["dishes"][dish_name] = None
+            if quantity["amount"] is None:
+                item["as_needed"] = True
+                continue
+            scale = count * people if quantity["per_serving"] else count
+            total = item["units"].setdefault(quantity["unit"], [0.0, 0.0, False])
+            total[0] += quantity["amount"] * scale
+            if quantity["amount_max"] is None:
+                total[1] += quantity["amount"] * scale
+            else:
+                total[1] += quantity["amount_max"] * scale
+                total[2] = True
+    return [
+        {
+            "name": name,
+            "quantities": [
+                {"amount": _round(low), "amount_max": _round(high) if ranged else None, "unit": unit}
+                for unit, (low, high, ranged) in item["units"].items()
+            ],
+            "as_needed": item["as_needed"],
+            "dishes": list(item["dishes"])
+        }
+        for name, item in items.items()
+    ]
+
+
+def _format_amount(value, unit):
+    """大于1000克、1000毫升时换算成千克、升"""
+    if unit == "g" and value >= 1000:
+        return f"{_round(value / 1000)} kg"
+    if unit == "ml" and value >= 1000:
+        return f"{_round(value / 1000)} L"
+    return f"{value} {unit}".rstrip()
+
+
+def format_quantity(quantity):
+    """一种单位的用量，如 300 g、1.2 kg、2 个 ~ 4 个"""
+    if quantity["amount_max"] is None:
+        return _format_amount(quantity["amount"], quantity["unit"])
+    low = _format_amount(quantity["amount"], quantity["unit"])
+    return f"{low} ~ {_format_amount(quantity['amount_max'], quantity['unit'])}"
+
+
+def format_shopping_list(data):
+    """格式化购物清单
+
+    Args:
+        data: meal_service.shopping_list_data 的结果
+
+    Returns:
+        格式化的字符串
+    """
+    parts = [f"🛒 {data['title']} 🛒\n", "═" * 60, "\n\n", "📊 清单信息：\n"]
+    parts.append(f"   📅 开始日期：{data['start_date']}，共{data['plan_days']}天\n")
+    parts.append(f"   👥 人数：{data['people']}人\n")
+    parts.append(f"   🍽️ 菜品：{len(data['dishes'])}道，已获取做法{len(data['dishes']) - len(data['missing'])}道\n\n")
+    parts.append("🥬 原料：\n")
+    parts.append("─" * 40 + "\n")
+    for i, item in enumerate(data["items"], 1):
+        amounts = [format_quantity(quantity) for quantity in item["quantities"]]
+        if item["as_needed"]:
+            amounts.append("适量")
+        parts.append(f"{i:2d}. {item['name']}：{' + '.join(amounts)}\n")
+        dishes = "、".join(item["dishes"][:MAX_LISTED_DISHES])
+        if len(item["dishes"]) > MAX_LISTED_DISHES:
+            dishes += f" 等{len(item['dishes'])}道菜"
+        parts.append(f"    ({dishes})\n")
+    if data["sides"]:
+        parts.append("\n🍚 搭配和水果：\n")
+        parts.append("─" * 40 + "\n")
+        for side in data["sides"]:
+            parts.append(f"   • {side['name']} ×{side['count']}份\n")
+    if data["missing"]:
+        parts.append("\n⚠️ 以下菜品未能获取做法，用量未计入：\n")
+        for dish in data["missing"]:
+            parts.append(f"   • {dish['name']}\n")
+    parts.append("\n" + "═" * 60 + "\n")
+    parts.append("💡 按份计算的用量已乘以人数，整道菜的总量按做的次数累加；调料请按实际情况购买\n")
+    return "".join(parts)
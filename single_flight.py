@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+请求合并（single-flight）。
+
+同一个键同时只执行一次调用，其他并发调用者等待这次调用结束，拿到相同的结果或异常。
+进行中的调用用 concurrent.futures.Future 表示，线程（Gradio 的同步处理函数）和
+协程（异步获取路径）都可以等待它，两条路径之间也会互相合并。
+concurrent.futures 和 asyncio 在第一次合并调用时才导入。
+"""
+import threading
+
+
+class SingleFlight:
+    """按键合并并发调用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _join(self, key):
+        """返回 (进行中的Future, 是否由当前调用者执行)"""
+        import concurrent.futures
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = concurrent.futures.Future()
+            return future, True
+
+    def _finish(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def in_flight(self, key):
+        """该键是否有正在进行的调用"""
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn, *args):
+        """同步调用，同一个键的并发调用只执行一次fn
+
+        Returns:
+            fn的返回值（等待者得到与执行者相同的结果）
+
+        Raises:
+            fn抛出的异常，所有等待者都会收到
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    async def do_async(self, key, coro_fn, *args, timeout=None):
+        """异步调用，同一个键的并发调用只执行一次coro_fn
+
+        Args:
+            key: 合并的键
+            coro_fn: 返回协程的函数
+            timeout: 等待他人进行中的调用时的超时（秒），不影响那次调用本身
+
+        Raises:
+            coro_fn抛出的异常；等待超时时抛出 asyncio.TimeoutError
+        """
+        import asyncio
+        future, leader = self._join(key)
+        if not leader:
+            waiter = asyncio.wrap_future(future)
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+        try:
+            result = await coro_fn(*args)
+        except asyncio.CancelledError:
+            # 执行者被取消时，等待者（可能在其他线程中）收到普通异常而不是取消
+            future.set_exception(RuntimeError("合并的调用已被取消"))
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
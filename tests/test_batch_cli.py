@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import json
+
+import batch_cli
+
+
+def test_invalid_jsonl_lines_become_error_records(tmp_path):
+    path = tmp_path / "profiles.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"id": "a", "seed": 1}),
+        "{not json",
+        "",
+        json.dumps([1, 2]),
+        json.dumps({"id": "b", "seed": "abc"}),
+        json.dumps({"id": "c", "days": "week"}),
+        json.dumps({"id": "d", "seed": 2, "days": 30})
+    ]), encoding="utf-8")
+    profiles = list(batch_cli.load_profiles(str(path)))
+    assert [p.get("id") for p in profiles] == ["a", None, None, None, None, "d"]
+    assert [p["line"] for p in profiles if "error" in p] == [2, 4, 5, 6]
+    assert profiles[-1]["days"] == 30
+
+
+def test_invalid_csv_rows_become_error_records(tmp_path):
+    path = tmp_path / "profiles.csv"
+    path.write_text("id,seed,days,taste_preferences\nu1,1,7,不吃辣;素食\nu2,x,7,\nu3,3,,\n", encoding="utf-8")
+    profiles = list(batch_cli.load_profiles(str(path)))
+    assert profiles[0]["taste_preferences"] == ["不吃辣", "素食"]
+    assert profiles[1] == {"error": profiles[1]["error"], "line": 3}
+    assert profiles[2]["days"] == 7
+
+
+def test_error_records_pass_through_chunks():
+    record = {"error": "ValueError: bad", "line": 3}
+    assert batch_cli.plan_chunk([record]) == [json.dumps(record)]
+
+
+def test_parse_taste_preferences():
+    assert batch_cli.parse_taste_preferences("不吃辣; 素食、不吃辣，不吃葱") == ["不吃辣", "素食", "不吃葱"]
+    assert batch_cli.parse_taste_preferences("  ") == []
+
+
+def test_unknown_preferences_become_error_records(tmp_path):
+    csv_path = tmp_path / "profiles.csv"
+    csv_path.write_text("id,seed,taste_preferences\nu1,1,不吃辣\nu2,2,不吃辣;不吃香蕉\n", encoding="utf-8")
+    profiles = list(batch_cli.load_profiles(str(csv_path)))
+    assert profiles[0]["taste_preferences"] == ["不吃辣"]
+    assert profiles[1]["line"] == 3 and "不吃香蕉" in profiles[1]["error"]
+
+    jsonl_path = tmp_path / "profiles.jsonl"
+    jsonl_path.write_text("\n".join([
+        json.dumps({"id": "a", "taste_preferences": ["素食", "少油"]}, ensure_ascii=False),
+        json.dumps({"id": "b", "taste_preferences": {"素食": True}}, ensure_ascii=False)
+    ]), encoding="utf-8")
+    assert [(p["line"], "error" in p) for p in batch_cli.load_profiles(str(jsonl_path))] == [(1, True), (2, True)]
+
+
+def test_main_writes_only_jsonl_to_stdout_and_restores_it(tmp_path, capsys):
+    import sys
+
+    path = tmp_path / "profiles.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"id": "a", "seed": 1, "days": 2}),
+        json.dumps({"id": "b", "taste_preferences": ["不存在"]}, ensure_ascii=False)
+    ]), encoding="utf-8")
+    stdout = sys.stdout
+    assert batch_cli.main([str(path), "--workers", "1"]) == 0
+    assert sys.stdout is stdout
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert records[0]["id"] == "a" and len(records[0]["plan"]) == 2
+    assert records[1]["line"] == 2 and "error" in records[1]
+    assert "已生成 2 份规划" in captured.err
+    print("after")
+    assert capsys.readouterr().out == "after\n"
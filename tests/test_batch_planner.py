@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import collections
+
+import pytest
+
+import batch_planner
+from batch_planner import generate_meal_plans_batch
+from benchmarks.synthetic_catalog import generate_catalog
+from meal_service import generate_weekly_meal_plan
+from recipe_index import CandidateIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CandidateIndex(generate_catalog(300, seed=4))
+
+
+def _requests(count):
+    return [{"start_date": "2024-01-15", "seed": seed} for seed in range(count)]
+
+
+def _meal_names(plan, meal_type):
+    return [meals[meal_type]["name"] for meals in plan.values()]
+
+
+@pytest.mark.parametrize("draw", [batch_planner._draw_numpy, batch_planner._draw_python])
+def test_no_repeat_within_window_for_each_meal(draw):
+    # 池大小10、5、7、1，窗口7天：池不小于窗口时7天内不重复，更小时轮换最久未用的菜品
+    sizes = [10, 5, 7, 1]
+    choices = draw(list(range(50)), [0] * 50, [sizes], 40, 7)
+    for user in range(50):
+        for m, size in enumerate(sizes):
+            picks = [int(choices[user][day][m]) for day in range(40)]
+            assert all(0 <= p < size for p in picks)
+            span = min(7, size)
+            for day in range(len(picks)):
+                window = picks[max(0, day - span + 1):day + 1]
+                assert len(set(window)) == len(window)
+
+
+def test_numpy_and_python_paths_agree():
+    if batch_planner.np is None:
+        pytest.skip("未安装NumPy")
+    seeds = [0, 1, 2 ** 52 + 7, 123456789]
+    # 各用户的餐次数和候选数不同（不同的约束分组）
+    args = (seeds, [0, 1, 2, 3], [[12, 3, 0, 8], [5, 9, 2], [1], [40, 40, 40, 40]], 30, 7)
+    assert batch_planner._draw_numpy(*args).tolist() == batch_planner._draw_python(*args)
+
+
+def test_plans_are_uniform_over_the_pool():
+    choices = batch_planner._draw_python(list(range(4000)), [0] * 4000, [[5]], 1, 7)
+    counts = collections.Counter(user[0][0] for user in choices)
+    assert set(counts) == set(range(5))
+    assert max(counts.values()) - min(counts.values()) < 200
+
+
+def test_seed_result_is_independent_of_batch(index):
+    alone = generate_meal_plans_batch([{"start_date": "2024-01-15", "seed": 3}], index, days=14)[0]
+    mixed = generate_meal_plans_batch(
+        [{"start_date": "2024-01-15", "seed": 3, "health_goal": "减脂"}] + _requests(5), index, days=14
+    )
+    assert mixed[4] == alone
+    assert mixed[0] != alone
+
+
+def test_plan_format_matches_single_plans(index):
+    plan = generate_meal_plans_batch(_requests(1), index, days=7)[0]
+    single = generate_weekly_meal_plan("2024-01-15", days=7, seed=0)
+    assert list(plan) == list(single)
+    assert [list(meals) for meals in plan.values()] == [list(meals) for meals in single.values()]
+    for meal_type in plan["周一(2024年01月15日)"]:
+        names = _meal_names(plan, meal_type)
+        assert len(names) == len(set(names))
+
+
+def test_missing_seed_is_recorded(index):
+    plans = generate_meal_plans_batch([{}], index)
+    again = generate_meal_plans_batch([{"seed": plans.seed(0)}], index)
+    assert plans[0] == again[0]
+
+
+def test_empty_pool_gives_no_dish():
+    index = CandidateIndex({"早餐": [], "午餐": [{"name": "红烧肉 + 米饭", "url": ""}], "晚餐": [], "加餐": []})
+    plan = generate_meal_plans_batch(_requests(1), index, days=3)[0]
+    assert all(meals["早餐"]["name"].startswith("❌") for meals in plan.values())
+    assert all(meals["午餐"]["name"] == "红烧肉 + 米饭" for meals in plan.values())
+
+
+def test_exclude_terms_as_list_or_text_share_a_group(index):
+    requests = [
+        {"start_date": "2024-01-15", "exclude_terms": "香菇，花生", "seed": 3},
+        {"start_date": "2024-01-15", "exclude_terms": ["花生", "香菇"], "seed": 3}
+    ]
+    plans = generate_meal_plans_batch(requests, index)
+    assert len(plans.groups) == 1
+    assert plans[0] == plans[1]
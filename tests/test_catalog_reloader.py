@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+
+import catalog_reloader
+from benchmarks.synthetic_catalog import generate_catalog
+from catalog_reloader import CatalogReloader
+from recipe_catalog import load_catalog_snapshot, write_sqlite_catalog
+
+
+def _write_json(path, database, version):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(database, f, ensure_ascii=False)
+    # 修改时间不依赖文件系统的精度，每个版本都不同
+    os.utime(path, ns=(version * 10 ** 9, version * 10 ** 9))
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = str(tmp_path / "recipes_database.json")
+    _write_json(path, generate_catalog(60, seed=1), 1)
+    return path
+
+
+def _reloader(path):
+    return CatalogReloader(load_catalog_snapshot(path), interval=0, source_path=lambda: path)
+
+
+def test_reloads_only_after_two_identical_polls(catalog_file):
+    reloader = _reloader(catalog_file)
+    assert not reloader.check()
+    new_database = generate_catalog(80, seed=2)
+    _write_json(catalog_file, generate_catalog(70, seed=3), 2)
+    assert not reloader.check()
+    # 两次检查之间文件又变了，说明还在写入
+    _write_json(catalog_file, new_database, 3)
+    assert not reloader.check()
+    assert reloader.reload_count == 0
+    assert reloader.check()
+    assert reloader.reload_count == 1
+    assert reloader.current.database == new_database
+    assert not reloader.check()
+
+
+def test_new_index_is_warmed_with_recent_queries(catalog_file):
+    reloader = _reloader(catalog_file)
+    reloader.current.candidate_index.candidates("午餐", "减脂", ["不吃辣"])
+    query = ("午餐", "减脂", frozenset({"不吃辣"}), ())
+    assert reloader.current.candidate_index.recent_queries() == [query]
+    _write_json(catalog_file, generate_catalog(80, seed=2), 2)
+    reloader.check()
+    assert reloader.check()
+    assert query in reloader.current.candidate_index.recent_queries()
+
+
+def test_failed_version_is_not_retried_until_the_file_changes(monkeypatch, catalog_file):
+    reloader = _reloader(catalog_file)
+    old = reloader.current
+    loads = []
+    original = catalog_reloader.load_catalog_snapshot
+    monkeypatch.setattr(catalog_reloader, "load_catalog_snapshot", lambda path: loads.append(path) or original(path))
+    with open(catalog_file, "w", encoding="utf-8") as f:
+        f.write("{不是JSON")
+    os.utime(catalog_file, ns=(2 * 10 ** 9, 2 * 10 ** 9))
+    reloader.check()
+    assert not reloader.check()
+    assert len(loads) == 1
+    for _ in range(3):
+        assert not reloader.check()
+    assert len(loads) == 1
+    assert reloader.current is old
+
+    _write_json(catalog_file, generate_catalog(80, seed=2), 3)
+    reloader.check()
+    assert reloader.check()
+    assert len(loads) == 2
+
+
+def _is_closed(conn):
+    try:
+        conn.execute("SELECT 1")
+    except sqlite3.ProgrammingError:
+        return True
+    return False
+
+
+def test_retired_sqlite_snapshot_closes_after_readers_finish(tmp_path):
+    database = generate_catalog(60, seed=1)
+    path = str(tmp_path / "recipes_database.sqlite")
+    write_sqlite_catalog(database, path)
+    reloader = _reloader(path)
+    old = reloader.current
+
+    connections = []
+
+    def read():
+        with reloader.reading() as snapshot:
+            snapshot.search_index.search("鸡")
+            connections.append(snapshot.database.connection())
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    with reloader.reading() as snapshot:
+        assert snapshot is old
+        snapshot.search_index.search("鸡")
+        connections.append(snapshot.database.connection())
+        reloader.swap(load_catalog_snapshot(path))
+        # 替换后进行中的读取不受影响
+        assert snapshot.search_index.lookup(database["午餐"][0]["name"].split(" + ")[0])
+        assert not any(_is_closed(conn) for conn in connections)
+    assert len(connections) == 2
+    assert all(_is_closed(conn) for conn in connections)
+    with pytest.raises(sqlite3.ProgrammingError):
+        old.database.connection()
+
+    with reloader.reading() as snapshot:
+        assert snapshot is reloader.current
+        assert snapshot.search_index.search("鸡")
+
+
+def test_retired_snapshot_without_readers_closes_immediately(tmp_path):
+    path = str(tmp_path / "recipes_database.sqlite")
+    write_sqlite_catalog(generate_catalog(60, seed=1), path)
+    reloader = _reloader(path)
+    old = reloader.current
+    conn = old.database.connection()
+    reloader.swap(load_catalog_snapshot(path))
+    assert _is_closed(conn)
+    assert not old.acquire()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import collections
+import random
+
+import pytest
+
+import festival_menu
+from festival_menu import FestivalRegistry, generate_festival_menu
+
+DATA = {
+    "dish_groups": {"主食": ["饭", "饺"], "青菜": ["菜"], "荤菜": ["鸡", "鱼", "肉"]},
+    "emoji_rules": {"party": [["主食", "🍚"], ["荤菜", "🥩"]]},
+    "pools": {"staple": ["米饭"], "greens": ["炒青菜"]},
+    "festivals": {
+        "party": {
+            "name": "聚会",
+            "variants": {
+                "default": {
+                    "label": "家常",
+                    "aliases": ["家里"],
+                    "title": "聚会 ({people}人)",
+                    "emoji": "party",
+                    "dishes_per_person": 1,
+                    "extra_dishes": 1,
+                    "courses": [
+                        {"pool": ["饺子"], "take": "all"},
+                        {"pool": ["红烧鸡", "清蒸鱼", "回锅肉"], "count": {"per_person": 0.5, "offset": 0.5, "min": 1}},
+                        {"pool": ["甜汤"], "position": "last", "count": {"per_person": 0, "min": 1}},
+                        {"pool": ["凉拌黄瓜", {"dish": "拍蒜", "weight": 3}], "count": "fill"}
+                    ],
+                    "ensure": [{"tags": ["青菜"], "pool": "greens"}, {"tags": ["主食"], "pool": "staple"}],
+                    "features": ["热闹"]
+                },
+                "outdoor": {"label": "野餐", "title": "野餐 ({people}人)", "courses": [{"pool": ["三明治"]}]}
+            }
+        },
+        "solo": {
+            "name": "独食",
+            "variants": {"only": {"title": "一个人 ({people}人)", "courses": [{"pool": ["面条", "炒青菜"]}]}}
+        }
+    }
+}
+
+
+@pytest.fixture
+def registry():
+    return FestivalRegistry(DATA)
+
+
+def _select(registry, people, seed=0, festival="party", region=""):
+    return registry.festival(festival).variant(region).select(people, random.Random(seed))
+
+
+def test_course_counts_and_positions(registry):
+    dishes = _select(registry, 4)
+    # 共 4*1+1=5 道：饺子、2道荤菜、补足1道（甜汤也计入总数）、最后是甜汤，再补上必备的青菜
+    assert dishes[0] == "饺子"
+    assert len(set(dishes[1:3]) & {"红烧鸡", "清蒸鱼", "回锅肉"}) == 2
+    assert dishes[3] in {"凉拌黄瓜", "拍蒜"}
+    assert dishes[4:] == ["甜汤", "炒青菜"]
+
+
+def test_ensure_rules_only_add_missing_tags(registry):
+    for seed in range(20):
+        dishes = _select(registry, 2, seed)
+        # 饺子已经是主食，不再补米饭；没有青菜时补一道
+        assert "米饭" not in dishes
+        assert dishes.count("炒青菜") == 1
+
+
+def test_banquet_uses_every_dish_before_repeating(registry):
+    people = 100
+    dishes = _select(registry, people, seed=3)
+    counts = collections.Counter(dishes)
+    assert {"红烧鸡", "清蒸鱼", "回锅肉"} <= set(counts)
+    assert counts["红烧鸡"] + counts["清蒸鱼"] + counts["回锅肉"] == int(people * 0.5 + 0.5)
+    # 补足的菜按权重有放回抽取
+    assert counts["拍蒜"] > counts["凉拌黄瓜"] > 0
+    data = registry.festival("party").default.menu_data(people, dishes)
+    assert data["servings"] == len(dishes)
+    assert sum(dish["count"] for dish in data["dishes"]) == len(dishes)
+    assert "×" in registry.festival("party").default.format(people, dishes)
+
+
+def test_emoji_and_tags_are_precomputed(registry):
+    variant = registry.festival("party").default
+    assert variant.emojis["饺子"] == "🍚"
+    assert variant.emojis["回锅肉"] == "🥩"
+    assert variant.emojis["甜汤"] == festival_menu.DEFAULT_EMOJI
+    assert variant.tags["米饭"] == ["主食"]
+
+
+def test_variant_lookup(registry):
+    party = registry.festival("聚会")
+    assert party is registry.festival("party")
+    assert party.variant("家里") is party.variant("家常") is party.variant("") is party.default
+    assert party.variant("野餐").key == "outdoor"
+    assert party.region_choices == ["家常", "野餐"]
+    with pytest.raises(KeyError):
+        party.variant("外卖")
+    # 只有一个版本时忽略地区
+    assert registry.festival("solo").variant("随便").key == "only"
+
+
+@pytest.mark.parametrize("festival,people,region,message", [
+    ("party", 0, "", "请输入有效的人数"),
+    ("party", "两个", "", "请输入有效的人数"),
+    ("party", festival_menu.MAX_PARTY_SIZE + 1, "", "最多"),
+    ("春节联欢", 2, "", "未知的节日"),
+    ("party", 2, "外卖", "可选：家常、野餐")
+])
+def test_invalid_input_is_reported(registry, festival, people, region, message):
+    with pytest.raises(ValueError, match=message):
+        registry.menu_data(festival, people, region, random.Random(0))
+    assert message in registry.menu(festival, people, region, random.Random(0))
+
+
+def test_bundled_festivals_are_reproducible_with_a_seed():
+    for festival, region in (("spring", ""), ("春节", ""), ("lantern", "推荐南方美食"), ("lantern", "北方")):
+        assert generate_festival_menu(festival, 6, region, seed=11) == generate_festival_menu(festival, 6, region, seed=11)
+    assert generate_festival_menu("spring", 6, seed=11) == generate_festival_menu("春节", 6, seed=11)
+    menu = generate_festival_menu("lantern", 6, "推荐南方美食", seed=1)
+    assert "元宵" in menu
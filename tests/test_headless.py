@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from headless import handle_message
+
+
+@pytest.mark.parametrize("message", [[{"jsonrpc": "2.0", "id": 1, "method": "ping"}], 5, "ping", None])
+def test_non_object_is_invalid_request(message):
+    response = handle_message(None, message)
+    assert response["id"] is None
+    assert response["error"]["code"] == -32600
+
+
+def test_ping_and_unknown_method():
+    assert handle_message(None, {"jsonrpc": "2.0", "id": 1, "method": "ping"})["result"] == {}
+    assert handle_message(None, {"jsonrpc": "2.0", "id": 2, "method": "nope"})["error"]["code"] == -32601
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from ingredient_parser import parse_ingredients
+
+RECIPE = """# 测试菜
+
+## 必备原料和工具
+
+- 和牛
+- 葱、姜、蒜
+- 生抽或者老抽
+- [大和煮罐头](https://example.com)
+- 盐 和 糖
+- 适量料酒
+
+## 计算
+
+- 鸡蛋 2 个 与 牛奶 200ml
+- 土豆 300g（约 2 个）
+
+## 操作
+
+- 和面
+"""
+
+
+def test_conjunctions_inside_names_are_kept():
+    ingredients = parse_ingredients(RECIPE)
+    assert "和牛" in ingredients
+    assert "大和煮罐头" in ingredients
+    assert "牛" not in ingredients
+    assert "" not in ingredients
+
+
+def test_list_separators_split_ingredients():
+    ingredients = parse_ingredients(RECIPE)
+    for name in ("葱", "姜", "蒜", "生抽", "老抽", "盐", "糖", "料酒", "鸡蛋", "牛奶", "土豆"):
+        assert name in ingredients
+
+
+def test_only_ingredient_sections_are_parsed():
+    assert "和面" not in parse_ingredients(RECIPE)
+    assert parse_ingredients("# 没有原料\n\n- 和牛\n") == []
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+import meal_service
+from meal_service import STREAM_WEEKLY_AFTER_DAYS, format_meal_plan_header, meal_planner, meal_planner_stream
+
+
+def _collect(stream):
+    async def run():
+        return [text async for text in stream]
+    return asyncio.run(run())
+
+
+def test_stream_first_output_is_only_the_header():
+    outputs = _collect(meal_planner_stream("2024-01-15", seed=1))
+    assert outputs[0] == format_meal_plan_header(7)
+
+
+def test_stream_flushes_daily_and_matches_the_full_plan():
+    outputs = _collect(meal_planner_stream("2024-01-15", days=7, seed=1))
+    assert len(outputs) == 1 + 7
+    for previous, current in zip(outputs, outputs[1:]):
+        assert current.startswith(previous) and current != previous
+    assert outputs[-1] == meal_planner("2024-01-15", days=7, seed=1)
+
+
+@pytest.mark.parametrize("days,flushes", [
+    (STREAM_WEEKLY_AFTER_DAYS, STREAM_WEEKLY_AFTER_DAYS),
+    (STREAM_WEEKLY_AFTER_DAYS + 1, 5),
+    (90, 13)
+])
+def test_long_plans_flush_weekly_and_always_flush_the_last_day(days, flushes):
+    outputs = _collect(meal_planner_stream("2024-01-15", days=days, seed=2))
+    assert len(outputs) == 1 + flushes
+    assert outputs[-1] == meal_planner("2024-01-15", days=days, seed=2)
+
+
+def test_stream_inlines_recipe_details(monkeypatch):
+    async def fake_content(url, deadline=None):
+        return "# 做法\n\n- **翻炒**即可"
+
+    monkeypatch.setattr(meal_service, "get_recipe_content_async", fake_content)
+    outputs = _collect(meal_planner_stream("2024-01-15", days=2, seed=3, include_recipes=True))
+    assert len(outputs) == 3
+    assert "翻炒即可" in outputs[1]
+    assert outputs[2].count("翻炒即可") > outputs[1].count("翻炒即可")
+
+
+@pytest.mark.parametrize("kwargs,message", [
+    ({"taste_preferences": ["不存在"]}, "未知的口味偏好：不存在"),
+    ({"days": "一年"}, "无效的输入"),
+    ({"start_date": "2024/01/01"}, "无法识别的日期")
+])
+def test_meal_planner_json_reports_invalid_input(kwargs, message):
+    kwargs = dict({"start_date": "2024-01-15", "seed": 1}, **kwargs)
+    result = meal_service.meal_planner_json(**kwargs)
+    assert list(result) == ["error"] and message in result["error"]
+
+
+def test_unknown_taste_preference_is_a_value_error():
+    with pytest.raises(ValueError, match="未知的口味偏好"):
+        meal_service.generate_weekly_meal_plan("2024-01-15", taste_preferences=["不存在"], seed=1)
+
+
+@pytest.mark.parametrize("kwargs,message", [
+    ({"taste_preferences": ["不存在"]}, "未知的口味偏好"),
+    ({"people": 0}, "请输入有效的人数")
+])
+def test_shopping_list_json_reports_invalid_input(kwargs, message):
+    result = asyncio.run(meal_service.shopping_list_json("2024-01-15", seed=1, **kwargs))
+    assert list(result) == ["error"] and message in result["error"]
+
+
+@pytest.mark.parametrize("festival,people,message", [("圣诞节", 4, "未知的节日：圣诞节"), ("春节", 0, "请输入有效的人数")])
+def test_festival_menu_json_reports_invalid_input(festival, people, message):
+    assert meal_service.festival_menu_json(festival, people, seed=1) == {"error": message}
+
+
+def test_search_json_rejects_empty_names():
+    assert meal_service.search_recipe_json("  ") == {"error": "请输入要搜索的菜品名称"}
+    assert asyncio.run(meal_service.exact_search_recipe_json("")) == {"error": "请输入要搜索的菜品名称"}
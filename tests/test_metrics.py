@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import http.server
+import urllib.request
+
+import pytest
+
+from metrics import (
+    HANDLER_ERRORS, HANDLER_FIRST_OUTPUT, HANDLER_IN_PROGRESS, HANDLER_LATENCY, HANDLER_REQUESTS, MetricsRegistry,
+    instrument, start_metrics_server
+)
+
+
+def test_counter_and_gauge_rendering():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "请求数", ["path"])
+    counter.inc(path="/a")
+    counter.inc(2, path='say "hi"\n')
+    gauge = registry.gauge("temperature", "温度")
+    gauge.set(1.5)
+    assert registry.render() == (
+        "# HELP requests_total 请求数\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{path="/a"} 1\n'
+        'requests_total{path="say \\"hi\\"\\n"} 2\n'
+        "# HELP temperature 温度\n"
+        "# TYPE temperature gauge\n"
+        "temperature 1.5\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("size", "大小", buckets=(1, 5))
+    for value in (0, 1, 3, 7):
+        histogram.observe(value)
+    assert registry.render().splitlines()[2:] == [
+        'size_bucket{le="1"} 2',
+        'size_bucket{le="5"} 3',
+        'size_bucket{le="+Inf"} 4',
+        "size_sum 11",
+        "size_count 4"
+    ]
+
+
+def test_registry_rejects_conflicting_metrics():
+    registry = MetricsRegistry()
+    assert registry.counter("a", "", ["x"]) is registry.counter("a", "", ["x"])
+    with pytest.raises(ValueError):
+        registry.gauge("a", "", ["x"])
+    with pytest.raises(ValueError):
+        registry.counter("a", "", ["y"])
+    with pytest.raises(ValueError):
+        registry.counter("a", "", ["x"]).inc(y="1")
+
+
+def _snapshot(handler):
+    return (
+        HANDLER_REQUESTS.value(handler=handler),
+        HANDLER_LATENCY.count(handler=handler),
+        HANDLER_IN_PROGRESS.value(handler=handler)
+    )
+
+
+def test_instrument_sync_function():
+    @instrument("test_sync")
+    def handler(x):
+        if x < 0:
+            raise ValueError(x)
+        return x * 2
+
+    assert handler.__name__ == "handler"
+    assert handler(2) == 4
+    with pytest.raises(ValueError):
+        handler(-1)
+    assert _snapshot("test_sync") == (2, 2, 0)
+    assert HANDLER_ERRORS.value(handler="test_sync", error="ValueError") == 1
+
+
+def test_instrument_coroutine_function():
+    @instrument("test_async")
+    async def handler(x):
+        await asyncio.sleep(0)
+        return x + 1
+
+    assert asyncio.run(handler(1)) == 2
+    assert _snapshot("test_async") == (1, 1, 0)
+
+
+def test_instrument_async_generator_records_first_output():
+    @instrument("test_stream")
+    async def handler(n):
+        for i in range(n):
+            yield i
+
+    async def collect():
+        return [item async for item in handler(3)]
+
+    assert asyncio.run(collect()) == [0, 1, 2]
+    assert _snapshot("test_stream") == (1, 1, 0)
+    assert HANDLER_FIRST_OUTPUT.count(handler="test_stream") == 1
+
+
+def test_instrument_async_generator_disconnect_is_not_an_error():
+    @instrument("test_disconnect")
+    async def handler():
+        while True:
+            yield "x"
+
+    async def read_one():
+        stream = handler()
+        await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(read_one())
+    assert _snapshot("test_disconnect") == (1, 1, 0)
+    assert HANDLER_ERRORS.value(handler="test_disconnect", error="GeneratorExit") == 0
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    registry = MetricsRegistry()
+    registry.counter("hits_total", "命中").inc()
+    assert start_metrics_server(port=0, registry=registry) is None
+    server = start_metrics_server(port=_free_port(), addr="127.0.0.1", registry=registry)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "hits_total 1" in response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _free_port():
+    server = http.server.HTTPServer(("127.0.0.1", 0), http.server.BaseHTTPRequestHandler)
+    port = server.server_address[1]
+    server.server_close()
+    return port
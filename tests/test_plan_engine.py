@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import collections
+
+from plan_engine import NoRepeatPlanner
+
+
+def _recipes(names, directory="vegetable_dish"):
+    return tuple(
+        {"name": name, "url": f"https://github.com/Anduin2017/HowToCook/blob/master/dishes/{directory}/{name}.md"}
+        for name in names
+    )
+
+
+def _plan(meal_candidates, days, seed=0, **kwargs):
+    planner = NoRepeatPlanner(meal_candidates, seed=seed, **kwargs)
+    return [planner.plan_day() for _ in range(days)]
+
+
+def _names(plan, meal_type):
+    return [day[meal_type]["name"] for day in plan]
+
+
+def test_no_repeat_within_window():
+    candidates = _recipes([f"菜{i}" for i in range(20)])
+    for seed in range(5):
+        names = _names(_plan({"早餐": candidates}, 30, seed), "早餐")
+        for day in range(len(names)):
+            window = names[max(0, day - 6):day]
+            assert names[day] not in window
+
+
+def test_no_repeat_across_meals_of_a_day():
+    candidates = _recipes([f"菜{i}" for i in range(10)])
+    plan = _plan({"午餐": candidates, "晚餐": candidates}, 5)
+    for day in plan:
+        assert day["午餐"]["name"] != day["晚餐"]["name"]
+
+
+def test_ingredient_cap():
+    chicken = _recipes([f"鸡{c}" for c in "ABCDEFGH"], "meat_dish")
+    pork = _recipes([f"猪{c}" for c in "ABCDEFGH"], "meat_dish")
+    beef = _recipes([f"牛肉{c}" for c in "ABCDEFGH"], "meat_dish")
+    for seed in range(10):
+        plan = _plan({"午餐": chicken + pork + beef}, 7, seed, max_ingredient_repeats=3)
+        counts = collections.Counter(name[0] for name in _names(plan, "午餐"))
+        assert max(counts.values()) <= 3
+
+
+def test_fallback_rotates_small_pool():
+    # 3道菜、10天：约束无法满足时轮流重复，不能连续几天都是同一道菜
+    candidates = _recipes(["菜A", "菜B", "菜C"])
+    for seed in range(10):
+        names = _names(_plan({"早餐": candidates}, 10, seed), "早餐")
+        assert len(set(names[:3])) == 3
+        for day in range(3, len(names)):
+            assert names[day] not in names[day - 2:day]
+        assert max(collections.Counter(names).values()) <= 4
+
+
+def test_fallback_relaxes_ingredient_cap_before_repeating():
+    # 只有鸡肉菜时先放宽主料上限，7天用7道不同的菜，而不是重复同一道
+    chicken = _recipes([f"鸡{c}" for c in "ABCDEFGHI"], "meat_dish")
+    for seed in range(10):
+        names = _names(_plan({"午餐": chicken}, 7, seed, max_ingredient_repeats=3), "午餐")
+        assert len(set(names)) == 7
+
+
+def test_same_seed_same_plan():
+    candidates = {"早餐": _recipes([f"菜{i}" for i in range(20)]), "午餐": _recipes([f"肉{i}" for i in range(20)], "meat_dish")}
+    assert _plan(candidates, 14, seed=42) == _plan(candidates, 14, seed=42)
+    assert _plan(candidates, 14, seed=42) != _plan(candidates, 14, seed=43)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from planner import DEFAULT_PLAN_DAYS, MAX_PLAN_DAYS, SEED_MODULUS, parse_plan_days, plan_title, resolve_seed
+
+
+@pytest.mark.parametrize("seed,expected", [(0, 0), (42, 42), ("42", 42), (SEED_MODULUS - 1, SEED_MODULUS - 1)])
+def test_resolve_seed_keeps_seeds_in_range(seed, expected):
+    assert resolve_seed(seed) == expected
+
+
+def test_resolve_seed_negative_is_distinct():
+    assert resolve_seed(-42) != resolve_seed(42)
+    assert 0 <= resolve_seed(-42) < SEED_MODULUS
+
+
+@pytest.mark.parametrize("seed", [None, ""])
+def test_resolve_seed_generates(seed):
+    assert 0 <= resolve_seed(seed) < 2 ** 32
+
+
+@pytest.mark.parametrize("days,expected", [
+    (None, DEFAULT_PLAN_DAYS), ("", DEFAULT_PLAN_DAYS), (30, 30), ("90", 90), (365, 365),
+    (MAX_PLAN_DAYS, MAX_PLAN_DAYS), (MAX_PLAN_DAYS + 1, MAX_PLAN_DAYS), (10 ** 9, MAX_PLAN_DAYS), (0, 1), (-5, 1)
+])
+def test_parse_plan_days_clamps_to_the_horizon(days, expected):
+    assert parse_plan_days(days) == expected
+
+
+def test_parse_plan_days_rejects_non_numbers():
+    with pytest.raises(ValueError):
+        parse_plan_days("一年")
+
+
+def test_plan_title():
+    assert plan_title(7) == "七日餐饮规划"
+    assert plan_title(MAX_PLAN_DAYS) == f"{MAX_PLAN_DAYS}日餐饮规划"
+
+
+def test_oversized_plan_is_clamped_across_a_leap_year():
+    from meal_service import meal_planner_json
+
+    plan = meal_planner_json("2024-01-01", days=10 ** 6, seed=1)
+    assert plan["title"] == f"{MAX_PLAN_DAYS}日餐饮规划"
+    assert len(plan["days"]) == MAX_PLAN_DAYS
+    assert plan["days"][-1]["date"] == "2024-12-31"
+
+
+def test_seeds_stay_within_the_json_safe_range():
+    assert SEED_MODULUS == 2 ** 53
+    assert resolve_seed(2 ** 63 + 5) == (2 ** 63 + 5) % 2 ** 53
+    assert all(0 <= resolve_seed(seed) < 2 ** 53 for seed in (-1, 2 ** 64, -(2 ** 70), None))
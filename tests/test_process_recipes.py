@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import process_recipes
+
+RECIPE = "# {name}\n\n## 必备原料和工具\n\n* {ingredient}\n\n## 操作\n\n{steps}\n"
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """在临时目录中准备一份最小的 HowToCook/dishes，输出文件也写到临时目录"""
+    base = tmp_path / "dishes"
+    for category_dir in process_recipes.CATEGORY_DIRS:
+        (base / category_dir).mkdir(parents=True)
+    (base / "meat_dish" / "宫保鸡丁.md").write_text(
+        RECIPE.format(name="宫保鸡丁", ingredient="鸡胸肉", steps="翻炒"), encoding="utf-8"
+    )
+    (base / "breakfast" / "煎蛋.md").write_text(
+        RECIPE.format(name="煎蛋", ingredient="鸡蛋", steps="煎"), encoding="utf-8"
+    )
+    monkeypatch.chdir(tmp_path)
+    return base
+
+
+def _run(base, capsys):
+    process_recipes.main(["--base", str(base)])
+    return capsys.readouterr().out
+
+
+def _mtimes():
+    return [os.stat(path).st_mtime_ns for path in process_recipes.OUTPUT_FILES]
+
+
+def test_unchanged_tree_is_skipped(tree, capsys):
+    assert "已生成" in _run(tree, capsys)
+    before = _mtimes()
+    assert "跳过生成" in _run(tree, capsys)
+    assert _mtimes() == before
+
+
+def test_tag_groups_change_regenerates(tree, capsys, monkeypatch):
+    _run(tree, capsys)
+    monkeypatch.setattr(process_recipes, "build_signature", lambda: "changed")
+    assert "已生成" in _run(tree, capsys)
+
+
+def test_step_only_edit_keeps_outputs(tree, capsys):
+    _run(tree, capsys)
+    before = _mtimes()
+    (tree / "meat_dish" / "宫保鸡丁.md").write_text(
+        RECIPE.format(name="宫保鸡丁", ingredient="鸡胸肉", steps="大火翻炒"), encoding="utf-8"
+    )
+    assert "跳过写出" in _run(tree, capsys)
+    assert _mtimes() == before
+
+
+def test_ingredient_edit_regenerates(tree, capsys):
+    _run(tree, capsys)
+    (tree / "meat_dish" / "宫保鸡丁.md").write_text(
+        RECIPE.format(name="宫保鸡丁", ingredient="鸡腿肉", steps="翻炒"), encoding="utf-8"
+    )
+    assert "已生成" in _run(tree, capsys)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import glob
+import json
+import os
+import pstats
+
+import pytest
+
+import profiling
+from profiling import profiled
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_ALL", True)
+    return str(tmp_path)
+
+
+def _metas(directory):
+    metas = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            metas.append(json.load(f))
+    return metas
+
+
+def _profiled_functions(directory, handler):
+    meta_path = next(p for p in glob.glob(os.path.join(directory, "*.json")) if f"-{handler}-" in p)
+    stats = pstats.Stats(meta_path[:-len(".json")] + ".prof")
+    return {func for _, _, func in stats.stats}
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_sampling(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_ALL", False)
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    assert not profiling.should_profile()
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0.25)
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.2)
+    assert profiling.should_profile()
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.3)
+    assert not profiling.should_profile()
+    monkeypatch.setattr(profiling, "PROFILE_ALL", True)
+    assert profiling.should_profile()
+
+
+def test_disabled_profiling_writes_nothing(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_ALL", False)
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    assert profiled("quiet")(_busy)(10) == _busy(10)
+    assert os.listdir(tmp_path) == []
+
+
+def test_sync_handler_writes_profile_memory_and_metadata(profile_dir):
+    handler = profiled("sync_handler")(_busy)
+    handler(1000)
+    handler(1000)
+    handler(2000)
+    files = os.listdir(profile_dir)
+    assert len([f for f in files if f.endswith(".prof")]) == 3
+    assert len([f for f in files if f.endswith(".tracemalloc")]) == 3
+    metas = _metas(profile_dir)
+    assert {meta["handler"] for meta in metas} == {"sync_handler"}
+    # 相同输入的签名相同
+    assert len({meta["signature"] for meta in metas}) == 2
+    assert all(meta["error"] is None and meta["duration"] > 0 for meta in metas)
+    assert "<genexpr>" in _profiled_functions(profile_dir, "sync_handler")
+
+
+def test_errors_are_recorded_and_reraised(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MEMORY", False)
+
+    @profiled("failing")
+    def handler():
+        raise KeyError("x")
+
+    with pytest.raises(KeyError):
+        handler()
+    assert [meta["error"] for meta in _metas(profile_dir)] == ["KeyError"]
+    assert not glob.glob(os.path.join(profile_dir, "*.tracemalloc"))
+
+
+def test_nested_handlers_share_one_session(profile_dir):
+    inner = profiled("inner")(_busy)
+
+    @profiled("outer")
+    def outer():
+        return inner(100)
+
+    outer()
+    assert [meta["handler"] for meta in _metas(profile_dir)] == ["outer"]
+
+
+def test_coroutine_and_async_generator_are_profiled(profile_dir):
+    @profiled("coroutine")
+    async def coroutine(n):
+        await asyncio.sleep(0)
+        return _busy(n)
+
+    @profiled("stream")
+    async def stream(n):
+        for i in range(n):
+            await asyncio.sleep(0)
+            yield _busy(i)
+
+    async def run():
+        value = await coroutine(100)
+        items = [item async for item in stream(3)]
+        return value, items
+
+    assert asyncio.run(run()) == (_busy(100), [_busy(0), _busy(1), _busy(2)])
+    assert sorted(meta["handler"] for meta in _metas(profile_dir)) == ["coroutine", "stream"]
+    assert "_busy" in _profiled_functions(profile_dir, "coroutine")
+    assert "_busy" in _profiled_functions(profile_dir, "stream")
+
+
+def test_stage_of():
+    assert profiling.stage_of("/app/recipe_index.py", "candidates") == "筛选"
+    assert profiling.stage_of("/app/meal_service.py", "format_meal_day") == "格式化"
+    assert profiling.stage_of("/usr/lib/python3/site-packages/httpx/_client.py", "get") == "获取"
+    assert profiling.stage_of("/app/meal_service.py", "plan_data") == "其他"
+
+
+def test_report_cli(profile_dir, capsys):
+    profiled("first")(_busy)(1000)
+    profiled("second")(_busy)(500)
+
+    assert profiling.main(["report", profile_dir, "--json", "--top", "5"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["requests"] == 2
+    assert set(report["handlers"]) == {"first", "second"}
+    assert len(report["functions"]) <= 5
+    assert abs(sum(report["stages"].values()) - 1) < 1e-6
+
+    assert profiling.main(["report", profile_dir, "--handler", "first", "--sort", "tottime"]) == 0
+    text = capsys.readouterr().out
+    assert "共 1 个请求" in text and "first: 1次" in text
+
+
+def test_report_cli_without_profiles(tmp_path, capsys):
+    assert profiling.main(["report", str(tmp_path)]) == 1
+    assert "没有剖析文件" in capsys.readouterr().out
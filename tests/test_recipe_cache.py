@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import meal_service
+from recipe_cache import RecipeCache
+
+URL = "https://github.com/Anduin2017/HowToCook/blob/master/dishes/meat_dish/红烧肉.md"
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """ttl为0的缓存：每次读取都需要重新验证"""
+    cache = RecipeCache(cache_dir=str(tmp_path), ttl=0)
+    monkeypatch.setattr(meal_service, "RECIPE_CACHE", cache)
+    monkeypatch.setattr(meal_service, "RECIPE_CACHE_OFFLINE", False)
+    return cache
+
+
+def _upstream(monkeypatch, response):
+    requests = []
+
+    def fetch(url, headers=None):
+        requests.append(headers)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(meal_service, "fetch", fetch)
+    return requests
+
+
+def test_stale_entry_is_revalidated_with_etag(cache, monkeypatch):
+    raw_url = meal_service.to_raw_url(URL)
+    cache.put(raw_url, "旧做法", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    requests = _upstream(monkeypatch, FakeResponse(304))
+    assert meal_service.get_recipe_content(URL) == "旧做法"
+    assert requests == [{"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}]
+    assert cache.get(raw_url)["etag"] == '"v1"'
+
+
+def test_changed_content_replaces_entry(cache, monkeypatch):
+    raw_url = meal_service.to_raw_url(URL)
+    cache.put(raw_url, "旧做法", etag='"v1"')
+    _upstream(monkeypatch, FakeResponse(200, "新做法", {"ETag": '"v2"'}))
+    assert meal_service.get_recipe_content(URL) == "新做法"
+    entry = RecipeCache(cache_dir=cache.cache_dir).get(raw_url)
+    assert (entry["content"], entry["etag"]) == ("新做法", '"v2"')
+
+
+def test_upstream_failure_serves_stale_content(cache, monkeypatch):
+    raw_url = meal_service.to_raw_url(URL)
+    cache.put(raw_url, "旧做法", etag='"v1"')
+    _upstream(monkeypatch, ConnectionError("down"))
+    assert meal_service.get_recipe_content(URL) == "旧做法"
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = RecipeCache(cache_dir=None, max_memory_bytes=1000)
+    for i in range(20):
+        cache.put(f"https://example.com/{i}.md", "x" * 100)
+    assert cache.get("https://example.com/0.md") is None
+    assert cache.get("https://example.com/19.md")["content"] == "x" * 100
+
+
+def test_disk_directory_is_created_on_first_write(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = RecipeCache(cache_dir=str(cache_dir))
+    assert cache.get("https://example.com/a.md") is None
+    assert not cache_dir.exists()
+    cache.put("https://example.com/a.md", "做法")
+    assert cache_dir.is_dir()
+    assert RecipeCache(cache_dir=str(cache_dir), max_memory_bytes=0).get("https://example.com/a.md")["content"] == "做法"
+
+
+def test_disk_tier_is_bounded_across_instances(tmp_path):
+    cache = RecipeCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=2000)
+    for i in range(20):
+        cache.put(f"https://example.com/{i}.md", "x" * 200)
+    reopened = RecipeCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=2000)
+    reopened.put("https://example.com/new.md", "y" * 200)
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 2000
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from benchmarks.synthetic_catalog import generate_catalog
+from recipe_catalog import SQLiteCatalog, write_sqlite_catalog
+from recipe_index import HEALTH_GOALS, CandidateIndex, SearchIndex
+
+LONG_NAME = "秘制红烧排骨炖土豆胡萝卜玉米香菇"
+
+
+@pytest.fixture(scope="module")
+def catalogs(tmp_path_factory):
+    """同一份菜谱数据库的内存版本和SQLite版本"""
+    database = generate_catalog(500, seed=1)
+    database["晚餐"].append({"name": f"{LONG_NAME} + 米饭", "url": "https://example.com/long.md"})
+    path = tmp_path_factory.mktemp("catalog") / "recipes_database.sqlite"
+    write_sqlite_catalog(database, str(path))
+    return database, SQLiteCatalog(str(path))
+
+
+def _pairs(recipes):
+    return [(r["name"], r["url"]) for r in recipes]
+
+
+@pytest.mark.parametrize("query", [
+    "", "鸡", "米饭", "牛奶/豆浆", "红烧", "土豆", "不存在的菜", LONG_NAME, LONG_NAME + " + 米饭", LONG_NAME[3:]
+])
+def test_sqlite_search_matches_memory(catalogs, query):
+    database, sqlite_catalog = catalogs
+    assert sqlite_catalog.search_index().search(query) == SearchIndex(database).search(query)
+
+
+def test_sqlite_search_long_query(catalogs):
+    # 每个二元组一项的复合查询会超过SQLite的项数限制
+    database, sqlite_catalog = catalogs
+    query = "".join(chr(0x4e00 + i) for i in range(700))
+    assert sqlite_catalog.search_index().search(query) == SearchIndex(database).search(query) == []
+    assert len(sqlite_catalog.search_index().search(LONG_NAME * 3)) == len(SearchIndex(database).search(LONG_NAME * 3))
+
+
+@pytest.mark.parametrize("health_goal", HEALTH_GOALS)
+@pytest.mark.parametrize("prefs,exclude_terms", [
+    ((), ()), (("不吃辣",), ()), (("素食",), ()), (("不吃乳制品",), ()), (("不要香菜", "不吃葱"), ("鸡", "土豆"))
+])
+def test_sqlite_candidates_match_memory(catalogs, health_goal, prefs, exclude_terms):
+    database, sqlite_catalog = catalogs
+    memory_index = CandidateIndex(database)
+    sqlite_index = sqlite_catalog.candidate_index()
+    for meal_type in database:
+        expected = memory_index.candidates(meal_type, health_goal, list(prefs), exclude_terms)
+        assert _pairs(sqlite_index.candidates(meal_type, health_goal, list(prefs), exclude_terms)) == _pairs(expected)
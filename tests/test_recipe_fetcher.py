@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import http.server
+import threading
+
+import pytest
+
+from recipe_fetcher import AsyncRecipeFetcher, to_raw_url
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = "# 做法".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/recipe.md"
+    server.shutdown()
+    server.server_close()
+
+
+def test_to_raw_url():
+    url = "https://github.com/Anduin2017/HowToCook/blob/master/dishes/breakfast/太阳蛋.md"
+    assert to_raw_url(url) == "https://raw.githubusercontent.com/Anduin2017/HowToCook/master/dishes/breakfast/太阳蛋.md"
+
+
+def test_client_is_closed_when_each_loop_shuts_down(server_url):
+    fetcher = AsyncRecipeFetcher()
+    clients = []
+
+    async def fetch():
+        result = await fetcher.fetch(server_url)
+        clients.append(next(iter(fetcher._clients.values())).client)
+        return result.text
+
+    assert asyncio.run(fetch()) == "# 做法"
+    assert asyncio.run(fetch()) == "# 做法"
+    assert clients[0] is not clients[1]
+    assert all(client.is_closed for client in clients)
+    assert len(fetcher._clients) == 0
+
+
+def test_explicit_aclose(server_url):
+    fetcher = AsyncRecipeFetcher()
+
+    async def fetch_and_close():
+        await fetcher.fetch(server_url)
+        client = next(iter(fetcher._clients.values())).client
+        await fetcher.aclose()
+        return client
+
+    assert asyncio.run(fetch_and_close()).is_closed
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import re
+
+import pytest
+
+import recipe_formatter
+from benchmarks.synthetic_catalog import generate_recipe_markdown
+from recipe_formatter import clear_format_cache, format_recipe, strip_markdown
+
+NESTED = """# 番茄炒蛋
+
+## 必备原料和工具
+
+- [**番茄**](../tomato.md) 2 个
+- *鸡蛋* 3 个，`盐` 适量
+-   
+### 
+
+1. 先炒**鸡蛋**，再放[番茄](x.md)，*小火*收汁
+2. `代码中的**星号**` 和 *斜体中的`代码`*
+3. 未闭合的 **粗体 和 [链接
+"""
+
+
+def _multi_pass(content, recipe_name):
+    """重构前逐行依次执行五次替换的实现，作为对照"""
+    formatted_lines = []
+    for line in content.split("\n"):
+        line = re.sub(r"^#+\s*", "", line)
+        line = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", line)
+        line = re.sub(r"\*\*([^*]+)\*\*", r"\1", line)
+        line = re.sub(r"\*([^*]+)\*", r"\1", line)
+        line = re.sub(r"`([^`]+)`", r"\1", line)
+        if line.strip():
+            formatted_lines.append(line)
+    return f"🍽️ {recipe_name} 详细做法\n" + "═" * 50 + "\n\n" + "\n".join(formatted_lines)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_format_cache()
+    yield
+    clear_format_cache()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_single_pass_matches_multi_pass_on_recipes(seed):
+    content = generate_recipe_markdown(f"菜品{seed}", steps=20, seed=seed)
+    assert format_recipe(content, f"菜品{seed}") == _multi_pass(content, f"菜品{seed}")
+
+
+def test_single_pass_matches_multi_pass_on_nested_markup():
+    assert format_recipe(NESTED, "番茄炒蛋") == _multi_pass(NESTED, "番茄炒蛋")
+
+
+def test_crossing_marks_are_stripped_once():
+    # 斜体跨进了代码标记：多次替换时后一遍还会去掉反引号，单遍扫描只处理外层
+    assert strip_markdown("2 * 3 与 `a*b`") == "2  3 与 `ab`"
+
+
+def test_strip_markdown_removes_marks_and_blank_lines():
+    assert strip_markdown("# 标题\n\n  \n[**粗体链接**](a.md) 和 `代码`\n") == "标题\n粗体链接 和 代码"
+
+
+def test_results_are_cached_by_content_and_name(monkeypatch):
+    calls = []
+    original = recipe_formatter.strip_markdown
+    monkeypatch.setattr(recipe_formatter, "strip_markdown", lambda text: calls.append(text) or original(text))
+    first = format_recipe(NESTED, "番茄炒蛋")
+    assert format_recipe(NESTED, "番茄炒蛋") is first
+    assert len(calls) == 1
+    # 同样的内容换一个名称，标题不同，需要重新格式化
+    assert format_recipe(NESTED, "西红柿炒鸡蛋").startswith("🍽️ 西红柿炒鸡蛋")
+    assert len(calls) == 2
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(recipe_formatter, "MAX_FORMATTED_ENTRIES", 3)
+    for i in range(10):
+        format_recipe(f"# 菜品{i}", f"菜品{i}")
+    assert len(recipe_formatter._formatted) == 3
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import concurrent.futures
+import itertools
+
+import pytest
+
+import recipe_index
+from benchmarks.synthetic_catalog import generate_catalog
+from recipe_index import TASTE_KEYWORDS, CandidateIndex
+
+# 口味偏好的全部组合，作为互不相同的缓存键
+PREF_COMBINATIONS = [
+    list(combo) for r in range(len(TASTE_KEYWORDS) + 1) for combo in itertools.combinations(TASTE_KEYWORDS, r)
+]
+
+
+@pytest.fixture(scope="module")
+def database():
+    return generate_catalog(300, seed=2)
+
+
+def test_candidate_cache_is_bounded_under_threads(monkeypatch, database):
+    monkeypatch.setattr(recipe_index, "MAX_CACHED_CANDIDATES", 8)
+    reference = CandidateIndex(database)
+    expected = [reference.candidates("午餐", "无目标", prefs) for prefs in PREF_COMBINATIONS]
+    index = CandidateIndex(database)
+
+    def query(i):
+        i %= len(PREF_COMBINATIONS)
+        return i, index.candidates("午餐", "无目标", PREF_COMBINATIONS[i])
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        for i, result in pool.map(query, range(2000)):
+            assert result == expected[i]
+    assert len(index.recent_queries()) <= 8
+
+
+def test_candidate_cache_evicts_least_recently_used(monkeypatch, database):
+    monkeypatch.setattr(recipe_index, "MAX_CACHED_CANDIDATES", 3)
+    index = CandidateIndex(database)
+    a, b, c, d = PREF_COMBINATIONS[:4]
+    first_a = index.candidates("午餐", "无目标", a)
+    first_b = index.candidates("午餐", "无目标", b)
+    index.candidates("午餐", "无目标", c)
+    index.candidates("午餐", "无目标", a)
+    index.candidates("午餐", "无目标", d)
+    # a 刚被访问过，b 是最久未使用的
+    assert index.candidates("午餐", "无目标", a) is first_a
+    assert index.candidates("午餐", "无目标", b) is not first_b
+
+
+def test_exclusion_masks_are_bounded_under_threads(monkeypatch, database):
+    monkeypatch.setattr(recipe_index, "MAX_EXCLUSION_MASKS", 4)
+    pool = CandidateIndex(database).pools["午餐"]
+    terms = [(term,) for term in "鸡鸭鱼肉牛猪虾蟹豆蛋"]
+    expected = [CandidateIndex(database).pools["午餐"].exclusion_mask(t) for t in terms]
+
+    def query(i):
+        i %= len(terms)
+        return i, pool.exclusion_mask(terms[i])
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        for i, mask in executor.map(query, range(2000)):
+            assert mask == expected[i]
+    assert len(pool._exclusion_masks) <= 4
+
+
+SEARCH_DATABASE = {
+    "午餐": [
+        {"name": "红烧肉 + 青菜 + 米饭", "url": "https://example.com/hsr.md"},
+        {"name": "红烧肉饭 + 米饭", "url": "https://example.com/hsrf.md"},
+        {"name": "东坡红烧肉 + 米饭", "url": "https://example.com/dp.md"},
+        {"name": "Pasta Carbonara + 米饭", "url": "https://example.com/pasta.md"}
+    ],
+    "晚餐": [{"name": "红烧肉 + 米饭", "url": "https://example.com/hsr.md"}],
+    "加餐": ["苹果"]
+}
+
+
+def test_search_ranks_exact_prefix_contains_and_side_matches():
+    index = recipe_index.SearchIndex(SEARCH_DATABASE)
+    hits = index.search("红烧肉")
+    assert [(hit["name"], hit["score"]) for hit in hits] == [
+        ("红烧肉 + 青菜 + 米饭", 3), ("红烧肉 + 米饭", 3), ("红烧肉饭 + 米饭", 2), ("东坡红烧肉 + 米饭", 1)
+    ]
+    assert [hit["category"] for hit in hits[:2]] == ["午餐", "晚餐"]
+    # 只在搭配中出现的词得分为0，但仍然返回
+    assert {hit["score"] for hit in index.search("青菜")} == {0}
+
+
+def test_search_single_character_case_and_misses():
+    index = recipe_index.SearchIndex(SEARCH_DATABASE)
+    assert [hit["name"] for hit in index.search("果")] == ["苹果"]
+    assert [hit["name"] for hit in index.search("CARBONARA")] == ["Pasta Carbonara + 米饭"]
+    assert index.search("") == []
+    assert index.search("红烧青菜") == []
+
+
+def test_lookup_matches_base_name_in_every_meal():
+    index = recipe_index.SearchIndex(SEARCH_DATABASE)
+    assert [(info["name"], info["category"]) for info in index.lookup("红烧肉")] == [
+        ("红烧肉 + 青菜 + 米饭", "午餐"), ("红烧肉 + 米饭", "晚餐")
+    ]
+    assert index.lookup(" pasta carbonara ")[0]["url"] == "https://example.com/pasta.md"
+    # 精确查找不做子串匹配，也不匹配搭配部分
+    assert index.lookup("红烧") == []
+    assert index.lookup("米饭") == []
+
+
+def test_lookup_legacy_string_recipes():
+    index = recipe_index.SearchIndex(SEARCH_DATABASE)
+    assert index.lookup("苹果") == [{"name": "苹果", "url": "", "category": "加餐"}]
+
+
+def _vegetarian(ingredients):
+    return bool(recipe_index.ingredient_mask(ingredients) & recipe_index.DISH_CLASSIFIER.tag_bit("素食"))
+
+
+def test_vegetarian_ingredients_cover_every_name_keyword():
+    # 按原料判断时，按菜名判断的每个荤菜关键词仍然被排除
+    for keyword in TASTE_KEYWORDS["素食"]:
+        assert _vegetarian([keyword]), keyword
+
+
+def test_vegetarian_ingredients_catch_meat_products_and_animal_seasonings():
+    for ingredient in ("培根", "火腿", "鸭蛋", "扇贝", "蚝油", "鱼露", "猪油"):
+        assert _vegetarian([ingredient]), ingredient
+    for ingredient in ("洋葱", "牛油果", "贝贝南瓜", "豆腐", "土豆", "香菇"):
+        assert not _vegetarian([ingredient]), ingredient
+
+
+def test_vegetarian_preference_uses_ingredients_when_present():
+    database = {
+        meal: [
+            {"name": "炒饭", "url": "", "ingredients": ["米饭", "培根"]},
+            {"name": "清炒时蔬", "url": "", "ingredients": ["青菜", "蒜"]},
+            {"name": "红烧肉", "url": ""}
+        ]
+        for meal in ("早餐", "午餐", "晚餐", "加餐")
+    }
+    names = [r["name"] for r in CandidateIndex(database).candidates("午餐", "无目标", ["素食"])]
+    assert names == ["清炒时蔬"]
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from ingredient_parser import parse_quantities
+from shopping_list import aggregate, format_quantity, plan_dishes
+
+RECIPE = """# 红烧肉的做法
+
+## 必备原料和工具
+
+* 五花肉
+* 冰糖
+* 葱
+* 八角
+
+## 计算
+
+总量：
+
+* 五花肉 500g
+* 冰糖 15-20 克
+* 生抽 1.5 两
+* 料酒 0.1 升
+* 葱 1/2 根 /人
+
+每份：
+
+* 鸡蛋 1 个
+
+## 操作
+
+* 五花肉 1000g 切块
+"""
+
+
+def _by_name(quantities):
+    return {q["name"]: q for q in quantities}
+
+
+def test_parse_quantities_units_ranges_and_servings():
+    quantities = _by_name(parse_quantities(RECIPE))
+    assert quantities["五花肉"] == {"name": "五花肉", "amount": 500, "amount_max": None, "unit": "g", "per_serving": False}
+    assert (quantities["冰糖"]["amount"], quantities["冰糖"]["amount_max"]) == (15, 20)
+    assert (quantities["生抽"]["amount"], quantities["生抽"]["unit"]) == (75, "g")
+    assert (quantities["料酒"]["amount"], quantities["料酒"]["unit"]) == (100, "ml")
+    assert (quantities["葱"]["amount"], quantities["葱"]["per_serving"]) == (0.5, True)
+    assert quantities["鸡蛋"]["per_serving"]
+    # 只在「必备原料和工具」中列出的原料没有用量
+    assert quantities["八角"]["amount"] is None
+
+
+def test_parse_quantities_ignores_other_sections():
+    assert all(q["amount"] != 1000 for q in parse_quantities(RECIPE))
+
+
+def test_aggregate_scales_and_merges():
+    a = [
+        {"name": "鸡蛋", "amount": 1, "amount_max": None, "unit": "个", "per_serving": True},
+        {"name": "猪肉", "amount": 300, "amount_max": None, "unit": "g", "per_serving": False},
+        {"name": "盐", "amount": None, "amount_max": None, "unit": "", "per_serving": False}
+    ]
+    b = [
+        {"name": "鸡蛋", "amount": 2, "amount_max": 3, "unit": "个", "per_serving": False},
+        {"name": "猪肉", "amount": 0.5, "amount_max": None, "unit": "斤", "per_serving": False},
+        {"name": "盐", "amount": 2, "amount_max": None, "unit": "g", "per_serving": False}
+    ]
+    items = _by_name(aggregate([("A", 2, a), ("B", 1, b)], people=3))
+    # 按份：1个 × 2次 × 3人 = 6；整道菜：2~3个 × 1次
+    assert items["鸡蛋"]["quantities"] == [{"amount": 8, "amount_max": 9, "unit": "个"}]
+    assert items["猪肉"]["quantities"] == [
+        {"amount": 600, "amount_max": None, "unit": "g"}, {"amount": 0.5, "amount_max": None, "unit": "斤"}
+    ]
+    assert items["盐"]["as_needed"] and items["盐"]["quantities"] == [{"amount": 2, "amount_max": None, "unit": "g"}]
+    assert items["鸡蛋"]["dishes"] == ["A", "B"]
+
+
+def test_plan_dishes_counts_dishes_and_sides():
+    url = "https://example.com/红烧肉.md"
+    plan = {
+        "第1天": {"午餐": {"name": "红烧肉 + 青菜 + 米饭", "url": url}, "加餐": {"name": "苹果", "url": ""}},
+        "第2天": {"午餐": {"name": "红烧肉 + 米饭", "url": url}, "加餐": {"name": "❌ 没有可用菜品", "url": ""}}
+    }
+    dishes, sides = plan_dishes(plan)
+    assert dishes == [{"name": "红烧肉", "url": url, "count": 2}]
+    assert sides == {"青菜": 1, "米饭": 2, "苹果": 1}
+
+
+def test_format_quantity():
+    assert format_quantity({"amount": 1500, "amount_max": None, "unit": "g"}) == "1.5 kg"
+    assert format_quantity({"amount": 2, "amount_max": 4, "unit": "个"}) == "2 个 ~ 4 个"
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_waiters_share_the_leader_result():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def leader_fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "key", leader_fn)
+        started.wait(5)
+        waiters = [pool.submit(flight.do, "key", leader_fn) for _ in range(3)]
+        release.set()
+        assert leader.result() == "done"
+        assert [w.result() for w in waiters] == ["done"] * 3
+    assert calls == [1]
+
+
+def test_exception_reaches_waiters_and_key_is_released():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait(5)
+        waiter = pool.submit(flight.do, "key", failing)
+        release.set()
+        for future in (leader, waiter):
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.do("key", lambda: "again") == "again"
+
+
+def test_async_calls_are_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "content"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["content"] * 10
+    assert calls == [1]